@@ -1,3 +1,14 @@
 from django.contrib import admin
+from .models import UserStatistics
 
-# Register your models here.
+
+@admin.register(UserStatistics)
+class UserStatisticsAdmin(admin.ModelAdmin):
+    list_display = ('user', 'total_orders', 'total_spent', 'total_reservations', 'total_reviews', 'computed_at')
+    list_select_related = ('user',)
+    search_fields = ('user__username', 'user__email')
+    ordering = ('-total_spent',)
+    readonly_fields = (
+        'user', 'total_orders', 'total_spent', 'total_reviews', 'total_reservations',
+        'pending_reservations', 'confirmed_reservations', 'computed_at',
+    )
@@ -0,0 +1,106 @@
+"""
+Revenue analytics served from the sales rollup tables
+"""
+import datetime
+
+from django.db.models import F, Sum
+from django.utils import timezone
+from restaurant_server.models import MenuItemSalesRollup, OrderHistory, OrderSalesRollup
+from .filters import FilterError, date_param, int_param
+
+ORDER_STATUSES = [choice for choice, _ in OrderHistory._meta.get_field('status').choices]
+# Cancelled orders are not revenue unless asked for explicitly
+DEFAULT_STATUSES = [status for status in ORDER_STATUSES if status != 'cancelled']
+MAX_RANGE_DAYS = {'hour': 31, 'day': 366}
+DEFAULT_RANGE_DAYS = 30
+DEFAULT_DISH_LIMIT = 20
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def sales_series_rows(granularity, period, menu_item_id=None):
+    """
+    Per-period sums for the series: orders overall, or units of one dish
+    """
+    if menu_item_id is None:
+        rows = OrderSalesRollup.objects.filter(granularity=granularity, **period) \
+            .values('period_start').annotate(orders=Sum('order_count'))
+    else:
+        rows = MenuItemSalesRollup.objects.filter(granularity=granularity, menu_item_id=menu_item_id, **period) \
+            .values('period_start').annotate(quantity=Sum('quantity'))
+    return rows.annotate(revenue=Sum('revenue')).order_by('period_start')
+
+
+def sales_dish_rows(period, menu_item_id=None):
+    """
+    Per-dish sums over the whole range, best-selling first
+    """
+    # Daily rows are enough for range totals, whatever the series granularity
+    dishes = MenuItemSalesRollup.objects.filter(granularity='day', **period)
+    if menu_item_id is not None:
+        dishes = dishes.filter(menu_item_id=menu_item_id)
+    return dishes.values('menu_item_id', food_name=F('menu_item__food_name')) \
+        .annotate(quantity=Sum('quantity'), revenue=Sum('revenue')) \
+        .filter(quantity__gt=0) \
+        .order_by('-revenue', 'menu_item_id')
+
+
+def sales_report(params):
+    """
+    Revenue per period plus the best-selling dishes for a date range.
+
+    Both parts read rollup rows only: one per period and status for the
+    series, and one per day, dish and status for the dish ranking.
+    """
+    granularity = params.get('granularity', 'day')
+    if granularity not in MAX_RANGE_DAYS:
+        raise FilterError('granularity must be hour or day')
+
+    statuses = [s for s in params.get('status', '').split(',') if s] or DEFAULT_STATUSES
+    unknown = set(statuses) - set(ORDER_STATUSES)
+    if unknown:
+        raise FilterError(f"Unknown status: {', '.join(sorted(unknown))}")
+
+    date_to = date_param(params, 'date_to') or timezone.localdate()
+    date_from = date_param(params, 'date_from') or date_to - datetime.timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    if date_from > date_to:
+        raise FilterError('date_from must not be after date_to')
+    if (date_to - date_from).days + 1 > MAX_RANGE_DAYS[granularity]:
+        raise FilterError(f'{granularity} reports cover at most {MAX_RANGE_DAYS[granularity]} days')
+
+    menu_item_id = int_param(params, 'menu_item')
+    limit = int_param(params, 'limit', 1, 100) or DEFAULT_DISH_LIMIT
+    period = {
+        'period_start__gte': _day_start(date_from),
+        'period_start__lt': _day_start(date_to + datetime.timedelta(days=1)),
+        'status__in': statuses,
+    }
+
+    # A single dish's series counts units sold; the overall series counts orders
+    count_key = 'orders' if menu_item_id is None else 'quantity'
+    series = [
+        {**row, 'revenue': round(row['revenue'], 2)}
+        for row in sales_series_rows(granularity, period, menu_item_id)
+        # Buckets whose orders were all moved or deleted stay behind as zeros
+        if row[count_key]
+    ]
+    dishes = [
+        {**row, 'revenue': round(row['revenue'], 2)}
+        for row in sales_dish_rows(period, menu_item_id)[:limit]
+    ]
+
+    totals = {
+        count_key: sum(row[count_key] for row in series),
+        'revenue': round(sum(row['revenue'] for row in series), 2),
+    }
+    return {
+        'granularity': granularity,
+        'date_from': date_from,
+        'date_to': date_to,
+        'statuses': statuses,
+        'totals': totals,
+        'series': series,
+        'dishes': dishes,
+    }
@@ -0,0 +1,99 @@
+"""
+Chunked deletion of users and their associated data
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from auth_app.models import User
+from restaurant_server.models import OrderHistory, OrderItem, Review, TableReservation
+from .models import UserDeletionJob
+
+
+def count_user_data(user_ids):
+    """
+    Count each user's orders, order items, reservations and reviews.
+
+    Uses one grouped query per table regardless of how many users are given.
+    """
+    counts = {
+        user_id: {'orders': 0, 'order_items': 0, 'reservations': 0, 'reviews': 0}
+        for user_id in user_ids
+    }
+    grouped = (
+        ('orders', OrderHistory.objects.filter(user_id__in=user_ids), 'user_id'),
+        ('order_items', OrderItem.objects.filter(order__user_id__in=user_ids), 'order__user_id'),
+        ('reservations', TableReservation.objects.filter(user_id__in=user_ids), 'user_id'),
+        ('reviews', Review.objects.filter(user_id__in=user_ids), 'user_id'),
+    )
+    for name, queryset, user_field in grouped:
+        rows = queryset.order_by().values(user_field).annotate(total=Count('id'))
+        for row in rows:
+            counts[row[user_field]][name] = row['total']
+    return counts
+
+
+def create_user_deletion_job(users, requested_by=None):
+    """
+    Record a deletion job for `users`, snapshotting how much data each one owns
+    """
+    users = list(users)
+    counts = count_user_data([user.id for user in users])
+    details = [{
+        'user_id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'orders_deleted': counts[user.id]['orders'],
+        'order_items_deleted': counts[user.id]['order_items'],
+        'reservations_deleted': counts[user.id]['reservations'],
+        'reviews_deleted': counts[user.id]['reviews'],
+    } for user in users]
+    return UserDeletionJob.objects.create(
+        requested_by=requested_by,
+        user_ids=[user.id for user in users],
+        details=details,
+        users_total=len(users),
+    )
+
+
+def _delete_in_batches(job, queryset, progress_field, batch_size):
+    """
+    Delete `queryset` a batch at a time, each batch in its own short transaction
+    """
+    model = queryset.model
+    while True:
+        pks = list(queryset.order_by().values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return
+        with transaction.atomic():
+            deleted = model.objects.filter(pk__in=pks).delete()[1].get(model._meta.label, 0)
+            UserDeletionJob.objects.filter(pk=job.pk).update(**{progress_field: F(progress_field) + deleted})
+
+
+def run_user_deletion_job(job_id):
+    """
+    Delete every user in the job, child tables first, in bounded batches.
+
+    Locks are only held for one batch at a time so live traffic can interleave
+    with a large purge. Progress counters are updated after every batch.
+    """
+    job = UserDeletionJob.objects.get(pk=job_id)
+    UserDeletionJob.objects.filter(pk=job.pk).update(status='running')
+    batch_size = settings.USER_DELETION_BATCH_SIZE
+
+    try:
+        for user_id in job.user_ids:
+            # Reviews go first: removing one from the dish ratings needs its order's items
+            _delete_in_batches(job, Review.objects.filter(user_id=user_id), 'reviews_deleted', batch_size)
+            _delete_in_batches(job, OrderItem.objects.filter(order__user_id=user_id), 'order_items_deleted', batch_size)
+            _delete_in_batches(job, OrderHistory.objects.filter(user_id=user_id), 'orders_deleted', batch_size)
+            _delete_in_batches(job, TableReservation.objects.filter(user_id=user_id), 'reservations_deleted', batch_size)
+            # Whatever is left hanging off the user is small enough to cascade
+            _delete_in_batches(job, User.objects.filter(pk=user_id), 'users_deleted', batch_size)
+    except Exception as e:
+        UserDeletionJob.objects.filter(pk=job.pk).update(
+            status='failed', error=str(e), finished_at=timezone.now()
+        )
+        raise
+
+    UserDeletionJob.objects.filter(pk=job.pk).update(status='completed', finished_at=timezone.now())
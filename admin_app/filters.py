@@ -0,0 +1,127 @@
+"""
+Query-string filters for the admin list endpoints.
+
+Each filter maps onto a column the list's indexes lead with, so a filtered
+page stays a single indexed range query.
+"""
+import datetime
+
+from restaurant_server.models import TableReservation
+
+RESERVATION_STATUSES = {choice for choice, _ in TableReservation._meta.get_field('status').choices}
+
+# Upper bound for prefix ranges; sorts after every other code point
+PREFIX_SENTINEL = '\U0010ffff'
+
+
+class FilterError(Exception):
+    pass
+
+
+def int_param(params, name, minimum=None, maximum=None):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        value = int(value)
+    except ValueError:
+        raise FilterError(f'{name} must be an integer')
+    if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+        raise FilterError(f'{name} must be between {minimum} and {maximum}')
+    return value
+
+
+def date_param(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise FilterError(f'{name} must be a date in YYYY-MM-DD format')
+
+
+def bool_param(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    if value.lower() in ('true', '1'):
+        return True
+    if value.lower() in ('false', '0'):
+        return False
+    raise FilterError(f'{name} must be true or false')
+
+
+def _prefix(queryset, field, prefix):
+    # A range instead of LIKE so the unique index on the column is used
+    return queryset.filter(**{f'{field}__gte': prefix, f'{field}__lt': prefix + PREFIX_SENTINEL})
+
+
+def filter_reservations(queryset, params):
+    """
+    Filter by status (comma separated), user, date_from and date_to (reservation date)
+    """
+    statuses = [s for s in params.get('status', '').split(',') if s]
+    unknown = set(statuses) - RESERVATION_STATUSES
+    if unknown:
+        raise FilterError(f"Unknown status: {', '.join(sorted(unknown))}")
+    if statuses:
+        queryset = queryset.filter(status__in=statuses)
+
+    user_id = int_param(params, 'user')
+    if user_id is not None:
+        queryset = queryset.filter(user_id=user_id)
+
+    date_from = date_param(params, 'date_from')
+    date_to = date_param(params, 'date_to')
+    if date_from and date_to and date_from > date_to:
+        raise FilterError('date_from must not be after date_to')
+    if date_from:
+        queryset = queryset.filter(reservation_date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(reservation_date__lte=date_to)
+    return queryset
+
+
+def filter_reviews(queryset, params):
+    """
+    Filter by exact stars, min_stars and user
+    """
+    stars = int_param(params, 'stars', 1, 5)
+    if stars is not None:
+        queryset = queryset.filter(stars=stars)
+
+    min_stars = int_param(params, 'min_stars', 1, 5)
+    if min_stars is not None:
+        queryset = queryset.filter(stars__gte=min_stars)
+
+    user_id = int_param(params, 'user')
+    if user_id is not None:
+        queryset = queryset.filter(user_id=user_id)
+    return queryset
+
+
+def user_ordering(params):
+    """
+    The column a prefix search ranges over, so listing walks its unique index
+    """
+    return next((field for field in ('email', 'username') if params.get(field)), None)
+
+
+def filter_users(queryset, params):
+    """
+    Filter by email or username prefix (case sensitive), is_staff and is_active
+    """
+    email = params.get('email')
+    if email:
+        queryset = _prefix(queryset, 'email', email)
+
+    username = params.get('username')
+    if username:
+        queryset = _prefix(queryset, 'username', username)
+
+    for flag in ('is_staff', 'is_active'):
+        value = bool_param(params, flag)
+        if value is not None:
+            queryset = queryset.filter(**{flag: value})
+    return queryset
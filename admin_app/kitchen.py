@@ -0,0 +1,72 @@
+"""
+Kitchen display queue of active orders.
+
+A full load returns every active order, oldest first, read from the partial
+index on active statuses. Each response carries a version token; passing it
+back as `since` returns only the active orders created or changed after it,
+together with the ids of all active orders so the screen can drop orders
+that left the queue.
+"""
+import datetime
+
+from django.db.models import F
+from django.utils import timezone
+from restaurant_server.models import OrderHistory, OrderItem
+from .filters import FilterError, int_param
+
+# Re-read a little before the token so changes committed late are not missed
+SINCE_OVERLAP = datetime.timedelta(seconds=5)
+
+ORDER_COLUMNS = ('id', 'user_id', 'order_date', 'updated_at', 'status', 'special_instructions')
+
+
+def version_token(moment):
+    return str(int(moment.timestamp() * 1_000_000))
+
+
+def token_moment(token):
+    try:
+        return datetime.datetime.fromtimestamp(token / 1_000_000, tz=datetime.timezone.utc)
+    except (OverflowError, OSError, ValueError):
+        raise FilterError('since must be a version returned by this endpoint')
+
+
+def kitchen_order_rows(orders):
+    """
+    The order columns the kitchen screen shows, with the customer's username
+    """
+    return orders.values(*ORDER_COLUMNS, username=F('user__username'))
+
+
+def kitchen_orders(orders):
+    """
+    Order rows with their customer's username and line items, in two queries
+    """
+    orders = list(kitchen_order_rows(orders))
+    items = {}
+    lines = OrderItem.objects.filter(order_id__in=[order['id'] for order in orders]).order_by('id').values(
+        'order_id', 'menu_item_id', 'quantity', food_name=F('menu_item__food_name')
+    )
+    for line in lines:
+        items.setdefault(line.pop('order_id'), []).append(line)
+    for order in orders:
+        order['items'] = items.get(order['id'], [])
+    return orders
+
+
+def kitchen_queue(params):
+    """
+    The active order queue, or the changes to it since the `since` token
+    """
+    since = int_param(params, 'since', 0)
+    now = timezone.now()
+    active = OrderHistory.objects.kitchen_queue()
+    changed = active
+    if since is not None:
+        changed = active.filter(updated_at__gte=token_moment(since) - SINCE_OVERLAP)
+    return {
+        'version': version_token(now),
+        'full': since is None,
+        'orders': kitchen_orders(changed),
+        'active_ids': list(active.values_list('id', flat=True)),
+    }
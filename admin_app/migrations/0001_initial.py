@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-17 12:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_orders', models.PositiveIntegerField(default=0)),
+                ('total_spent', models.FloatField(default=0)),
+                ('total_reviews', models.PositiveIntegerField(default=0)),
+                ('total_reservations', models.PositiveIntegerField(default=0)),
+                ('pending_reservations', models.PositiveIntegerField(default=0)),
+                ('confirmed_reservations', models.PositiveIntegerField(default=0)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='statistics', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'User Statistics',
+            },
+        ),
+    ]
@@ -1,3 +1,60 @@
+import uuid
+
 from django.db import models
+from django.conf import settings
+
+
+class UserStatistics(models.Model):
+    """
+    Materialized per-user statistics shown on the admin user detail page.
+
+    Rows are dropped whenever one of the user's orders, reservations or reviews
+    changes and rebuilt from a single aggregate query on the next read.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='statistics')
+    total_orders = models.PositiveIntegerField(default=0)
+    total_spent = models.FloatField(default=0)
+    total_reviews = models.PositiveIntegerField(default=0)
+    total_reservations = models.PositiveIntegerField(default=0)
+    pending_reservations = models.PositiveIntegerField(default=0)
+    confirmed_reservations = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Statistics for {self.user.username}"
+
+    class Meta:
+        verbose_name_plural = "User Statistics"
+
+
+class UserDeletionJob(models.Model):
+    """
+    Model tracking a chunked deletion of one or more users and their data
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, blank=True, null=True, related_name='+'
+    )
+    user_ids = models.JSONField(default=list)
+    details = models.JSONField(default=list)
+    status = models.CharField(max_length=20, choices=[
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ], default='pending')
+    users_total = models.PositiveIntegerField(default=0)
+    users_deleted = models.PositiveIntegerField(default=0)
+    orders_deleted = models.PositiveIntegerField(default=0)
+    order_items_deleted = models.PositiveIntegerField(default=0)
+    reservations_deleted = models.PositiveIntegerField(default=0)
+    reviews_deleted = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"User deletion job {self.id} ({self.status})"
 
-# Create your models here.
+    class Meta:
+        ordering = ['-created_at']
@@ -0,0 +1,18 @@
+from restaurant_server.pagination import KeysetPagination
+
+
+class AdminListPagination(KeysetPagination):
+    page_size = 50
+    max_page_size = 500
+
+
+class AdminReservationPagination(AdminListPagination):
+    ordering = '-created_at'
+
+
+class AdminReviewPagination(AdminListPagination):
+    ordering = '-created_at'
+
+
+class AdminUserPagination(AdminListPagination):
+    ordering = '-date_created'
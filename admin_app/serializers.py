@@ -0,0 +1,31 @@
+from rest_framework import serializers
+from .models import UserDeletionJob
+
+
+class UserDeletionJobSerializer(serializers.ModelSerializer):
+    """
+    Serializer for UserDeletionJob progress reports
+    """
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UserDeletionJob
+        fields = ('id', 'status', 'progress', 'users_total', 'users_deleted', 'orders_deleted',
+                  'order_items_deleted', 'reservations_deleted', 'reviews_deleted', 'details',
+                  'error', 'created_at', 'finished_at')
+        read_only_fields = fields
+
+    def get_progress(self, obj):
+        """
+        Fraction of rows deleted so far, based on the counts taken when the job was created
+        """
+        total = obj.users_total + sum(
+            detail['orders_deleted'] + detail['order_items_deleted'] +
+            detail['reservations_deleted'] + detail['reviews_deleted']
+            for detail in obj.details
+        )
+        done = (obj.users_deleted + obj.orders_deleted + obj.order_items_deleted +
+                obj.reservations_deleted + obj.reviews_deleted)
+        if obj.status == 'completed' or not total:
+            return 1.0 if obj.status == 'completed' else 0.0
+        return round(min(done / total, 1.0), 4)
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from restaurant_backend.signals import first_of_deletion
+from restaurant_server.models import OrderHistory, Review, TableReservation
+from .statistics import invalidate_user_statistics
+
+
+@receiver([post_save, post_delete], sender=OrderHistory)
+@receiver([post_save, post_delete], sender=TableReservation)
+@receiver([post_save, post_delete], sender=Review)
+def user_activity_changed(sender, instance, origin=None, **kwargs):
+    """
+    Invalidate a user's statistics when their orders, reservations or reviews change
+    """
+    # A bulk delete only needs to invalidate each owner once
+    if origin is not None and not first_of_deletion(origin, ('statistics', instance.user_id)):
+        return
+    invalidate_user_statistics(instance.user_id)
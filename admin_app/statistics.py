@@ -0,0 +1,87 @@
+"""
+Aggregate user statistics for the admin dashboard
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, FloatField, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from auth_app.models import User
+from restaurant_server.models import OrderHistory, Review, TableReservation
+from .models import UserStatistics
+
+STATISTICS_FIELDS = (
+    'total_orders', 'total_spent', 'total_reviews', 'total_reservations',
+    'pending_reservations', 'confirmed_reservations',
+)
+
+
+def _per_user(queryset, aggregate, default, output_field):
+    """
+    Correlated subquery computing `aggregate` over the outer user's rows
+    """
+    subquery = (
+        queryset.filter(user=OuterRef('pk'))
+        .order_by()
+        .values('user')
+        .annotate(value=aggregate)
+        .values('value')
+    )
+    return Coalesce(Subquery(subquery, output_field=output_field), Value(default), output_field=output_field)
+
+
+def with_statistics(queryset):
+    """
+    Annotate a User queryset with every dashboard statistic in one query.
+
+    Each figure is a correlated subquery on the related table's user index, so
+    the orders, reservations and reviews are never joined against each other.
+    """
+    reservations = TableReservation.objects.all()
+    return queryset.annotate(
+        total_orders=_per_user(OrderHistory.objects.all(), Count('id'), 0, IntegerField()),
+        total_spent=_per_user(OrderHistory.objects.all(), Sum('total_amount'), 0.0, FloatField()),
+        total_reviews=_per_user(Review.objects.all(), Count('id'), 0, IntegerField()),
+        total_reservations=_per_user(reservations, Count('id'), 0, IntegerField()),
+        pending_reservations=_per_user(
+            reservations, Count('id', filter=Q(status='pending')), 0, IntegerField()
+        ),
+        confirmed_reservations=_per_user(
+            reservations, Count('id', filter=Q(status='confirmed')), 0, IntegerField()
+        ),
+    )
+
+
+def get_user_statistics(user):
+    """
+    Return the materialized statistics for `user`, rebuilding them if stale
+
+    The aggregate and the write happen in one transaction. On SQLite the
+    IMMEDIATE transaction mode holds the write lock from the start, so no
+    order, reservation or review can commit between the two; elsewhere the
+    user row is locked. Invalidations are repeated once committed (see
+    invalidate_user_statistics) in case a rebuild still saw older data.
+    """
+    try:
+        return user.statistics
+    except UserStatistics.DoesNotExist:
+        pass
+
+    try:
+        with transaction.atomic():
+            users = User.objects.select_for_update().filter(pk=user.pk)
+            annotated = with_statistics(users).values(*STATISTICS_FIELDS).get()
+            statistics = UserStatistics(user=user, **annotated)
+            statistics.save()
+    except IntegrityError:
+        # A concurrent read materialized the row first; ours is just as fresh
+        pass
+    return statistics
+
+
+def invalidate_user_statistics(user_id):
+    """
+    Drop the materialized statistics for a user so the next read recomputes them
+    """
+    UserStatistics.objects.filter(user_id=user_id).delete()
+    # Drop them again once the change is visible to other connections, so a
+    # rebuild that read the data before the commit is not served afterwards
+    transaction.on_commit(lambda: UserStatistics.objects.filter(user_id=user_id).delete())
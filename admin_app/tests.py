@@ -0,0 +1,543 @@
+import csv
+import io
+import json
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from unittest import mock
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from auth_app.models import User
+from restaurant_server.checkout import place_order
+from restaurant_server.models import (
+    MenuItem, MenuItemSalesRollup, OrderHistory, OrderItem, OrderSalesRollup, Review, Table, TableReservation,
+)
+from restaurant_server.sales import rebuild_sales_rollups
+from restaurant_server.occupancy import occupancy_index
+from .deletion import count_user_data
+from .statistics import STATISTICS_FIELDS, with_statistics
+from .models import UserDeletionJob, UserStatistics
+
+
+class AdminTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='testpassword123', is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+        self.customer = User.objects.create_user(
+            username='regular', email='regular@example.com', password='testpassword123'
+        )
+
+    def reserve(self, user, status='pending', day=1, hour=18, table_number=None, party_size=2):
+        return TableReservation.objects.create(
+            user=user, reservation_date=date(2030, 1, day), reservation_time=time(hour),
+            party_size=party_size, status=status, table_number=table_number
+        )
+
+
+class AdminUserDetailTests(AdminTestCase):
+    def setUp(self):
+        super().setUp()
+        orders = [OrderHistory.objects.create(user=self.customer, total_amount=amount) for amount in (10.0, 20.5, 4.5)]
+        Review.objects.create(order=orders[0], user=self.customer, stars=5, description='Great')
+        self.reserve(self.customer, status='pending', day=1)
+        self.reserve(self.customer, status='confirmed', day=2)
+        self.reserve(self.customer, status='cancelled', day=3)
+        self.url = f'/api/admin/users/{self.customer.id}/'
+
+    def test_statistics_are_aggregated(self):
+        data = self.client.get(self.url).json()
+        self.assertEqual(data['statistics'], {
+            'total_orders': 3,
+            'total_spent': 35.0,
+            'total_reviews': 1,
+            'total_reservations': 3,
+            'pending_reservations': 1,
+            'confirmed_reservations': 1,
+        })
+        self.assertEqual(len(data['recent_orders']), 3)
+        self.assertEqual(len(data['recent_reservations']), 3)
+
+    def test_materialized_statistics_are_reused(self):
+        self.client.get(self.url)
+        self.assertTrue(UserStatistics.objects.filter(user=self.customer).exists())
+        # User with statistics, recent orders, recent reservations
+        with self.assertNumQueries(3):
+            self.client.get(self.url)
+
+    def test_new_order_invalidates_statistics(self):
+        self.client.get(self.url)
+        OrderHistory.objects.create(user=self.customer, total_amount=5.0)
+
+        data = self.client.get(self.url).json()
+        self.assertEqual(data['statistics']['total_orders'], 4)
+        self.assertEqual(data['statistics']['total_spent'], 40.0)
+
+    def test_change_committed_during_rebuild_is_not_served(self):
+        real_with_statistics = with_statistics
+
+        def rebuild_then_race(users):
+            annotated = real_with_statistics(users).values(*STATISTICS_FIELDS).get()
+            # Another request commits an order after the aggregate was read
+            OrderHistory.objects.create(user=self.customer, total_amount=5.0)
+            stub = mock.Mock()
+            stub.values.return_value.get.return_value = annotated
+            return stub
+
+        with self.captureOnCommitCallbacks(execute=True), \
+                mock.patch('admin_app.statistics.with_statistics', side_effect=rebuild_then_race):
+            self.client.get(self.url)
+        self.assertFalse(UserStatistics.objects.filter(user=self.customer).exists())
+        self.assertEqual(self.client.get(self.url).json()['statistics']['total_orders'], 4)
+
+    def test_non_admin_is_forbidden(self):
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True, USER_DELETION_BATCH_SIZE=2)
+class AdminUserDeletionTests(AdminTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other = User.objects.create_user(
+            username='other', email='other@example.com', password='testpassword123'
+        )
+        self.pizza = MenuItem.objects.create(food_name='Pizza', food_description='Cheesy', food_price=10.0)
+        for user in (self.customer, self.other):
+            for _ in range(3):
+                order = OrderHistory.objects.create(user=user, total_amount=10.0)
+                OrderItem.objects.create(order=order, menu_item=self.pizza, quantity=1, price_at_time=10.0)
+            Review.objects.create(order=order, user=user, stars=4, description='Nice')
+            self.reserve(user)
+
+    def test_count_user_data_uses_grouped_queries(self):
+        with self.assertNumQueries(4):
+            counts = count_user_data([self.customer.id, self.other.id])
+        self.assertEqual(counts[self.customer.id], {
+            'orders': 3, 'order_items': 3, 'reservations': 1, 'reviews': 1
+        })
+
+    def test_single_user_delete_reports_order_items(self):
+        response = self.client.delete(f'/api/admin/users/{self.customer.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['deleted_data'], {
+            'orders': 3, 'order_items': 3, 'reservations': 1, 'reviews': 1
+        })
+        self.assertFalse(User.objects.filter(id=self.customer.id).exists())
+        self.assertEqual(OrderItem.objects.count(), 3)
+
+    def test_bulk_delete_runs_synchronously_by_default(self):
+        response = self.client.post('/api/admin/users/bulk-delete/', {
+            'user_ids': [self.customer.id, self.other.id]
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['summary'], {
+            'users_deleted': 2,
+            'total_orders_deleted': 6,
+            'total_reservations_deleted': 2,
+            'total_reviews_deleted': 2,
+        })
+        self.assertFalse(OrderHistory.objects.exists())
+
+    def test_background_bulk_delete_reports_progress(self):
+        response = self.client.post('/api/admin/users/bulk-delete/', {
+            'user_ids': [self.customer.id, self.other.id], 'background': True
+        }, format='json')
+        self.assertEqual(response.status_code, 202)
+
+        job_id = response.json()['job']['id']
+        job = self.client.get(f'/api/admin/users/bulk-delete/{job_id}/').json()
+        self.assertEqual(job['status'], 'completed')
+        self.assertEqual(job['progress'], 1.0)
+        self.assertEqual(job['order_items_deleted'], 6)
+        self.assertEqual(UserDeletionJob.objects.get().users_deleted, 2)
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_bulk_delete_rejects_missing_users(self):
+        response = self.client.post('/api/admin/users/bulk-delete/', {'user_ids': [999]}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+
+class AdminAvailableTablesTests(AdminTestCase):
+    def setUp(self):
+        super().setUp()
+        occupancy_index.clear()
+        Table.objects.all().delete()
+        Table.objects.bulk_create([
+            Table(number=1, seats=2), Table(number=2, seats=4), Table(number=3, seats=6),
+        ])
+        self.url = '/api/admin/reservations/available-tables/'
+
+    def test_reservation_blocks_overlapping_slots(self):
+        self.reserve(self.customer, status='confirmed', hour=18, table_number=2)
+        data = self.client.get(self.url, {'date': '2030-01-01', 'time': '19:00'}).json()
+        self.assertEqual(data['available_tables'], [1, 3])
+        self.assertEqual(data['reserved_tables'], [2])
+
+        data = self.client.get(self.url, {'date': '2030-01-01', 'time': '20:00'}).json()
+        self.assertEqual(data['available_tables'], [1, 2, 3])
+
+    def test_party_size_filters_small_tables(self):
+        data = self.client.get(self.url, {'date': '2030-01-01', 'time': '18:00', 'party_size': 4}).json()
+        self.assertEqual(data['available_tables'], [2, 3])
+
+    def test_date_range_is_answered_in_one_query(self):
+        self.reserve(self.customer, status='confirmed', day=2, table_number=3)
+        occupancy_index.tables()
+        with self.assertNumQueries(1):
+            availability = occupancy_index.free_tables(
+                [date(2030, 1, day) for day in range(1, 8)], time(18), party_size=5
+            )
+        self.assertEqual(availability[date(2030, 1, 1)], [3])
+        self.assertEqual(availability[date(2030, 1, 2)], [])
+
+    def test_index_follows_status_changes(self):
+        reservation = self.reserve(self.customer, status='confirmed', table_number=1)
+        self.assertEqual(occupancy_index.occupied_tables(date(2030, 1, 1), time(18)), [1])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation.status = 'cancelled'
+            reservation.save()
+        with self.assertNumQueries(0):
+            self.assertEqual(occupancy_index.occupied_tables(date(2030, 1, 1), time(18)), [])
+
+    def test_table_changes_reload_inventory(self):
+        occupancy_index.tables()
+        Table.objects.create(number=4, seats=8)
+        data = self.client.get(self.url, {'date': '2030-01-01', 'time': '18:00', 'party_size': 8}).json()
+        self.assertEqual(data['available_tables'], [4])
+
+    def test_inventory_expires_for_changes_made_elsewhere(self):
+        occupancy_index.tables()
+        # Another worker's write: no signal reaches this process's index
+        Table.objects.bulk_create([Table(number=4, seats=8)])
+        self.assertNotIn((4, 8), occupancy_index.tables())
+        with override_settings(OCCUPANCY_INDEX_TTL=0):
+            self.assertIn((4, 8), occupancy_index.tables())
+
+
+class AdminApproveReservationTests(AdminTestCase):
+    def setUp(self):
+        super().setUp()
+        occupancy_index.clear()
+        Table.objects.all().delete()
+        Table.objects.bulk_create([Table(number=1, seats=2), Table(number=2, seats=4)])
+
+    def approve(self, reservation, **data):
+        return self.client.post(f'/api/admin/reservations/{reservation.id}/approve/', data, format='json')
+
+    def test_approve_assigns_best_fit_table(self):
+        reservation = self.reserve(self.customer, party_size=3)
+        response = self.approve(reservation)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['reservation']['table_number'], 2)
+        self.assertEqual(response.json()['reservation']['status'], 'confirmed')
+
+    def test_approve_rejects_table_taken_within_duration(self):
+        self.reserve(self.other_customer(), status='confirmed', hour=18, table_number=2)
+        reservation = self.reserve(self.customer, hour=19)
+        response = self.approve(reservation, table_number=2)
+        self.assertEqual(response.status_code, 400)
+        reservation.refresh_from_db()
+        self.assertEqual(reservation.status, 'pending')
+
+    def test_approve_seats_large_party_at_chosen_table(self):
+        reservation = self.reserve(self.customer, party_size=6)
+        response = self.approve(reservation, table_number=1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['reservation']['table_number'], 1)
+        self.assertEqual(self.approve(self.reserve(self.customer, day=2), table_number=9).status_code, 400)
+
+    def test_approve_party_larger_than_any_table(self):
+        reservation = self.reserve(self.customer, party_size=12)
+        response = self.approve(reservation)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['reservation']['status'], 'confirmed')
+        self.assertIsNone(response.json()['reservation']['table_number'])
+
+    def other_customer(self):
+        return User.objects.create_user(username='other', email='other@example.com', password='testpassword123')
+
+
+class AdminExportTests(AdminTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(5):
+            self.reserve(self.customer, day=i + 1)
+
+    def test_ndjson_export_streams_every_row(self):
+        with override_settings(EXPORT_CHUNK_SIZE=2):
+            response = self.client.get('/api/admin/reservations/', {'format': 'ndjson'})
+            self.assertTrue(response.streaming)
+            body = b''.join(response.streaming_content).decode()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['user']['email'], 'regular@example.com')
+
+    def test_csv_export_flattens_nested_objects(self):
+        response = self.client.get('/api/admin/users/', HTTP_ACCEPT='text/csv')
+        self.assertIn('attachment; filename="users.csv"', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual({row['email'] for row in rows}, {'admin@example.com', 'regular@example.com'})
+
+        response = self.client.get('/api/admin/reservations/', {'format': 'csv'})
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['user.username'], 'regular')
+
+    def test_json_remains_the_default(self):
+        response = self.client.get('/api/admin/menu/all/')
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.json(), [])
+
+    def test_export_requires_admin(self):
+        self.client.force_authenticate(self.customer)
+        response = self.client.get('/api/admin/reviews/', {'format': 'ndjson'})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(json.loads(response.content), {'error': 'Admin access required'})
+
+    async def test_asgi_export_uses_async_iterator(self):
+        token = RefreshToken.for_user(self.admin).access_token
+        response = await self.async_client.get(
+            '/api/admin/reservations/', {'format': 'ndjson'}, headers={'Authorization': f'Bearer {token}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(body.splitlines()), 5)
+
+
+class AdminListFilterTests(AdminTestCase):
+    def setUp(self):
+        super().setUp()
+        self.pending = [self.reserve(self.customer, day=day) for day in (1, 2, 3)]
+        self.confirmed = self.reserve(self.admin, status='confirmed', day=10)
+        for stars in (1, 3, 5):
+            order = OrderHistory.objects.create(user=self.customer, total_amount=10.0)
+            Review.objects.create(order=order, user=self.customer, stars=stars, description='Fine')
+
+    def test_reservation_filters(self):
+        response = self.client.get('/api/admin/reservations/', {'status': 'confirmed'})
+        self.assertEqual([r['id'] for r in response.json()], [self.confirmed.id])
+
+        response = self.client.get('/api/admin/reservations/', {'date_from': '2030-01-02', 'date_to': '2030-01-05'})
+        self.assertEqual({r['id'] for r in response.json()}, {r.id for r in self.pending[1:]})
+
+        response = self.client.get('/api/admin/reservations/', {'user': self.admin.id, 'status': 'pending,confirmed'})
+        self.assertEqual(len(response.json()), 1)
+
+    def test_invalid_filters_are_rejected(self):
+        for path, params in (
+            ('/api/admin/reservations/', {'status': 'lost'}),
+            ('/api/admin/reservations/', {'date_from': 'tomorrow'}),
+            ('/api/admin/reviews/', {'stars': '9'}),
+            ('/api/admin/users/', {'is_staff': 'maybe'}),
+        ):
+            response = self.client.get(path, params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn('error', response.json())
+
+    def test_review_filters(self):
+        response = self.client.get('/api/admin/reviews/', {'min_stars': 3})
+        self.assertEqual(sorted(r['stars'] for r in response.json()), [3, 5])
+        response = self.client.get('/api/admin/reviews/', {'stars': 1, 'user': self.customer.id})
+        self.assertEqual([r['stars'] for r in response.json()], [1])
+
+    def test_user_prefix_search(self):
+        User.objects.create_user(username='regina', email='regina@example.com', password='testpassword123')
+        response = self.client.get('/api/admin/users/', {'email': 'reg'})
+        self.assertEqual([u['email'] for u in response.json()], ['regina@example.com', 'regular@example.com'])
+        response = self.client.get('/api/admin/users/', {'username': 'adm', 'is_staff': 'true'})
+        self.assertEqual([u['username'] for u in response.json()], ['admin'])
+
+    def test_cursor_pagination_walks_filtered_results(self):
+        seen = []
+        params = {'status': 'pending', 'page_size': 2}
+        with self.assertNumQueries(1):
+            page = self.client.get('/api/admin/reservations/', params).json()
+        seen += [r['id'] for r in page['results']]
+        while page['next']:
+            page = self.client.get(page['next']).json()
+            seen += [r['id'] for r in page['results']]
+        self.assertEqual(seen, [r.id for r in reversed(self.pending)])
+
+    def test_user_pagination_follows_prefix_ordering(self):
+        for i in range(3):
+            User.objects.create_user(username=f'reg{i}', email=f'reg{i}@example.com', password='testpassword123')
+        page = self.client.get('/api/admin/users/', {'email': 'reg', 'page_size': 2}).json()
+        emails = [u['email'] for u in page['results']]
+        page = self.client.get(page['next']).json()
+        emails += [u['email'] for u in page['results']]
+        self.assertEqual(emails, ['reg0@example.com', 'reg1@example.com', 'reg2@example.com', 'regular@example.com'])
+
+
+class AdminSalesAnalyticsTests(AdminTestCase):
+    def setUp(self):
+        super().setUp()
+        self.pizza = MenuItem.objects.create(food_name='Pizza', food_description='Cheesy', food_price=10.0)
+        self.salad = MenuItem.objects.create(food_name='Salad', food_description='Green', food_price=4.0)
+        self.first = self.order(datetime(2030, 1, 1, 12, 15), [(self.pizza, 2), (self.salad, 1)])
+        self.second = self.order(datetime(2030, 1, 1, 18, 40), [(self.pizza, 1)])
+        self.third = self.order(datetime(2030, 1, 3, 9, 5), [(self.salad, 3)])
+
+    def order(self, when, lines):
+        order = place_order(self.customer, [
+            {'menu_item_id': item.id, 'quantity': quantity} for item, quantity in lines
+        ], status='delivered')
+        # Backdating goes through save() so the rollups move with the order
+        order.order_date = when.replace(tzinfo=dt_timezone.utc)
+        order.save()
+        return order
+
+    def report(self, **params):
+        response = self.client.get('/api/admin/analytics/sales/', {'date_from': '2030-01-01', 'date_to': '2030-01-07', **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def rollups(self):
+        return (
+            sorted(OrderSalesRollup.objects.filter(order_count__gt=0).values_list(
+                'granularity', 'period_start', 'status', 'order_count', 'revenue')),
+            sorted(MenuItemSalesRollup.objects.filter(quantity__gt=0).values_list(
+                'granularity', 'period_start', 'menu_item_id', 'status', 'quantity', 'revenue')),
+        )
+
+    def test_daily_revenue_and_dish_ranking(self):
+        report = self.report()
+        self.assertEqual(report['totals'], {'orders': 3, 'revenue': 46.0})
+        self.assertEqual(
+            [(row['period_start'], row['orders'], row['revenue']) for row in report['series']],
+            [('2030-01-01T00:00:00Z', 2, 34.0), ('2030-01-03T00:00:00Z', 1, 12.0)]
+        )
+        self.assertEqual(
+            [(row['food_name'], row['quantity'], row['revenue']) for row in report['dishes']],
+            [('Pizza', 3, 30.0), ('Salad', 4, 16.0)]
+        )
+
+    def test_hourly_series_for_one_dish(self):
+        report = self.report(granularity='hour', menu_item=self.pizza.id)
+        self.assertEqual(
+            [(row['period_start'], row['quantity']) for row in report['series']],
+            [('2030-01-01T12:00:00Z', 2), ('2030-01-01T18:00:00Z', 1)]
+        )
+        self.assertEqual(report['totals'], {'quantity': 3, 'revenue': 30.0})
+
+    def test_status_changes_and_deletes_move_revenue(self):
+        self.second.status = 'cancelled'
+        self.second.save()
+        self.third.delete()
+        self.assertEqual(self.report()['totals'], {'orders': 1, 'revenue': 24.0})
+        self.assertEqual(self.report(status='cancelled')['totals'], {'orders': 1, 'revenue': 10.0})
+
+    def test_incremental_rollups_match_backfill(self):
+        OrderItem.objects.create(order=self.first, menu_item=self.salad, quantity=2, price_at_time=4.0)
+        self.second.status = 'ready'
+        self.second.save()
+        incremental = self.rollups()
+        rebuild_sales_rollups()
+        self.assertEqual(self.rollups(), incremental)
+
+    def test_bulk_deletes_keep_rollups_exact(self):
+        OrderItem.objects.filter(menu_item=self.salad).delete()
+        OrderHistory.objects.filter(pk__in=[self.first.pk, self.third.pk]).delete()
+        incremental = self.rollups()
+        rebuild_sales_rollups()
+        self.assertEqual(self.rollups(), incremental)
+        self.assertEqual(self.report()['totals'], {'orders': 1, 'revenue': 10.0})
+
+    def test_deleting_orders_costs_the_same_however_many_lines(self):
+        lines = [(MenuItem.objects.create(food_name=f'Dish {i}', food_description='', food_price=1.0), 1)
+                 for i in range(20)]
+        small = self.order(datetime(2030, 1, 2, 12), lines[:2])
+        large = self.order(datetime(2030, 1, 2, 12), lines)
+        with CaptureQueriesContext(connection) as small_delete:
+            small.delete()
+        with CaptureQueriesContext(connection) as large_delete:
+            large.delete()
+        self.assertEqual(len(large_delete), len(small_delete))
+
+        one = self.order(datetime(2030, 1, 2, 12), lines[:3])
+        with CaptureQueriesContext(connection) as one_delete:
+            OrderHistory.objects.filter(pk=one.pk).delete()
+        orders = [self.order(datetime(2030, 1, 2, 12), lines[:3]) for _ in range(10)]
+        with self.assertNumQueries(len(one_delete)):
+            OrderHistory.objects.filter(pk__in=[order.pk for order in orders]).delete()
+        incremental = self.rollups()
+        rebuild_sales_rollups()
+        self.assertEqual(self.rollups(), incremental)
+
+    def test_report_reads_only_rollups(self):
+        with self.assertNumQueries(2):
+            self.report(granularity='hour')
+
+    def test_invalid_parameters(self):
+        for params in ({'granularity': 'week'}, {'status': 'lost'}, {'granularity': 'hour', 'date_to': '2030-03-01'},
+                       {'date_from': '2030-01-05', 'date_to': '2030-01-01'}):
+            response = self.client.get('/api/admin/analytics/sales/', {'date_from': '2030-01-01', **params})
+            self.assertEqual(response.status_code, 400, params)
+
+
+class KitchenQueueTests(AdminTestCase):
+    def setUp(self):
+        super().setUp()
+        self.pizza = MenuItem.objects.create(food_name='Pizza', food_description='Cheesy', food_price=10.0)
+        self.orders = {}
+        for status in ('pending', 'preparing', 'ready', 'delivered', 'confirmed'):
+            order = OrderHistory.objects.create(user=self.customer, total_amount=10.0, status=status)
+            OrderItem.objects.create(order=order, menu_item=self.pizza, quantity=1, price_at_time=10.0)
+            self.orders[status] = order
+        # Everything so far happened well before the screen's last refresh
+        OrderHistory.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+
+    def queue(self, **params):
+        response = self.client.get('/api/admin/kitchen/queue/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_full_queue_lists_active_orders_oldest_first(self):
+        with self.assertNumQueries(3):
+            queue = self.queue()
+        active = [self.orders[status].id for status in ('pending', 'preparing', 'confirmed')]
+        self.assertTrue(queue['full'])
+        self.assertEqual([order['id'] for order in queue['orders']], active)
+        self.assertEqual(queue['active_ids'], active)
+        self.assertEqual(queue['orders'][0]['username'], 'regular')
+        self.assertEqual(
+            queue['orders'][0]['items'], [{'menu_item_id': self.pizza.id, 'quantity': 1, 'food_name': 'Pizza'}]
+        )
+
+    def test_since_returns_only_changes(self):
+        version = self.queue()['version']
+        self.assertEqual(self.queue(since=version)['orders'], [])
+
+        preparing = self.orders['pending']
+        preparing.status = 'preparing'
+        preparing.save()
+        finished = self.orders['preparing']
+        finished.status = 'ready'
+        finished.save()
+        OrderItem.objects.create(order=self.orders['confirmed'], menu_item=self.pizza, quantity=2, price_at_time=10.0)
+        new_order = OrderHistory.objects.create(user=self.customer, total_amount=10.0)
+
+        queue = self.queue(since=version)
+        self.assertFalse(queue['full'])
+        self.assertEqual(
+            [(order['id'], order['status']) for order in queue['orders']],
+            [(preparing.id, 'preparing'), (self.orders['confirmed'].id, 'confirmed'), (new_order.id, 'pending')]
+        )
+        self.assertEqual(len(queue['orders'][1]['items']), 2)
+        self.assertNotIn(finished.id, queue['active_ids'])
+        self.assertIn(new_order.id, queue['active_ids'])
+
+    def test_invalid_since_and_non_admin(self):
+        for since in ('soon', '-1', '9' * 30):
+            response = self.client.get('/api/admin/kitchen/queue/', {'since': since})
+            self.assertEqual(response.status_code, 400, since)
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.client.get('/api/admin/kitchen/queue/').status_code, 403)
@@ -7,6 +7,7 @@ urlpatterns = [
     path('users/', views.admin_users_list, name='admin_users_list'),
     path('users/<int:user_id>/', views.admin_user_details_or_delete, name='admin_user_details_or_delete'),
     path('users/bulk-delete/', views.admin_bulk_delete_users, name='admin_bulk_delete_users'),
+    path('users/bulk-delete/<uuid:job_id>/', views.admin_user_deletion_job, name='admin_user_deletion_job'),
     path('menu/', views.admin_add_menu_item, name='admin_add_menu_item'),
     path('menu/all/', views.admin_menu_items, name='admin_menu_items'),
     path('menu/<int:menu_id>/', views.admin_delete_menu_item, name='admin_delete_menu_item'),
@@ -18,4 +19,6 @@ urlpatterns = [
     path('reservations/available-tables/', views.admin_available_tables, name='admin_available_tables'),
     path('reservations/<int:reservation_id>/approve/', views.admin_approve_reservation, name='admin_approve_reservation'),
     path('reservations/<int:reservation_id>/reject/', views.admin_reject_reservation, name='admin_reject_reservation'),
+    path('kitchen/queue/', views.admin_kitchen_queue, name='admin_kitchen_queue'),
+    path('analytics/sales/', views.admin_sales_analytics, name='admin_sales_analytics'),
 ]
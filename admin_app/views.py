@@ -1,13 +1,33 @@
+import datetime
+
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from django.db import transaction
 from auth_app.models import User
-from auth_app.serializers import UserSerializer
+from auth_app.serializers import UserSerializer, fast_user_serializer
 from restaurant_server.models import MenuItem, Review, OrderHistory, TableReservation
-from restaurant_server.serializers import MenuItemSerializer, ReviewSerializer, TableReservationSerializer
+from restaurant_server.occupancy import occupancy_index
+from restaurant_server.seating import SeatingError, assign_table
+from restaurant_server.serializers import (
+    MenuItemSerializer, TableReservationSerializer,
+    fast_menu_item_serializer, fast_reservation_serializer, fast_review_serializer,
+)
+from restaurant_backend.tasks import run_in_background
+from .analytics import sales_report
+from .deletion import create_user_deletion_job, run_user_deletion_job
+from .exports import EXPORT_RENDERER_CLASSES, export_response, is_export
+from .filters import FilterError, filter_reservations, filter_reviews, filter_users, user_ordering
+from .kitchen import kitchen_queue
+from .models import UserDeletionJob
+from .pagination import AdminReservationPagination, AdminReviewPagination, AdminUserPagination
+from .serializers import UserDeletionJobSerializer
+from .statistics import get_user_statistics
+
+
+# Longest date range admin_available_tables answers in one call
+MAX_AVAILABILITY_DAYS = 62
 
 
 def is_admin_user(user):
@@ -17,11 +37,32 @@ def is_admin_user(user):
     return user.is_staff or user.is_superuser
 
 
+def admin_list_response(request, queryset, fast_serializer, pagination_class, filename, ordering=None):
+    """
+    Respond with an export stream, a keyset page or the full list, as requested
+    """
+    if is_export(request):
+        return export_response(request, queryset, fast_serializer, filename)
+
+    paginator = pagination_class()
+    if ordering:
+        paginator.ordering = ordering
+    if paginator.cursor_query_param in request.query_params or paginator.page_size_query_param in request.query_params:
+        rows = fast_serializer.serialize(paginator.get_page_queryset(queryset, request))
+        return paginator.get_paginated_response(paginator.paginate_results(rows))
+
+    return Response(fast_serializer.serialize(queryset), status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@renderer_classes(EXPORT_RENDERER_CLASSES)
 def admin_users_list(request):
     """
-    Get all registered users (admin only)
+    Get all registered users (admin only); ?format=ndjson or ?format=csv streams an export
+
+    Filters: `email` or `username` prefix, `is_staff`, `is_active`. Pass
+    `page_size` and/or `cursor` to page through the results.
     """
     if not is_admin_user(request.user):
         return Response(
@@ -29,9 +70,15 @@ def admin_users_list(request):
             status=status.HTTP_403_FORBIDDEN
         )
 
-    users = User.objects.all()
-    serializer = UserSerializer(users, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    try:
+        users = filter_users(User.objects.all(), request.query_params)
+    except FilterError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    ordering = user_ordering(request.query_params)
+    if ordering:
+        users = users.order_by(ordering)
+    return admin_list_response(request, users, fast_user_serializer, AdminUserPagination, 'users', ordering)
 
 
 @api_view(['POST'])
@@ -79,9 +126,13 @@ def admin_delete_menu_item(request, menu_id):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@renderer_classes(EXPORT_RENDERER_CLASSES)
 def admin_reviews_list(request):
     """
-    Get all reviews (admin only)
+    Get all reviews (admin only); ?format=ndjson or ?format=csv streams an export
+
+    Filters: `stars`, `min_stars`, `user`. Pass `page_size` and/or `cursor`
+    to page through the results newest first.
     """
     if not is_admin_user(request.user):
         return Response(
@@ -89,9 +140,11 @@ def admin_reviews_list(request):
             status=status.HTTP_403_FORBIDDEN
         )
 
-    reviews = Review.objects.all()
-    serializer = ReviewSerializer(reviews, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    try:
+        reviews = filter_reviews(Review.objects.all(), request.query_params)
+    except FilterError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return admin_list_response(request, reviews, fast_review_serializer, AdminReviewPagination, 'reviews')
 
 
 @api_view(['DELETE'])
@@ -116,9 +169,10 @@ def admin_delete_review(request, review_id):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@renderer_classes(EXPORT_RENDERER_CLASSES)
 def admin_menu_items(request):
     """
-    Get all menu items including unavailable ones (admin only)
+    Get all menu items including unavailable ones (admin only); ?format=ndjson or ?format=csv streams an export
     """
     if not is_admin_user(request.user):
         return Response(
@@ -127,8 +181,9 @@ def admin_menu_items(request):
         )
 
     menu_items = MenuItem.objects.all()
-    serializer = MenuItemSerializer(menu_items, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    if is_export(request):
+        return export_response(request, menu_items, fast_menu_item_serializer, 'menu_items')
+    return Response(fast_menu_item_serializer.serialize(menu_items), status=status.HTTP_200_OK)
 
 
 
@@ -145,53 +200,31 @@ def admin_user_details_or_delete(request, user_id):
             status=status.HTTP_403_FORBIDDEN
         )
 
-    user = get_object_or_404(User, id=user_id)
+    user = get_object_or_404(User.objects.select_related('statistics'), id=user_id)
 
     if request.method == 'GET':
-        # Get counts of related data
-        orders_count = user.orders.count()
-        reservations_count = user.reservations.count()
-        reviews_count = user.reviews.count()
-
-        # Calculate total spent
-        total_spent = sum(order.total_amount for order in user.orders.all())
-
-        # Get pending and confirmed reservations count
-        pending_reservations = user.reservations.filter(status='pending').count()
-        confirmed_reservations = user.reservations.filter(status='confirmed').count()
-
-        # Get recent orders (last 5)
-        recent_orders = user.orders.all()[:5]
-        recent_orders_data = []
-        for order in recent_orders:
-            recent_orders_data.append({
-                'id': order.id,
-                'order_date': order.order_date,
-                'total_amount': order.total_amount,
-                'status': order.status
-            })
-
-        # Get recent reservations (last 5)
-        recent_reservations = user.reservations.all()[:5]
-        recent_reservations_data = []
-        for reservation in recent_reservations:
-            recent_reservations_data.append({
-                'id': reservation.id,
-                'reservation_date': reservation.reservation_date,
-                'reservation_time': reservation.reservation_time,
-                'party_size': reservation.party_size,
-                'status': reservation.status
-            })
+        # Materialized statistics, rebuilt with one aggregate query when stale
+        statistics = get_user_statistics(user)
+
+        # Get recent orders and reservations (last 5 of each)
+        recent_orders_data = list(
+            user.orders.values('id', 'order_date', 'total_amount', 'status')[:5]
+        )
+        recent_reservations_data = list(
+            user.reservations.values(
+                'id', 'reservation_date', 'reservation_time', 'party_size', 'status'
+            )[:5]
+        )
 
         return Response({
             'user': UserSerializer(user).data,
             'statistics': {
-                'total_orders': orders_count,
-                'total_spent': float(total_spent),
-                'total_reviews': reviews_count,
-                'total_reservations': reservations_count,
-                'pending_reservations': pending_reservations,
-                'confirmed_reservations': confirmed_reservations
+                'total_orders': statistics.total_orders,
+                'total_spent': float(statistics.total_spent),
+                'total_reviews': statistics.total_reviews,
+                'total_reservations': statistics.total_reservations,
+                'pending_reservations': statistics.pending_reservations,
+                'confirmed_reservations': statistics.confirmed_reservations
             },
             'recent_orders': recent_orders_data,
             'recent_reservations': recent_reservations_data
@@ -205,22 +238,18 @@ def admin_user_details_or_delete(request, user_id):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Count data before deletion for reporting
-        orders_count = user.orders.count()
-        order_items_count = sum(order.order_items.count() for order in user.orders.all())
-        reservations_count = user.reservations.count()
-        reviews_count = user.reviews.count()
-
-        # Delete user (this will cascade delete all related data)
-        user.delete()
+        # Count data before deletion for reporting, then delete in bounded batches
+        job = create_user_deletion_job([user], requested_by=request.user)
+        counts = job.details[0]
+        run_user_deletion_job(job.id)
 
         return Response({
             'message': 'User and all associated data deleted successfully',
             'deleted_data': {
-                'orders': orders_count,
-                'order_items': order_items_count,
-                'reservations': reservations_count,
-                'reviews': reviews_count
+                'orders': counts['orders_deleted'],
+                'order_items': counts['order_items_deleted'],
+                'reservations': counts['reservations_deleted'],
+                'reviews': counts['reviews_deleted']
             }
         }, status=status.HTTP_200_OK)
 
@@ -254,8 +283,8 @@ def admin_bulk_delete_users(request):
         )
 
     # Get users to delete and validate they exist
-    users_to_delete = User.objects.filter(id__in=user_ids)
-    found_user_ids = list(users_to_delete.values_list('id', flat=True))
+    users_to_delete = list(User.objects.filter(id__in=user_ids))
+    found_user_ids = {user.id for user in users_to_delete}
     missing_user_ids = [uid for uid in user_ids if uid not in found_user_ids]
 
     if missing_user_ids:
@@ -264,52 +293,54 @@ def admin_bulk_delete_users(request):
             status=status.HTTP_404_NOT_FOUND
         )
 
-    # Collect statistics before deletion
-    deletion_stats = []
-    total_orders = 0
-    total_reservations = 0
-    total_reviews = 0
-
-    for user in users_to_delete:
-        orders_count = user.orders.count()
-        reservations_count = user.reservations.count()
-        reviews_count = user.reviews.count()
-
-        deletion_stats.append({
-            'user_id': user.id,
-            'username': user.username,
-            'email': user.email,
-            'orders_deleted': orders_count,
-            'reservations_deleted': reservations_count,
-            'reviews_deleted': reviews_count
-        })
-
-        total_orders += orders_count
-        total_reservations += reservations_count
-        total_reviews += reviews_count
-
-    # Perform bulk deletion in transaction
-    try:
-        with transaction.atomic():
-            deleted_count = users_to_delete.delete()[0]  # Returns (count, {model: count})
+    # Collect statistics before deletion with one grouped query per table
+    job = create_user_deletion_job(users_to_delete, requested_by=request.user)
 
+    # Large purges can run off-request; poll the job endpoint for progress
+    if request.data.get('background'):
+        run_in_background(run_user_deletion_job, job.id)
         return Response({
-            'message': f'Successfully deleted {deleted_count} users and all associated data',
-            'summary': {
-                'users_deleted': deleted_count,
-                'total_orders_deleted': total_orders,
-                'total_reservations_deleted': total_reservations,
-                'total_reviews_deleted': total_reviews
-            },
-            'details': deletion_stats
-        }, status=status.HTTP_200_OK)
+            'message': f'Deletion of {job.users_total} users scheduled',
+            'job': UserDeletionJobSerializer(job).data
+        }, status=status.HTTP_202_ACCEPTED)
 
+    try:
+        run_user_deletion_job(job.id)
     except Exception as e:
         return Response(
             {'error': f'Failed to delete users: {str(e)}'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+    job.refresh_from_db()
+    return Response({
+        'message': f'Successfully deleted {job.users_deleted} users and all associated data',
+        'summary': {
+            'users_deleted': job.users_deleted,
+            'total_orders_deleted': job.orders_deleted,
+            'total_reservations_deleted': job.reservations_deleted,
+            'total_reviews_deleted': job.reviews_deleted
+        },
+        'details': job.details,
+        'job_id': job.id
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def admin_user_deletion_job(request, job_id):
+    """
+    Get the progress of a user deletion job (admin only)
+    """
+    if not is_admin_user(request.user):
+        return Response(
+            {'error': 'Admin access required'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    job = get_object_or_404(UserDeletionJob, id=job_id)
+    return Response(UserDeletionJobSerializer(job).data, status=status.HTTP_200_OK)
+
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -323,16 +354,19 @@ def admin_pending_reservations(request):
             status=status.HTTP_403_FORBIDDEN
         )
 
-    reservations = TableReservation.objects.filter(status='pending').order_by('reservation_date', 'reservation_time')
-    serializer = TableReservationSerializer(reservations, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    reservations = TableReservation.objects.pending_queue()
+    return Response(fast_reservation_serializer.serialize(reservations), status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@renderer_classes(EXPORT_RENDERER_CLASSES)
 def admin_all_reservations(request):
     """
-    Get all reservations (admin only)
+    Get all reservations (admin only); ?format=ndjson or ?format=csv streams an export
+
+    Filters: `status` (comma separated), `user`, `date_from`, `date_to`. Pass
+    `page_size` and/or `cursor` to page through the results newest first.
     """
     if not is_admin_user(request.user):
         return Response(
@@ -340,9 +374,14 @@ def admin_all_reservations(request):
             status=status.HTTP_403_FORBIDDEN
         )
 
-    reservations = TableReservation.objects.all().order_by('-created_at')
-    serializer = TableReservationSerializer(reservations, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    try:
+        reservations = filter_reservations(TableReservation.objects.all(), request.query_params)
+    except FilterError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    reservations = reservations.order_by('-created_at')
+    return admin_list_response(
+        request, reservations, fast_reservation_serializer, AdminReservationPagination, 'reservations'
+    )
 
 
 @api_view(['POST'])
@@ -357,41 +396,35 @@ def admin_approve_reservation(request, reservation_id):
             status=status.HTTP_403_FORBIDDEN
         )
 
-    try:
-        reservation = get_object_or_404(TableReservation, id=reservation_id)
-
-        # Get table number from request (optional)
-        table_number = request.data.get('table_number')
+    reservation = get_object_or_404(TableReservation, id=reservation_id)
 
-        # Check if table is available at the requested time
-        if table_number:
-            existing_reservation = TableReservation.objects.filter(
-                reservation_date=reservation.reservation_date,
-                reservation_time=reservation.reservation_time,
-                table_number=table_number,
-                status__in=['confirmed', 'seated']
-            ).exclude(id=reservation_id).first()
+    # Get table number from request (optional); otherwise seat at the best-fit free table
+    table_number = request.data.get('table_number')
+    if table_number is not None:
+        try:
+            table_number = int(table_number)
+        except (TypeError, ValueError):
+            return Response({
+                'error': 'table_number must be an integer'
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-            if existing_reservation:
-                return Response({
-                    'error': f'Table {table_number} is already reserved for {reservation.reservation_date} at {reservation.reservation_time}'
-                }, status=status.HTTP_400_BAD_REQUEST)
-
-        # Update reservation status and assign table if provided
+    try:
+        assign_table(reservation, table_number=table_number, status='confirmed')
+    except SeatingError as e:
+        if table_number is not None:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        # No table fits the party (e.g. more guests than any table seats): confirm
+        # it anyway and leave the seating to staff, like create_reservation does
         reservation.status = 'confirmed'
-        if table_number:
-            reservation.table_number = table_number
-        reservation.save()
-
-        return Response({
-            'message': 'Reservation approved successfully',
-            'reservation': TableReservationSerializer(reservation).data
-        }, status=status.HTTP_200_OK)
+        reservation.table_number = None
+        reservation.save(update_fields=['status', 'table_number'])
 
-    except TableReservation.DoesNotExist:
-        return Response({
-            'error': 'Reservation not found'
-        }, status=status.HTTP_404_NOT_FOUND)
+    return Response({
+        'message': 'Reservation approved successfully',
+        'reservation': TableReservationSerializer(reservation).data
+    }, status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
@@ -414,22 +447,41 @@ def admin_available_tables(request):
             'error': 'Date and time parameters are required'
         }, status=status.HTTP_400_BAD_REQUEST)
 
-    # Get all reserved tables for the specified date and time
-    reserved_tables = TableReservation.objects.filter(
-        reservation_date=date,
-        reservation_time=time,
-        status__in=['confirmed', 'seated']
-    ).values_list('table_number', flat=True)
+    # Optional party size and inclusive end date for range queries
+    try:
+        start_date = datetime.date.fromisoformat(date)
+        end_date = datetime.date.fromisoformat(request.query_params.get('end_date', date))
+        reservation_time = datetime.time.fromisoformat(time)
+        party_size = int(request.query_params.get('party_size', 1))
+    except ValueError:
+        return Response({
+            'error': 'Invalid date, end_date, time or party_size'
+        }, status=status.HTTP_400_BAD_REQUEST)
 
-    # Assume we have tables 1-20 (you can adjust this based on your restaurant)
-    all_tables = list(range(1, 21))
-    available_tables = [table for table in all_tables if table not in reserved_tables]
+    days = (end_date - start_date).days + 1
+    if days < 1 or days > MAX_AVAILABILITY_DAYS:
+        return Response({
+            'error': f'end_date must be within {MAX_AVAILABILITY_DAYS} days on or after date'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    dates = [start_date + datetime.timedelta(days=offset) for offset in range(days)]
+    availability = occupancy_index.free_tables(dates, reservation_time, party_size)
+
+    if days > 1:
+        return Response({
+            'date': date,
+            'end_date': end_date,
+            'time': time,
+            'party_size': party_size,
+            'availability': {day.isoformat(): sorted(tables) for day, tables in availability.items()}
+        }, status=status.HTTP_200_OK)
 
     return Response({
         'date': date,
         'time': time,
-        'available_tables': available_tables,
-        'reserved_tables': list(reserved_tables)
+        'party_size': party_size,
+        'available_tables': sorted(availability[start_date]),
+        'reserved_tables': occupancy_index.occupied_tables(start_date, reservation_time)
     }, status=status.HTTP_200_OK)
 
 
@@ -461,3 +513,47 @@ def admin_reject_reservation(request, reservation_id):
         return Response({
             'error': 'Reservation not found'
         }, status=status.HTTP_404_NOT_FOUND)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def admin_sales_analytics(request):
+    """
+    Revenue by hour or day and best-selling dishes, read from the sales rollups (admin only)
+
+    Parameters: `granularity` (hour or day), `date_from`, `date_to`, `status`
+    (comma separated, default everything but cancelled), `menu_item`, `limit`.
+    """
+    if not is_admin_user(request.user):
+        return Response(
+            {'error': 'Admin access required'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    try:
+        report = sales_report(request.query_params)
+    except FilterError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(report, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def admin_kitchen_queue(request):
+    """
+    Active orders with their line items for the kitchen display (admin only)
+
+    Pass the returned `version` back as `since` to receive only the orders
+    added or changed since then, plus `active_ids` to drop the rest.
+    """
+    if not is_admin_user(request.user):
+        return Response(
+            {'error': 'Admin access required'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    try:
+        queue = kitchen_queue(request.query_params)
+    except FilterError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(queue, status=status.HTTP_200_OK)
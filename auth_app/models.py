@@ -21,14 +21,34 @@ class User(AbstractUser):
         """
         Return the user's full name (first_name + last_name)
         """
-        if self.first_name and self.last_name:
-            return f"{self.first_name} {self.last_name}".strip()
-        elif self.first_name:
-            return self.first_name
-        elif self.last_name:
-            return self.last_name
+        return self.compose_full_name(self.first_name, self.last_name, self.username)
+
+    @staticmethod
+    def compose_full_name(first_name, last_name, username):
+        if first_name and last_name:
+            return f"{first_name} {last_name}".strip()
+        elif first_name:
+            return first_name
+        elif last_name:
+            return last_name
         else:
-            return self.username
+            return username
 
     class Meta:
         db_table = 'auth_user'
+        indexes = [
+            models.Index(fields=['-date_created', '-id'], name='user_created_id_idx'),
+        ]
+
+
+class RevokedToken(models.Model):
+    """
+    Model persisting revoked JWT ids until the token would have expired anyway
+    """
+    jti = models.CharField(max_length=255, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, blank=True, null=True, related_name='revoked_tokens')
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"Revoked token {self.jti}"
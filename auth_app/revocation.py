@@ -0,0 +1,93 @@
+"""
+Revocation store for JWT ids.
+
+Revoked ids are written through to the RevokedToken table and held in a
+per-process dict, so checking a token on every request is a dictionary
+lookup. Each process pulls revocations made elsewhere every
+TOKEN_REVOCATION_SYNC_INTERVAL seconds and prunes expired ids from memory
+and from the table every TOKEN_REVOCATION_PRUNE_INTERVAL seconds.
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .models import RevokedToken
+
+# Re-read a little of the previous window so rows committed late are not missed
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+class RevocationStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # jti -> expiry as a UNIX timestamp
+        self._revoked = {}
+        self._synced_until = None
+        self._last_sync = None
+        self._last_prune = None
+
+    def clear(self):
+        with self._lock:
+            self._revoked.clear()
+            self._synced_until = None
+            self._last_sync = None
+            self._last_prune = None
+
+    def sync(self, force=False):
+        """
+        Load revocations persisted by other processes and prune expired ids
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not force and self._last_sync is not None and \
+                    now - self._last_sync < settings.TOKEN_REVOCATION_SYNC_INTERVAL:
+                return
+            started_at = timezone.now()
+            rows = RevokedToken.objects.filter(expires_at__gt=started_at)
+            if self._synced_until is not None:
+                rows = rows.filter(created_at__gte=self._synced_until - SYNC_OVERLAP)
+            for jti, expires_at in rows.values_list('jti', 'expires_at'):
+                self._revoked[jti] = expires_at.timestamp()
+            self._synced_until = started_at
+            self._last_sync = now
+
+            if self._last_prune is None or now - self._last_prune >= settings.TOKEN_REVOCATION_PRUNE_INTERVAL:
+                cutoff = time.time()
+                self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > cutoff}
+                RevokedToken.objects.filter(expires_at__lte=started_at).delete()
+                self._last_prune = now
+
+    def is_revoked(self, jti):
+        self.sync()
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def revoke(self, token, user_id=None):
+        """
+        Revoke a validated simplejwt token until its own expiry
+
+        Returns False when the token was already revoked, possibly by another
+        process whose revocation this one has not synced yet. The unique jti
+        makes exactly one concurrent caller see True.
+        """
+        jti = token[settings.SIMPLE_JWT['JTI_CLAIM']]
+        exp = token['exp']
+        try:
+            with transaction.atomic():
+                RevokedToken.objects.create(
+                    jti=jti,
+                    user_id=user_id,
+                    expires_at=datetime.fromtimestamp(exp, tz=dt_timezone.utc)
+                )
+            inserted = True
+        except IntegrityError:
+            inserted = False
+        with self._lock:
+            self._revoked[jti] = exp
+        return inserted
+
+
+revocation_store = RevocationStore()
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
+from restaurant_backend.fast_serializers import ValuesSerializer
 from .models import User
 
 
@@ -66,3 +67,8 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = ('id', 'username', 'email', 'date_created', 'first_name', 'last_name', 'full_name', 'is_staff', 'is_superuser')
         read_only_fields = ('id', 'date_created', 'full_name', 'is_staff', 'is_superuser')
+
+
+fast_user_serializer = ValuesSerializer(UserSerializer, computed={
+    'full_name': (('first_name', 'last_name', 'username'), User.compose_full_name),
+})
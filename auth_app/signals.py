@@ -0,0 +1,16 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .authentication import invalidate_cached_user
+from .models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    """
+    Invalidate the cached authentication user when the user row changes
+    """
+    user_id = instance.pk
+    invalidate_cached_user(user_id)
+    # Drop it again after commit in case a request re-cached the old row meanwhile
+    transaction.on_commit(lambda: invalidate_cached_user(user_id))
@@ -1,3 +1,205 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
+from django.core.cache import cache, caches
+from django.core.cache.backends.filebased import FileBasedCache
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from .models import RevokedToken, User
+from .revocation import revocation_store
 
-# Create your tests here.
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Keep the periodic revocation sync out of the query counts below
+        revocation_store.sync(force=True)
+        self.user = User.objects.create_user(
+            username='diner', email='diner@example.com', password='testpassword123', first_name='Old'
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def test_repeat_requests_skip_user_query(self):
+        with self.assertNumQueries(2):
+            self.client.get('/api/reservations/')
+        # Only the reservations query remains
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/reservations/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_profile_update_invalidates_cached_user(self):
+        self.client.get('/api/auth/profile/')
+        self.client.patch('/api/profile/update/', {'first_name': 'New'}, format='json')
+        self.assertEqual(self.client.get('/api/auth/profile/').json()['first_name'], 'New')
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get('/api/auth/profile/')
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.user.refresh_from_db()
+        self.user.save()
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, 401)
+
+    def test_deleted_user_is_rejected(self):
+        self.client.get('/api/auth/profile/')
+        self.user.delete()
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, 401)
+
+
+class TokenRevocationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        revocation_store.clear()
+        self.user = User.objects.create_user(
+            username='diner', email='diner@example.com', password='testpassword123'
+        )
+        self.refresh = RefreshToken.for_user(self.user)
+        self.client = APIClient()
+
+    def authenticate(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def test_refresh_rotates_and_revokes_old_token(self):
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.data)
+        self.assertNotEqual(response.data['refresh'], str(self.refresh))
+
+        reused = self.client.post('/api/auth/token/refresh/', {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(reused.status_code, 401)
+        rotated = self.client.post('/api/auth/token/refresh/', {'refresh': response.data['refresh']}, format='json')
+        self.assertEqual(rotated.status_code, 200)
+
+    def test_refresh_replayed_on_another_worker_is_refused(self):
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        # A worker that has not synced the revocation yet only has the database row to go on
+        revocation_store.clear()
+        with mock.patch.object(revocation_store, 'sync'):
+            reused = self.client.post('/api/auth/token/refresh/', {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(reused.status_code, 401)
+        self.assertNotIn('access', reused.data)
+
+    def test_refresh_rejects_inactive_user(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_logout_revokes_access_and_refresh_tokens(self):
+        self.authenticate(self.refresh.access_token)
+        response = self.client.post('/api/auth/logout/', {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, 401)
+        self.client.credentials()
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_revoke_is_limited_to_owner_or_admin(self):
+        other = User.objects.create_user(username='other', email='other@example.com', password='testpassword123')
+        self.authenticate(RefreshToken.for_user(other).access_token)
+        response = self.client.post('/api/auth/token/revoke/', {'token': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+        admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='testpassword123', is_staff=True
+        )
+        self.authenticate(RefreshToken.for_user(admin).access_token)
+        response = self.client.post('/api/auth/token/revoke/', {'token': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(RevokedToken.objects.filter(jti=self.refresh['jti'], user=self.user).exists())
+
+    def test_revocations_from_other_processes_are_synced(self):
+        access = self.refresh.access_token
+        self.authenticate(access)
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, 200)
+        # Simulate another worker writing the revocation
+        RevokedToken.objects.create(
+            jti=access['jti'], user=self.user, expires_at=timezone.now() + timedelta(hours=1)
+        )
+        revocation_store.sync(force=True)
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, 401)
+
+    def test_expired_revocations_are_pruned(self):
+        RevokedToken.objects.create(jti='stale', expires_at=timezone.now() - timedelta(minutes=1))
+        revocation_store.sync(force=True)
+        self.assertFalse(RevokedToken.objects.filter(jti='stale').exists())
+
+
+class AuthThrottleTests(TestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        self.client = APIClient()
+
+    def tearDown(self):
+        caches['throttle'].clear()
+
+    def test_login_is_throttled_per_email_before_hashing(self):
+        credentials = {'email': 'Victim@example.com', 'password': 'wrong'}
+        with mock.patch('auth_app.serializers.authenticate', return_value=None) as authenticate:
+            for i in range(5):
+                response = self.client.post('/api/auth/login/', credentials, format='json', REMOTE_ADDR=f'10.0.0.{i}')
+                self.assertEqual(response.status_code, 400)
+            # Same email from a new address and through the admin endpoint
+            credentials['email'] = 'victim@example.com'
+            response = self.client.post('/api/auth/admin-login/', credentials, format='json', REMOTE_ADDR='10.0.1.1')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(authenticate.call_count, 5)
+
+    def test_login_is_throttled_per_ip(self):
+        with mock.patch('auth_app.serializers.authenticate', return_value=None) as authenticate:
+            for i in range(20):
+                self.client.post('/api/auth/login/', {'email': f'user{i}@example.com', 'password': 'wrong'}, format='json')
+            response = self.client.post('/api/auth/login/', {'email': 'fresh@example.com', 'password': 'wrong'}, format='json')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(authenticate.call_count, 20)
+
+    def test_limits_hold_with_many_clients(self):
+        throttle_cache = caches['throttle']
+        credentials = {'email': 'victim@example.com', 'password': 'wrong'}
+        with mock.patch('auth_app.serializers.authenticate', return_value=None):
+            for attempt in range(6):
+                # Other clients' counters pile up between the attacker's attempts
+                for i in range(300):
+                    throttle_cache.set(f'throttle_login_10.{attempt}.{i // 256}.{i % 256}', [0.0], 60)
+                response = self.client.post('/api/auth/login/', credentials, format='json', REMOTE_ADDR=f'10.9.0.{attempt}')
+        self.assertEqual(response.status_code, 429)
+
+    def test_parallel_attempts_are_all_counted(self):
+        real_get = FileBasedCache.get
+
+        def slow_get(cache, *args, **kwargs):
+            # Widen the read-modify-write window as a busy disk would
+            value = real_get(cache, *args, **kwargs)
+            time.sleep(0.01)
+            return value
+
+        def attempt(i):
+            return APIClient().post(
+                '/api/auth/login/', {'email': 'victim@example.com', 'password': 'wrong'},
+                format='json', REMOTE_ADDR=f'10.8.0.{i}'
+            ).status_code
+
+        with mock.patch('auth_app.serializers.authenticate', return_value=None) as authenticate, \
+                mock.patch.object(FileBasedCache, 'get', slow_get), ThreadPoolExecutor(max_workers=10) as pool:
+            statuses = list(pool.map(attempt, range(20)))
+        self.assertEqual(authenticate.call_count, 5)
+        self.assertEqual(statuses.count(429), 15)
+
+    def test_registration_is_throttled_before_validation(self):
+        data = {
+            'username': 'spam', 'email': 'spam@example.com',
+            'password': 'pw', 'password_confirm': 'pw',
+        }
+        with mock.patch(
+            'django.contrib.auth.password_validation.get_default_password_validators', return_value=[]
+        ) as get_validators:
+            for _ in range(3):
+                self.client.post('/api/auth/register/', data, format='json')
+            response = self.client.post('/api/auth/register/', data, format='json')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(get_validators.call_count, 3)
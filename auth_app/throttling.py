@@ -0,0 +1,100 @@
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+# Histories hash onto this many lock files, so unrelated clients rarely wait on each other
+LOCK_STRIPES = 64
+_process_lock = threading.Lock()
+
+
+@contextmanager
+def history_lock(cache, key):
+    """
+    Hold an exclusive lock on the history stored under `key`.
+
+    The throttle reads a history, appends to it and writes it back. On the
+    file-based cache those are separate file operations, so workers updating
+    the same history at once would each drop the other's attempts. Lock files
+    sit next to the cache files, which keeps the lock shared by every process
+    using the cache; without flock the lock only covers this process.
+    """
+    directory = getattr(cache, '_dir', None)
+    if directory is None or fcntl is None:
+        with _process_lock:
+            yield
+        return
+    stripe = int(hashlib.sha256(key.encode()).hexdigest(), 16) % LOCK_STRIPES
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f'{stripe}.lock'), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class AuthRateThrottle(SimpleRateThrottle):
+    """
+    Sliding-window throttle for unauthenticated auth endpoints.
+
+    Counters live in the shared 'throttle' cache so every worker process sees
+    the same history, and each update holds history_lock so parallel attempts
+    are all counted. DRF checks throttles before the view runs, so a rejected
+    attempt never reaches password hashing or validation.
+    """
+    @property
+    def cache(self):
+        # Looked up per request so a cache reconfigured at runtime is picked up
+        return caches['throttle']
+
+    def allow_request(self, request, view):
+        key = self.get_cache_key(request, view) if self.rate is not None else None
+        if key is None:
+            return super().allow_request(request, view)
+        with history_lock(self.cache, key):
+            return super().allow_request(request, view)
+
+    def get_ident_value(self, request):
+        return self.get_ident(request)
+
+    def get_cache_key(self, request, view):
+        ident = self.get_ident_value(request)
+        if not ident:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class EmailRateThrottle(AuthRateThrottle):
+    """
+    Throttle keyed on the submitted email, regardless of the client address
+    """
+    def get_ident_value(self, request):
+        email = request.data.get('email')
+        if not isinstance(email, str):
+            return None
+        return email.strip().lower()
+
+
+class LoginRateThrottle(AuthRateThrottle):
+    scope = 'login'
+
+
+class LoginEmailRateThrottle(EmailRateThrottle):
+    scope = 'login_email'
+
+
+class RegisterRateThrottle(AuthRateThrottle):
+    scope = 'register'
+
+
+class RegisterEmailRateThrottle(EmailRateThrottle):
+    scope = 'register_email'
@@ -8,4 +8,7 @@ urlpatterns = [
     path('login/', views.login, name='login'),
     path('admin-login/', views.admin_login, name='admin_login'),
     path('profile/', views.profile, name='profile'),
+    path('token/refresh/', views.token_refresh, name='token_refresh'),
+    path('token/revoke/', views.token_revoke, name='token_revoke'),
+    path('logout/', views.logout, name='logout'),
 ]
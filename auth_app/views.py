@@ -1,13 +1,36 @@
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken, UntypedToken
+from .models import User
+from .revocation import revocation_store
 from .serializers import UserRegistrationSerializer, UserLoginSerializer, UserSerializer
+from .throttling import (
+    LoginEmailRateThrottle, LoginRateThrottle, RegisterEmailRateThrottle, RegisterRateThrottle
+)
+
+
+def decode_token(token_class, raw_token):
+    """
+    Decode and verify a token, returning None if it is invalid, expired or revoked
+    """
+    if not isinstance(raw_token, str) or not raw_token:
+        return None
+    try:
+        token = token_class(raw_token)
+    except TokenError:
+        return None
+    if revocation_store.is_revoked(token[api_settings.JTI_CLAIM]):
+        return None
+    return token
 
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([RegisterRateThrottle, RegisterEmailRateThrottle])
 def register(request):
     """
     Register a new user and return JWT tokens
@@ -31,6 +54,7 @@ def register(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([LoginRateThrottle, LoginEmailRateThrottle])
 def login(request):
     """
     Login user and return JWT tokens
@@ -63,6 +87,7 @@ def profile(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([LoginRateThrottle, LoginEmailRateThrottle])
 def admin_login(request):
     """
     Admin login endpoint - same as regular login but validates admin privileges
@@ -100,3 +125,81 @@ def admin_login(request):
         }, status=status.HTTP_200_OK)
 
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def token_refresh(request):
+    """
+    Exchange a refresh token for a new access token, rotating the refresh token
+    """
+    refresh = decode_token(RefreshToken, request.data.get('refresh'))
+    if refresh is None:
+        return Response({
+            'error': 'Invalid or expired refresh token'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+
+    user_id = refresh[api_settings.USER_ID_CLAIM]
+    if not User.objects.filter(pk=user_id, is_active=True).exists():
+        return Response({
+            'error': 'No active account found for the given token'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+
+    tokens = {'access': str(refresh.access_token)}
+    if api_settings.ROTATE_REFRESH_TOKENS:
+        # Revoking is the gate: a token replayed concurrently or on another
+        # worker loses the insert and is refused
+        if api_settings.BLACKLIST_AFTER_ROTATION and not revocation_store.revoke(refresh, user_id=user_id):
+            return Response({
+                'error': 'Invalid or expired refresh token'
+            }, status=status.HTTP_401_UNAUTHORIZED)
+        refresh.set_jti()
+        refresh.set_exp()
+        refresh.set_iat()
+        tokens['refresh'] = str(refresh)
+
+    return Response(tokens, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+def logout(request):
+    """
+    Revoke the current access token and the given refresh token
+    """
+    raw_refresh = request.data.get('refresh')
+    if raw_refresh:
+        refresh = decode_token(RefreshToken, raw_refresh)
+        if refresh is None or refresh[api_settings.USER_ID_CLAIM] != request.user.id:
+            return Response({
+                'error': 'Invalid refresh token'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        revocation_store.revoke(refresh, user_id=request.user.id)
+
+    if request.auth is not None:
+        revocation_store.revoke(request.auth, user_id=request.user.id)
+
+    return Response({'message': 'Logged out successfully'}, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+def token_revoke(request):
+    """
+    Revoke an access or refresh token owned by the user; admins may revoke any token
+    """
+    token = decode_token(UntypedToken, request.data.get('token'))
+    if token is None:
+        return Response({
+            'error': 'Invalid or expired token'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    owner_id = token.get(api_settings.USER_ID_CLAIM)
+    if owner_id != request.user.id and not (request.user.is_staff or request.user.is_superuser):
+        return Response({
+            'error': 'You can only revoke your own tokens'
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    if owner_id != request.user.id:
+        # The owner may have been deleted since the token was issued
+        owner_id = User.objects.filter(pk=owner_id).values_list('pk', flat=True).first()
+    revocation_store.revoke(token, user_id=owner_id)
+    return Response({'message': 'Token revoked successfully'}, status=status.HTTP_200_OK)
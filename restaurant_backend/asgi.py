@@ -2,6 +2,13 @@
 ASGI config for restaurant_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests served through it use ASGI_ROOT_URLCONF, which routes the public
+read endpoints to async views.
+
+Run in production with several worker processes, for example:
+
+    uvicorn restaurant_backend.asgi:application --host 0.0.0.0 --port 7860 \
+        --workers 4 --lifespan off --proxy-headers --no-access-log
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
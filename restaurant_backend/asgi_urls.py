@@ -0,0 +1,17 @@
+"""
+URL configuration used for requests served over ASGI.
+
+Routes the read-heavy public endpoints to their async views so they run on
+the event loop instead of the sync thread, then falls back to the regular
+URLconf for everything else. The status stream holds its connection open
+and is only served here, where it does not tie up a thread.
+"""
+from django.urls import path
+from restaurant_server import async_views
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('api/menu/', async_views.menu_list, name='async_menu_list'),
+    path('api/reviews/', async_views.reviews_list, name='async_reviews_list'),
+    path('api/status/stream/', async_views.status_stream, name='status_stream'),
+] + sync_urlpatterns
@@ -0,0 +1,676 @@
+"""
+In-process load test for every API route.
+
+`benchmark_database` creates a throwaway database, `seed_dataset` fills it
+with customers, a menu, order history, reviews and reservations, and
+`run_benchmark` drives each scenario through the Django test client from a
+pool of threads. Every scenario builds its requests up front (including any
+rows it deletes or approves), so only the requests themselves are timed.
+Results report latency percentiles, throughput and the SQL queries one warm
+request runs, and `compare_results` checks them against a saved baseline.
+
+Scenarios are registered with @scenario against a route name; routes of
+auth_app, restaurant_server and admin_app without one are listed as
+uncovered.
+"""
+import datetime
+import itertools
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.cache.backends.dummy import DummyCache
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from admin_app.deletion import create_user_deletion_job, run_user_deletion_job
+from auth_app.models import User
+from auth_app.throttling import AuthRateThrottle
+from restaurant_server.menu_cache import invalidate_menu_snapshot
+from restaurant_server.models import MenuItem, OrderHistory, OrderItem, Review, Table, TableReservation
+from restaurant_server.occupancy import occupancy_index
+from restaurant_server.ratings import rebuild_menu_item_ratings
+from restaurant_server.sales import rebuild_sales_rollups
+
+BENCHMARKED_URLCONFS = ('auth_app.urls', 'restaurant_server.urls', 'admin_app.urls')
+
+PASSWORD = 'benchmark-password-1'
+
+DISHES = ['pizza', 'risotto', 'lasagne', 'burger', 'salad', 'curry', 'ramen', 'tacos', 'paella', 'gnocchi',
+          'soup', 'steak', 'falafel', 'dumplings', 'pad thai', 'tiramisu', 'cheesecake', 'pancakes']
+STYLES = ['classic', 'spicy', 'smoked', 'vegan', 'truffle', 'garlic', 'lemon', 'crispy', 'house', 'grilled']
+INGREDIENTS = ['tomato', 'basil', 'mozzarella', 'mushroom', 'chili', 'coriander', 'parmesan', 'chicken',
+               'beef', 'tofu', 'saffron', 'ginger', 'lime', 'olive oil', 'pepper', 'honey']
+SEARCH_QUERIES = ['pizza', 'spicy chick', 'mushrom', 'vegan curry', 'tru', 'lemon soup', 'garlic', 'pancake']
+
+# Order statuses of the seeded history and how often each occurs
+ORDER_STATUS_WEIGHTS = {'delivered': 80, 'cancelled': 8, 'pending': 4, 'confirmed': 3, 'preparing': 3, 'ready': 2}
+
+SCENARIOS = {}
+
+
+def scenario(name, route, expect=(200,)):
+    """
+    Register `func(dataset, count)`, returning `count` calls, as a benchmark of `route`
+
+    A call is a (method, path, data, headers) tuple; responses with a status
+    outside `expect` are counted as errors.
+    """
+    def register(func):
+        SCENARIOS[name] = {'route': route, 'expect': expect, 'calls': func}
+        return func
+    return register
+
+
+def benchmarked_routes():
+    """
+    Names ('app:route') of every route the benchmark should cover
+    """
+    from importlib import import_module
+
+    routes = []
+    for module_name in BENCHMARKED_URLCONFS:
+        module = import_module(module_name)
+        routes += [f'{module.app_name}:{pattern.name}' for pattern in module.urlpatterns]
+    return routes
+
+
+@contextmanager
+def benchmark_database():
+    """
+    Run against a freshly migrated test database that is destroyed afterwards
+
+    SQLite gets a file instead of the in-memory default, so concurrent
+    writers wait for the lock as they would in production.
+    """
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    original_test_name = test_settings.get('NAME')
+    directory = None
+    if connection.vendor == 'sqlite':
+        directory = tempfile.mkdtemp(prefix='benchmark-')
+        test_settings['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        test_settings['NAME'] = original_test_name
+        if directory:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+@contextmanager
+def throttles_disabled():
+    """
+    Let auth endpoints be hit repeatedly from one address and account
+    """
+    original = AuthRateThrottle.cache
+    AuthRateThrottle.cache = DummyCache('benchmark', {})
+    try:
+        yield
+    finally:
+        AuthRateThrottle.cache = original
+
+
+class Dataset:
+    """
+    Seeded rows plus helpers that build the requests scenarios send
+    """
+    def __init__(self, rng, admin, customers, menu_item_ids, counts):
+        self.rng = rng
+        self.admin = admin
+        self.customers = customers
+        self.menu_item_ids = menu_item_ids
+        self.counts = counts
+        self._tokens = {}
+        self._unique = itertools.count(1)
+        # Reservations created by scenarios each get their own evening
+        self._days = itertools.count(400)
+
+    def unique(self):
+        return next(self._unique)
+
+    def next_day(self):
+        return timezone.localdate() + datetime.timedelta(days=next(self._days))
+
+    def auth(self, user):
+        if user.id not in self._tokens:
+            self._tokens[user.id] = {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'}
+        return self._tokens[user.id]
+
+    def customer(self, index):
+        return self.customers[index % len(self.customers)]
+
+    def cart(self, lines=3):
+        return [
+            {'menu_item_id': menu_item_id, 'quantity': self.rng.randint(1, 3)}
+            for menu_item_id in self.rng.sample(self.menu_item_ids, lines)
+        ]
+
+    def create_users(self, count, with_orders=0):
+        """
+        Users that scenarios may delete, optionally with delivered orders
+        """
+        password = self.admin.password
+        users = User.objects.bulk_create([
+            User(username=f'disposable{n}', email=f'disposable{n}@example.com', password=password)
+            for n in (self.unique() for _ in range(count))
+        ])
+        if with_orders:
+            create_orders(self.rng, users, self.menu_item_ids, with_orders, {'delivered': 1})
+        return users
+
+
+def create_orders(rng, users, menu_item_ids, per_user, status_weights, days=60):
+    """
+    Bulk-create orders with 1-4 lines each, spread over the last `days` days
+    """
+    statuses, weights = list(status_weights), list(status_weights.values())
+    prices = dict(MenuItem.objects.filter(id__in=menu_item_ids).values_list('id', 'food_price'))
+    orders, lines = [], []
+    for user in users:
+        for _ in range(per_user):
+            order_lines = [(item_id, rng.randint(1, 3)) for item_id in rng.sample(menu_item_ids, rng.randint(1, 4))]
+            orders.append(OrderHistory(
+                user=user,
+                status=rng.choices(statuses, weights)[0],
+                total_amount=round(sum(prices[item_id] * quantity for item_id, quantity in order_lines), 2),
+            ))
+            lines.append(order_lines)
+    OrderHistory.objects.bulk_create(orders, batch_size=500)
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, menu_item_id=item_id, quantity=quantity, price_at_time=prices[item_id])
+        for order, order_lines in zip(orders, lines)
+        for item_id, quantity in order_lines
+    ], batch_size=500)
+
+    # order_date is auto_now_add, so backdate the orders one day at a time
+    by_day = {}
+    for order in orders:
+        by_day.setdefault(rng.randrange(days), []).append(order.id)
+    now = timezone.now()
+    for days_ago, order_ids in by_day.items():
+        OrderHistory.objects.filter(id__in=order_ids).update(
+            order_date=now - datetime.timedelta(days=days_ago, minutes=rng.randrange(12 * 60))
+        )
+    return orders
+
+
+def seed_dataset(customers=200, menu_items=150, orders_per_user=10, seed=42):
+    """
+    Fill the database with a restaurant's worth of data and return a Dataset
+    """
+    rng = random.Random(seed)
+    password = make_password(PASSWORD)
+    admin = User.objects.create(
+        username='benchmark-admin', email='benchmark-admin@example.com', password=password, is_staff=True
+    )
+    users = User.objects.bulk_create([
+        User(
+            username=f'customer{n}', email=f'customer{n}@example.com', password=password,
+            first_name=rng.choice(['Ada', 'Grace', 'Alan', 'Linus', 'Barbara', 'Ken', '']),
+            last_name=rng.choice(['Lovelace', 'Hopper', 'Turing', 'Torvalds', 'Liskov', 'Thompson', '']),
+        )
+        for n in range(customers)
+    ], batch_size=500)
+
+    items = MenuItem.objects.bulk_create([
+        MenuItem(
+            food_name=f'{rng.choice(STYLES).title()} {rng.choice(DISHES)} {n}',
+            food_description=' '.join(rng.sample(INGREDIENTS, 4)),
+            food_price=round(rng.uniform(4, 30), 2),
+            is_available=rng.random() > 0.1,
+        )
+        for n in range(menu_items)
+    ], batch_size=500)
+    menu_item_ids = [item.id for item in items if item.is_available]
+
+    orders = create_orders(rng, users, menu_item_ids, orders_per_user, ORDER_STATUS_WEIGHTS)
+    Review.objects.bulk_create([
+        Review(order=order, user_id=order.user_id, stars=rng.choices([1, 2, 3, 4, 5], [1, 1, 2, 4, 5])[0],
+               description=rng.choice(['Lovely', 'Too salty', 'Great service', 'Would order again', 'Cold on arrival']))
+        for order in orders if order.status == 'delivered' and rng.random() < 0.3
+    ], batch_size=500)
+
+    table_numbers = list(Table.objects.filter(is_active=True).values_list('number', flat=True))
+    today = timezone.localdate()
+    reservations, taken = [], set()
+    for user in users:
+        for _ in range(2):
+            slot = (today + datetime.timedelta(days=rng.randrange(-30, 30)), datetime.time(rng.choice(range(12, 22))))
+            status = rng.choices(['pending', 'confirmed', 'completed', 'cancelled'], [3, 4, 3, 1])[0]
+            table_number = None
+            if status in ('confirmed', 'completed') and table_numbers:
+                table_number = rng.choice(table_numbers)
+                if (slot, table_number) in taken:
+                    table_number = None
+                taken.add((slot, table_number))
+            reservations.append(TableReservation(
+                user=user, reservation_date=slot[0], reservation_time=slot[1],
+                party_size=rng.randint(1, 6), status=status, table_number=table_number,
+            ))
+    TableReservation.objects.bulk_create(reservations, batch_size=500)
+
+    # bulk_create skips the signals that maintain derived data
+    rebuild_menu_item_ratings()
+    rebuild_sales_rollups()
+    invalidate_menu_snapshot()
+    occupancy_index.clear()
+
+    counts = {
+        'users': customers + 1,
+        'menu_items': menu_items,
+        'orders': len(orders),
+        'reviews': Review.objects.count(),
+        'reservations': len(reservations),
+    }
+    return Dataset(rng, admin, users, menu_item_ids, counts)
+
+
+# Scenarios: auth_app
+
+@scenario('register', 'auth_app:register', expect=(201,))
+def register_calls(dataset, count):
+    calls = []
+    for _ in range(count):
+        n = dataset.unique()
+        calls.append(('POST', '/api/auth/register/', {
+            'username': f'newcomer{n}', 'email': f'newcomer{n}@example.com',
+            'password': PASSWORD, 'password_confirm': PASSWORD,
+        }, {}))
+    return calls
+
+
+@scenario('login', 'auth_app:login')
+def login_calls(dataset, count):
+    return [
+        ('POST', '/api/auth/login/', {'email': dataset.customer(i).email, 'password': PASSWORD}, {})
+        for i in range(count)
+    ]
+
+
+@scenario('admin_login', 'auth_app:admin_login')
+def admin_login_calls(dataset, count):
+    return [('POST', '/api/auth/admin-login/', {'email': dataset.admin.email, 'password': PASSWORD}, {})] * count
+
+
+@scenario('profile', 'auth_app:profile')
+def profile_calls(dataset, count):
+    return [('GET', '/api/auth/profile/', None, dataset.auth(dataset.customer(i))) for i in range(count)]
+
+
+@scenario('token_refresh', 'auth_app:token_refresh')
+def token_refresh_calls(dataset, count):
+    # Refresh tokens are single use
+    return [
+        ('POST', '/api/auth/token/refresh/', {'refresh': str(RefreshToken.for_user(dataset.customer(i)))}, {})
+        for i in range(count)
+    ]
+
+
+@scenario('token_revoke', 'auth_app:token_revoke')
+def token_revoke_calls(dataset, count):
+    calls = []
+    for i in range(count):
+        user = dataset.customer(i)
+        token = str(RefreshToken.for_user(user).access_token)
+        calls.append(('POST', '/api/auth/token/revoke/', {'token': token}, dataset.auth(user)))
+    return calls
+
+
+@scenario('logout', 'auth_app:logout')
+def logout_calls(dataset, count):
+    calls = []
+    for i in range(count):
+        refresh = RefreshToken.for_user(dataset.customer(i))
+        headers = {'Authorization': f'Bearer {refresh.access_token}'}
+        calls.append(('POST', '/api/auth/logout/', {'refresh': str(refresh)}, headers))
+    return calls
+
+
+# Scenarios: restaurant_server
+
+@scenario('menu_list', 'restaurant_server:menu_list')
+def menu_list_calls(dataset, count):
+    return [('GET', '/api/menu/', None, {})] * count
+
+
+@scenario('menu_search', 'restaurant_server:menu_search')
+def menu_search_calls(dataset, count):
+    return [
+        ('GET', f'/api/menu/search/?q={SEARCH_QUERIES[i % len(SEARCH_QUERIES)]}', None, {})
+        for i in range(count)
+    ]
+
+
+@scenario('create_reservation', 'restaurant_server:create_reservation', expect=(201,))
+def create_reservation_calls(dataset, count):
+    return [
+        ('POST', '/api/reservation/', {
+            'reservation_date': dataset.next_day().isoformat(), 'reservation_time': '19:00', 'party_size': 4,
+        }, dataset.auth(dataset.customer(i)))
+        for i in range(count)
+    ]
+
+
+@scenario('user_reservations', 'restaurant_server:user_reservations')
+def user_reservations_calls(dataset, count):
+    return [('GET', '/api/reservations/', None, dataset.auth(dataset.customer(i))) for i in range(count)]
+
+
+@scenario('create_order', 'restaurant_server:create_order', expect=(201,))
+def create_order_calls(dataset, count):
+    return [
+        ('POST', '/api/order/', {'items': dataset.cart()}, dataset.auth(dataset.customer(i)))
+        for i in range(count)
+    ]
+
+
+@scenario('user_orders', 'restaurant_server:user_orders')
+def user_orders_calls(dataset, count):
+    return [('GET', '/api/orders/', None, dataset.auth(dataset.customer(i))) for i in range(count)]
+
+
+@scenario('user_orders_page', 'restaurant_server:user_orders')
+def user_orders_page_calls(dataset, count):
+    return [('GET', '/api/orders/?page_size=10', None, dataset.auth(dataset.customer(i))) for i in range(count)]
+
+
+@scenario('create_review', 'restaurant_server:create_review', expect=(201,))
+def create_review_calls(dataset, count):
+    users = [dataset.customer(i) for i in range(count)]
+    orders = create_orders(dataset.rng, users, dataset.menu_item_ids, 1, {'delivered': 1})
+    return [
+        ('POST', '/api/review/', {'order_id': order.id, 'stars': 4, 'description': 'Benchmark'}, dataset.auth(user))
+        for user, order in zip(users, orders)
+    ]
+
+
+@scenario('reviews_list', 'restaurant_server:reviews_list')
+def reviews_list_calls(dataset, count):
+    return [('GET', f'/api/reviews/?page={1 + i % 5}', None, {}) for i in range(count)]
+
+
+@scenario('reviews_list_cursor', 'restaurant_server:reviews_list')
+def reviews_list_cursor_calls(dataset, count):
+    return [('GET', '/api/reviews/?cursor=', None, {})] * count
+
+
+@scenario('status_stream_token', 'restaurant_server:status_stream_token')
+def status_stream_token_calls(dataset, count):
+    return [('POST', '/api/status/stream/token/', None, dataset.auth(dataset.customer(i))) for i in range(count)]
+
+
+@scenario('checkout', 'restaurant_server:checkout_cart', expect=(201,))
+def checkout_calls(dataset, count):
+    return [
+        ('POST', '/api/checkout/', {'items': dataset.cart()}, dataset.auth(dataset.customer(i)))
+        for i in range(count)
+    ]
+
+
+@scenario('update_profile', 'restaurant_server:update_user_profile')
+def update_profile_calls(dataset, count):
+    return [
+        ('PATCH', '/api/profile/update/', {'first_name': f'Name{i}'}, dataset.auth(dataset.customer(i)))
+        for i in range(count)
+    ]
+
+
+# Scenarios: admin_app
+
+def admin_get(path):
+    def calls(dataset, count):
+        return [('GET', path, None, dataset.auth(dataset.admin))] * count
+    return calls
+
+
+scenario('admin_users', 'admin_app:admin_users_list')(admin_get('/api/admin/users/?page_size=50'))
+scenario('admin_menu_items', 'admin_app:admin_menu_items')(admin_get('/api/admin/menu/all/'))
+scenario('admin_reviews', 'admin_app:admin_reviews_list')(admin_get('/api/admin/reviews/?page_size=50'))
+scenario('admin_reservations', 'admin_app:admin_all_reservations')(
+    admin_get('/api/admin/reservations/?page_size=50')
+)
+scenario('admin_pending_reservations', 'admin_app:admin_pending_reservations')(
+    admin_get('/api/admin/reservations/pending/')
+)
+scenario('admin_kitchen_queue', 'admin_app:admin_kitchen_queue')(admin_get('/api/admin/kitchen/queue/'))
+scenario('admin_sales_analytics', 'admin_app:admin_sales_analytics')(admin_get('/api/admin/analytics/sales/'))
+
+
+@scenario('admin_available_tables', 'admin_app:admin_available_tables')
+def admin_available_tables_calls(dataset, count):
+    today = timezone.localdate()
+    return [
+        ('GET', f'/api/admin/reservations/available-tables/?date={today + datetime.timedelta(days=i % 14)}'
+                '&time=19:00&party_size=4', None, dataset.auth(dataset.admin))
+        for i in range(count)
+    ]
+
+
+@scenario('admin_user_details', 'admin_app:admin_user_details_or_delete')
+def admin_user_details_calls(dataset, count):
+    return [
+        ('GET', f'/api/admin/users/{dataset.customer(i).id}/', None, dataset.auth(dataset.admin))
+        for i in range(count)
+    ]
+
+
+@scenario('admin_delete_user', 'admin_app:admin_user_details_or_delete')
+def admin_delete_user_calls(dataset, count):
+    return [
+        ('DELETE', f'/api/admin/users/{user.id}/', None, dataset.auth(dataset.admin))
+        for user in dataset.create_users(count, with_orders=5)
+    ]
+
+
+@scenario('admin_bulk_delete_users', 'admin_app:admin_bulk_delete_users')
+def admin_bulk_delete_users_calls(dataset, count):
+    users = dataset.create_users(count * 2, with_orders=5)
+    return [
+        ('POST', '/api/admin/users/bulk-delete/', {'user_ids': [users[2 * i].id, users[2 * i + 1].id]},
+         dataset.auth(dataset.admin))
+        for i in range(count)
+    ]
+
+
+@scenario('admin_user_deletion_job', 'admin_app:admin_user_deletion_job')
+def admin_user_deletion_job_calls(dataset, count):
+    job = create_user_deletion_job(dataset.create_users(2, with_orders=5), requested_by=dataset.admin)
+    run_user_deletion_job(job.id)
+    return [('GET', f'/api/admin/users/bulk-delete/{job.id}/', None, dataset.auth(dataset.admin))] * count
+
+
+@scenario('admin_add_menu_item', 'admin_app:admin_add_menu_item', expect=(201,))
+def admin_add_menu_item_calls(dataset, count):
+    return [
+        ('POST', '/api/admin/menu/', {
+            'food_name': f'Special {dataset.unique()}', 'food_description': 'Chef special', 'food_price': 12.5,
+        }, dataset.auth(dataset.admin))
+        for _ in range(count)
+    ]
+
+
+@scenario('admin_delete_menu_item', 'admin_app:admin_delete_menu_item')
+def admin_delete_menu_item_calls(dataset, count):
+    items = MenuItem.objects.bulk_create([
+        MenuItem(food_name=f'Retired dish {dataset.unique()}', food_description='Gone', food_price=5.0)
+        for _ in range(count)
+    ])
+    return [('DELETE', f'/api/admin/menu/{item.id}/', None, dataset.auth(dataset.admin)) for item in items]
+
+
+@scenario('admin_delete_review', 'admin_app:admin_delete_review')
+def admin_delete_review_calls(dataset, count):
+    users = [dataset.customer(i) for i in range(count)]
+    orders = create_orders(dataset.rng, users, dataset.menu_item_ids, 1, {'delivered': 1})
+    reviews = [Review.objects.create(order=order, user_id=order.user_id, stars=2, description='Meh') for order in orders]
+    return [('DELETE', f'/api/admin/review/{review.id}/', None, dataset.auth(dataset.admin)) for review in reviews]
+
+
+def pending_reservations(dataset, count):
+    return TableReservation.objects.bulk_create([
+        TableReservation(
+            user=dataset.customer(i), reservation_date=dataset.next_day(),
+            reservation_time=datetime.time(19), party_size=2,
+        )
+        for i in range(count)
+    ])
+
+
+@scenario('admin_approve_reservation', 'admin_app:admin_approve_reservation')
+def admin_approve_reservation_calls(dataset, count):
+    return [
+        ('POST', f'/api/admin/reservations/{reservation.id}/approve/', {}, dataset.auth(dataset.admin))
+        for reservation in pending_reservations(dataset, count)
+    ]
+
+
+@scenario('admin_reject_reservation', 'admin_app:admin_reject_reservation')
+def admin_reject_reservation_calls(dataset, count):
+    return [
+        ('POST', f'/api/admin/reservations/{reservation.id}/reject/', {}, dataset.auth(dataset.admin))
+        for reservation in pending_reservations(dataset, count)
+    ]
+
+
+# Running
+
+def _send(client, call):
+    method, path, data, headers = call
+    body = json.dumps(data) if data is not None else ''
+    response = client.generic(method, path, body, content_type='application/json', headers=headers)
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response.status_code
+
+
+def _percentile(quantiles, p):
+    return round(quantiles[p - 1] * 1000, 2)
+
+
+def summarize(latencies, elapsed, errors, queries):
+    """
+    Latency percentiles in milliseconds, throughput and error count for one scenario
+    """
+    quantiles = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors.values()),
+        'error_statuses': {str(code): n for code, n in sorted(errors.items())},
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 2),
+        'p50_ms': _percentile(quantiles, 50),
+        'p95_ms': _percentile(quantiles, 95),
+        'p99_ms': _percentile(quantiles, 99),
+        'max_ms': round(max(latencies) * 1000, 2),
+        'queries': queries,
+    }
+
+
+def run_scenario(dataset, name, requests, concurrency):
+    """
+    Time `requests` calls of scenario `name` from `concurrency` threads
+    """
+    spec = SCENARIOS[name]
+    calls = spec['calls'](dataset, requests + 2)
+
+    # One warm-up call, then one counted call, both on this thread
+    client = Client()
+    _send(client, calls.pop())
+    with CaptureQueriesContext(connection) as captured:
+        _send(client, calls.pop())
+    queries = len(captured)
+
+    latencies = []
+    errors = {}
+    lock = threading.Lock()
+
+    def worker(chunk):
+        client = Client()
+        try:
+            for call in chunk:
+                start = time.perf_counter()
+                status_code = _send(client, call)
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+                    if status_code not in spec['expect']:
+                        errors[status_code] = errors.get(status_code, 0) + 1
+        finally:
+            connections.close_all()
+
+    chunks = [calls[i::concurrency] for i in range(concurrency)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, chunks))
+    return {'route': spec['route'], **summarize(latencies, time.perf_counter() - start, errors, queries)}
+
+
+def run_benchmark(dataset, names, requests, concurrency, progress=None):
+    """
+    Run the named scenarios in order and return the results document
+    """
+    results = {}
+    for name in names:
+        results[name] = run_scenario(dataset, name, requests, concurrency)
+        if progress:
+            progress(name, results[name])
+    covered = {spec['route'] for spec in SCENARIOS.values()}
+    return {
+        'meta': {
+            'created_at': timezone.now().isoformat(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'requests': requests,
+            'concurrency': concurrency,
+            'dataset': dataset.counts,
+        },
+        'endpoints': results,
+        'uncovered_routes': [route for route in benchmarked_routes() if route not in covered],
+    }
+
+
+def compare_results(results, baseline, tolerance=0.2, min_delta_ms=1.0):
+    """
+    Compare each endpoint's p95 and query count with `baseline`
+
+    Returns {name: comparison}; `regressed` is set when p95 grew by more than
+    `tolerance` (and `min_delta_ms`), the query count went up, or a request
+    failed that did not fail before.
+    """
+    comparison = {}
+    for name, current in results['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if previous is None:
+            comparison[name] = {'baseline': False, 'regressed': False}
+            continue
+        delta_ms = current['p95_ms'] - previous['p95_ms']
+        change = delta_ms / previous['p95_ms'] if previous['p95_ms'] else 0.0
+        reasons = []
+        if change > tolerance and delta_ms > min_delta_ms:
+            reasons.append(f"p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current['queries'] > previous['queries']:
+            reasons.append(f"queries {previous['queries']} -> {current['queries']}")
+        if current['errors'] and not previous['errors']:
+            reasons.append(f"{current['errors']} errors")
+        comparison[name] = {
+            'baseline': True,
+            'p95_change': round(change, 3),
+            'queries_change': current['queries'] - previous['queries'],
+            'regressed': bool(reasons),
+            'reasons': reasons,
+        }
+    return comparison
@@ -0,0 +1,138 @@
+"""
+Read-only serialization of list payloads straight from .values() rows.
+
+A ValuesSerializer inspects a DRF ModelSerializer once and compiles every
+readable field into a getter over a flat values() row, so listing N objects
+skips model instantiation and per-field DRF dispatch while producing the
+same JSON as the serializer it mirrors. Fields the model cannot provide from
+a column (properties, SerializerMethodFields) are supplied as `computed`
+functions of named columns. File URLs are rendered as they are without a
+request in the serializer context.
+"""
+from operator import itemgetter
+
+from django.utils import timezone
+from rest_framework import ISO_8601, fields as drf_fields, relations, serializers
+from rest_framework.settings import api_settings
+
+# DRF fields whose representation of a database value is the value itself
+IDENTITY_FIELDS = (
+    drf_fields.BooleanField,
+    drf_fields.CharField,
+    drf_fields.ChoiceField,
+    drf_fields.FloatField,
+    drf_fields.IntegerField,
+    relations.PrimaryKeyRelatedField,
+)
+
+
+def _datetime(value):
+    value = value.astimezone(timezone.get_current_timezone()).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def _isoformat(value):
+    return value.isoformat()
+
+
+class ValuesSerializer:
+    def __init__(self, serializer_class, computed=None):
+        self.serializer_class = serializer_class
+        # field name -> (columns, function of those column values)
+        self.computed = computed or {}
+        self._plan = None
+
+    def _compile(self, serializer, prefix, columns):
+        model = serializer.Meta.model
+        plan = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if name in self.computed:
+                field_columns, func = self.computed[name]
+                keys = [prefix + column for column in field_columns]
+                columns.extend(keys)
+                plan.append((name, self._computed_getter(keys, func)))
+                continue
+            if isinstance(field, serializers.ModelSerializer):
+                pk_key = prefix + field.source + '__' + field.Meta.model._meta.pk.attname
+                columns.append(pk_key)
+                nested = self._compile(field, prefix + field.source + '__', columns)
+                plan.append((name, self._nested_getter(pk_key, nested)))
+                continue
+            model_field = model._meta.get_field(field.source)
+            key = prefix + field.source
+            columns.append(key)
+            plan.append((name, self._field_getter(key, field, model_field)))
+        return plan
+
+    @staticmethod
+    def _computed_getter(keys, func):
+        return lambda row: func(*[row[key] for key in keys])
+
+    @staticmethod
+    def _nested_getter(pk_key, plan):
+        def get(row):
+            if row[pk_key] is None:
+                return None
+            return {name: getter(row) for name, getter in plan}
+        return get
+
+    @staticmethod
+    def _field_getter(key, field, model_field):
+        if isinstance(field, drf_fields.FileField):
+            storage = model_field.storage
+            return lambda row: storage.url(row[key]) if row[key] else None
+        if isinstance(field, drf_fields.DateTimeField) and \
+                getattr(field, 'format', api_settings.DATETIME_FORMAT) == ISO_8601:
+            convert = _datetime
+        elif isinstance(field, drf_fields.DateField) and \
+                getattr(field, 'format', api_settings.DATE_FORMAT) == ISO_8601:
+            convert = _isoformat
+        elif isinstance(field, drf_fields.TimeField) and \
+                getattr(field, 'format', api_settings.TIME_FORMAT) == ISO_8601:
+            convert = _isoformat
+        elif isinstance(field, IDENTITY_FIELDS):
+            return itemgetter(key)
+        else:
+            # Anything unusual goes through DRF itself
+            convert = field.to_representation
+
+        def get(row):
+            value = row[key]
+            return None if value is None else convert(value)
+        return get
+
+    @property
+    def plan(self):
+        if self._plan is None:
+            columns = []
+            plan = self._compile(self.serializer_class(), '', columns)
+            self._plan = (plan, list(dict.fromkeys(columns)))
+        return self._plan
+
+    def values(self, queryset):
+        """
+        Return the .values() queryset serialize() reads rows from
+        """
+        return queryset.values(*self.plan[1])
+
+    def serialize(self, queryset):
+        """
+        Return the list payload for queryset, matching serializer_class(queryset, many=True).data
+        """
+        plan = self.plan[0]
+        return [
+            {name: getter(row) for name, getter in plan}
+            for row in self.values(queryset)
+        ]
+
+    def iter_serialize(self, queryset, chunk_size=2000):
+        """
+        Yield serialized rows one at a time, fetching chunk_size rows per round trip
+        """
+        plan = self.plan[0]
+        for row in self.values(queryset).iterator(chunk_size=chunk_size):
+            yield {name: getter(row) for name, getter in plan}
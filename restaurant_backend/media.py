@@ -0,0 +1,173 @@
+"""
+Media file serving for production.
+
+Files under MEDIA_ROOT are served with validators (ETag / Last-Modified),
+single byte-range support and long-lived immutable caching for content-hashed
+names. Full responses go through FileResponse so WSGI servers can hand the
+file descriptor to sendfile(); under ASGI the file is streamed from an async
+iterator instead, since the handler would read a sync one into memory first.
+Setting MEDIA_ACCEL_REDIRECT_PREFIX delegates delivery to nginx entirely via
+X-Accel-Redirect, which is preferable in production.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import FileSystemStorage
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+mimetypes.add_type('image/webp', '.webp')
+mimetypes.add_type('image/avif', '.avif')
+
+# name.<12 hex chars>.ext, as written by ContentHashedStorage and the image pipeline
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class ContentHashedStorage(FileSystemStorage):
+    """
+    File storage that inserts a hash of the file contents into new file names
+    """
+    def save(self, name, content, max_length=None):
+        if name and not HASHED_NAME_RE.search(name):
+            hasher = hashlib.sha256()
+            if hasattr(content, 'seek'):
+                content.seek(0)
+            for chunk in content.chunks() if hasattr(content, 'chunks') else [content.read()]:
+                hasher.update(chunk)
+            if hasattr(content, 'seek'):
+                content.seek(0)
+            root, ext = os.path.splitext(name)
+            name = f'{root}.{hasher.hexdigest()[:12]}{ext}'
+        return super().save(name, content, max_length=max_length)
+
+
+def _cache_control(path):
+    if HASHED_NAME_RE.search(path):
+        return f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    return f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+
+
+def _parse_range(header, size):
+    """
+    Return (start, end) inclusive for a single satisfiable byte range, None to
+    ignore the header, or False if the range cannot be satisfied
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        start = max(size - length, 0)
+        end = size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _iter_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(STREAM_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+async def _aiter_range(path, start, length):
+    # Disk reads run in a worker thread so the event loop never blocks on them
+    chunks = _iter_range(path, start, length)
+    next_chunk = sync_to_async(next, thread_sensitive=False)
+    try:
+        while True:
+            chunk = await next_chunk(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        chunks.close()
+
+
+@require_safe
+def serve_media(request, path, document_root=None):
+    """
+    Serve a file from MEDIA_ROOT (or `document_root`) with caching headers and byte-range support
+    """
+    try:
+        full_path = safe_join(document_root or settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Invalid path')
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404('File not found')
+    if not os.path.isfile(full_path):
+        raise Http404('File not found')
+
+    size = stat.st_size
+    etag = f'"{int(stat.st_mtime_ns):x}-{size:x}"'
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': _cache_control(path),
+        'Accept-Ranges': 'bytes',
+    }
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if not_modified is not None:
+        for header, value in headers.items():
+            not_modified[header] = value
+        return not_modified
+
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    if range_header and (not if_range or if_range in (etag, headers['Last-Modified'])):
+        byte_range = _parse_range(range_header, size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    accel_prefix = settings.MEDIA_ACCEL_REDIRECT_PREFIX
+    if accel_prefix and document_root is None:
+        # Let the front-end server read the file (and handle Range itself)
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + path.lstrip('/')
+    elif byte_range or isinstance(request, ASGIRequest):
+        start, end = byte_range or (0, size - 1)
+        length = end - start + 1
+        iter_range = _aiter_range if isinstance(request, ASGIRequest) else _iter_range
+        response = StreamingHttpResponse(
+            iter_range(full_path, start, length), status=206 if byte_range else 200, content_type=content_type
+        )
+        if byte_range:
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(length)
+    else:
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+
+    for header, value in headers.items():
+        response[header] = value
+    return response
@@ -49,6 +49,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'restaurant_backend.middleware.ASGIURLConfMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -76,6 +77,10 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'restaurant_backend.wsgi.application'
+ASGI_APPLICATION = 'restaurant_backend.asgi.application'
+
+# Requests served over ASGI use async views for the read-heavy public endpoints
+ASGI_ROOT_URLCONF = 'restaurant_backend.asgi_urls'
 
 
 # Database
@@ -85,10 +90,54 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock when a transaction starts so check-then-write
+            # sections (e.g. table assignment) cannot interleave, and wait for
+            # it instead of failing straight away
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# The menu snapshot and search index versions and the cached users must be seen
+# by every worker process (the Dockerfile runs several), so the default cache
+# is shared: Redis when REDIS_URL is set (needs the redis package), otherwise
+# files on local disk, which is enough for workers on a single host.
+
+if os.environ.get('REDIS_URL'):
+    DEFAULT_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    }
+else:
+    DEFAULT_CACHE = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('DEFAULT_CACHE_LOCATION', BASE_DIR / 'cache'),
+        # Cached users are one entry each; keep culling for truly abandoned entries
+        'OPTIONS': {'MAX_ENTRIES': 100_000},
+    }
+
+CACHES = {
+    'default': DEFAULT_CACHE,
+    # Throttle counters must be shared by every worker process
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('THROTTLE_CACHE_LOCATION', BASE_DIR / 'throttle_cache'),
+        # Culling deletes random entries, live counters included, so only let
+        # it happen far beyond the keys a busy window produces, and then drop
+        # a tenth rather than the default third
+        'OPTIONS': {'MAX_ENTRIES': 100_000, 'CULL_FREQUENCY': 10},
+    },
+}
+
+# The test suite swaps every cache for a per-run temporary directory
+TEST_RUNNER = 'restaurant_backend.test_runner.TestRunner'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -130,6 +179,33 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploaded files get a content hash in their name so they can be cached forever
+STORAGES = {
+    'default': {
+        'BACKEND': 'restaurant_backend.media.ContentHashedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Cache lifetime for media files without a content hash in their name
+MEDIA_CACHE_MAX_AGE = 60 * 60
+
+# When set (e.g. '/protected-media/'), media responses carry X-Accel-Redirect
+# so nginx streams the file instead of a Python worker
+MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get('MEDIA_ACCEL_REDIRECT_PREFIX', '')
+
+# Menu image derivatives: variant name -> maximum width in pixels
+MENU_IMAGE_VARIANTS = {
+    'thumb': 160,
+    'card': 480,
+    'hero': 1280,
+}
+# WEBP or AVIF fall back to JPEG when Pillow was built without the codec
+MENU_IMAGE_VARIANT_FORMAT = 'WEBP'
+MENU_IMAGE_VARIANT_QUALITY = 80
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -138,7 +214,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'auth_app.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -151,6 +227,14 @@ REST_FRAMEWORK = {
         'rest_framework.parsers.MultiPartParser',
         'rest_framework.parsers.FormParser',
     ],
+    # uvicorn --proxy-headers already resolves the client address into REMOTE_ADDR
+    'NUM_PROXIES': 0,
+    'DEFAULT_THROTTLE_RATES': {
+        'login': '20/min',
+        'login_email': '5/min',
+        'register': '10/hour',
+        'register_email': '3/hour',
+    },
 }
 
 # Simple JWT configuration
@@ -181,6 +265,18 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# Seconds an authenticated user is served from the cache (auth_app.authentication)
+JWT_USER_CACHE_TTL = 60
+
+# Upper bound on how long a menu snapshot (restaurant_server.menu_cache) is kept;
+# superseded versions are normally deleted as soon as the menu changes
+MENU_SNAPSHOT_TTL = 60 * 60
+
+# Token revocation store (auth_app.revocation): how often each process pulls
+# revocations made by other processes and prunes expired ids
+TOKEN_REVOCATION_SYNC_INTERVAL = 10
+TOKEN_REVOCATION_PRUNE_INTERVAL = 15 * 60
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -197,3 +293,36 @@ CORS_ALLOW_ALL_ORIGINS = True
 
 # Custom User Model
 AUTH_USER_MODEL = 'auth_app.User'
+
+# How long responses stored under an Idempotency-Key are replayed
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+# A key whose request has not finished after this long is treated as abandoned
+# (e.g. its worker was killed) and may be retried
+IDEMPOTENCY_KEY_LEASE = timedelta(seconds=30)
+
+# In-process background tasks (restaurant_backend.tasks)
+BACKGROUND_TASK_WORKERS = 2
+BACKGROUND_TASKS_EAGER = False
+
+# Table reservations: slot granularity, how long a booking holds its table, and
+# how long the in-memory occupancy index trusts a loaded day
+RESERVATION_SLOT_MINUTES = 30
+RESERVATION_DURATION = timedelta(hours=2)
+OCCUPANCY_INDEX_TTL = 60
+
+# Order and reservation status stream (restaurant_server.status_stream): how
+# long a connection is held before the client reconnects with Last-Event-ID,
+# how often it checks for changes made by other worker processes, and how
+# long changes stay available for replay
+STATUS_STREAM_TIMEOUT = 5 * 60
+STATUS_STREAM_POLL_INTERVAL = 5
+STATUS_STREAM_RETRY_MS = 1000
+# Seconds a token from /api/status/stream/token/ can be used to open the stream
+STATUS_STREAM_TOKEN_MAX_AGE = 60
+STATUS_CHANGE_RETENTION = timedelta(hours=24)
+
+# Rows deleted per transaction by admin user deletion jobs
+USER_DELETION_BATCH_SIZE = 500
+
+# Rows fetched per database round trip by streaming admin exports
+EXPORT_CHUNK_SIZE = 2000
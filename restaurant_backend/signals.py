@@ -0,0 +1,17 @@
+"""
+Helpers shared by the apps' signal handlers
+"""
+
+
+def first_of_deletion(origin, key):
+    """
+    True the first time `key` is seen for the delete() call started on `origin`
+
+    pre_delete and post_delete are sent once per deleted row, so a handler
+    that deals with the whole deletion at once uses this to skip the rest.
+    """
+    handled = origin.__dict__.setdefault('_deletion_handled', set())
+    if key in handled:
+        return False
+    handled.add(key)
+    return True
@@ -0,0 +1,46 @@
+"""
+Minimal in-process background task runner.
+
+Tasks run on a small thread pool after the current transaction commits, so
+request handlers can hand off slow work without blocking the response. Set
+BACKGROUND_TASKS_EAGER to run tasks inline (used by the test suite).
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.BACKGROUND_TASK_WORKERS,
+            thread_name_prefix='background-task',
+        )
+    return _executor
+
+
+def _run(func, args, kwargs):
+    close_old_connections()
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception('Background task %s failed', func.__name__)
+    finally:
+        connections.close_all()
+
+
+def run_in_background(func, *args, **kwargs):
+    """
+    Schedule `func(*args, **kwargs)` on the worker pool once the current transaction commits
+    """
+    if settings.BACKGROUND_TASKS_EAGER:
+        func(*args, **kwargs)
+        return
+    transaction.on_commit(lambda: get_executor().submit(_run, func, args, kwargs))
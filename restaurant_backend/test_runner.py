@@ -0,0 +1,35 @@
+"""
+Test runner that keeps the suite off the development caches
+"""
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Point every cache at a fresh directory for the run, so tests neither wipe
+    nor read the caches of a server running from the same checkout
+    """
+    def setup_test_environment(self, **kwargs):
+        self.cache_dir = tempfile.mkdtemp(prefix='restaurant-test-cache-')
+        caches = {
+            alias: {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': str(Path(self.cache_dir) / alias),
+                'OPTIONS': config.get('OPTIONS', {}) if 'filebased' in config['BACKEND'] else {},
+            }
+            for alias, config in settings.CACHES.items()
+        }
+        self.cache_override = override_settings(CACHES=caches)
+        self.cache_override.enable()
+        super().setup_test_environment(**kwargs)
+
+    def teardown_test_environment(self, **kwargs):
+        super().teardown_test_environment(**kwargs)
+        self.cache_override.disable()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
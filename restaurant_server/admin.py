@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import MenuItem, OrderHistory, OrderItem, TableReservation, Review
+from .models import MenuItem, OrderHistory, OrderItem, Table, TableReservation, Review
+from .search import menu_search_index
 
 
 @admin.register(MenuItem)
@@ -10,6 +11,13 @@ class MenuItemAdmin(admin.ModelAdmin):
     list_editable = ('food_price', 'is_available')
     ordering = ('food_name',)
 
+    def get_search_results(self, request, queryset, search_term):
+        # Use the menu search index instead of icontains scans over every row
+        if not search_term:
+            return queryset, False
+        item_ids = menu_search_index.search(search_term, limit=None, include_unavailable=True)
+        return queryset.filter(id__in=item_ids), False
+
 
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
@@ -20,6 +28,7 @@ class OrderItemInline(admin.TabularInline):
 @admin.register(OrderHistory)
 class OrderHistoryAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'order_date', 'total_amount', 'status')
+    list_select_related = ('user',)
     list_filter = ('status', 'order_date')
     search_fields = ('user__username', 'user__email')
     list_editable = ('status',)
@@ -28,6 +37,14 @@ class OrderHistoryAdmin(admin.ModelAdmin):
     readonly_fields = ('order_date', 'total_amount')
 
 
+@admin.register(Table)
+class TableAdmin(admin.ModelAdmin):
+    list_display = ('number', 'seats', 'is_active')
+    list_filter = ('is_active', 'seats')
+    list_editable = ('seats', 'is_active')
+    ordering = ('number',)
+
+
 @admin.register(TableReservation)
 class TableReservationAdmin(admin.ModelAdmin):
     list_display = ('user', 'reservation_date', 'reservation_time', 'party_size', 'status', 'table_number')
@@ -0,0 +1,163 @@
+"""
+Async variants of the read-heavy public endpoints.
+
+These are plain Django async views (DRF 3.14 views are sync only) and are
+routed in place of their DRF counterparts when the project runs under ASGI,
+see restaurant_backend.asgi_urls. They produce the same payloads.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework import exceptions
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework.views import exception_handler
+from .menu_cache import aget_menu_snapshot
+from .models import Review
+from .pagination import ReviewCursorPagination
+from .serializers import ReviewSerializer
+from .status_stream import alatest_change_id, status_events, stream_token_user_id
+from .views import StandardResultsSetPagination, menu_snapshot_response
+
+
+def _json_response(data, status=200):
+    # Render like DRF's JSONRenderer so payloads match the sync endpoints byte for byte
+    return HttpResponse(JSONRenderer().render(data), content_type='application/json', status=status)
+
+
+@require_GET
+async def menu_list(request):
+    """
+    Get all available menu items
+    """
+    return menu_snapshot_response(request, await aget_menu_snapshot())
+
+
+def _page_link(request, page_number, last_page):
+    if page_number < 1 or page_number > last_page:
+        return None
+    url = request.build_absolute_uri()
+    if page_number == 1:
+        return remove_query_param(url, 'page')
+    return replace_query_param(url, 'page', page_number)
+
+
+@require_GET
+async def reviews_list(request):
+    """
+    Get all reviews (public endpoint)
+    """
+    request, error = await sync_to_async(_authenticate)(request)
+    if error is not None:
+        return error
+    reviews = Review.objects.with_user()
+
+    if ReviewCursorPagination.cursor_query_param in request.query_params:
+        paginator = ReviewCursorPagination()
+        page_queryset = paginator.get_page_queryset(reviews, request)
+        result_page = paginator.paginate_results([review async for review in page_queryset])
+        return _json_response({
+            'next': paginator.get_next_link(),
+            'results': ReviewSerializer(result_page, many=True).data,
+        })
+
+    paginator = StandardResultsSetPagination()
+    page_size = paginator.get_page_size(request)
+    count = await reviews.acount()
+    last_page = max(1, -(-count // page_size))
+    page_number = request.query_params.get(paginator.page_query_param, 1)
+    if page_number in paginator.last_page_strings:
+        page_number = last_page
+    try:
+        page_number = int(page_number)
+    except ValueError:
+        page_number = 0
+    if page_number < 1 or page_number > last_page:
+        return _json_response({'detail': 'Invalid page.'}, status=404)
+
+    offset = (page_number - 1) * page_size
+    result_page = [review async for review in reviews[offset:offset + page_size]]
+    return _json_response({
+        'count': count,
+        'next': _page_link(request, page_number + 1, last_page),
+        'previous': _page_link(request, page_number - 1, last_page),
+        'results': ReviewSerializer(result_page, many=True).data,
+    })
+
+
+def _authenticate(request):
+    """
+    Run the API's authentication classes, as DRF does for a sync view
+
+    Returns the DRF request and, when the credentials are invalid, the error
+    response DRF would have sent instead of running the view.
+    """
+    authenticators = [auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    request = Request(request, authenticators=authenticators)
+    try:
+        request.user
+    except APIException as exc:
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            # As APIView.handle_exception: 401 with a challenge, 403 without one
+            auth_header = authenticators[0].authenticate_header(request) if authenticators else None
+            if auth_header:
+                exc.auth_header = auth_header
+            else:
+                exc.status_code = 403
+        response = exception_handler(exc, {'request': request})
+        error = _json_response(response.data, status=response.status_code)
+        for header in ('WWW-Authenticate', 'Retry-After'):
+            if header in response:
+                error[header] = response[header]
+        return request, error
+    return request, None
+
+
+def _authenticated_user(request):
+    request, error = _authenticate(request)
+    return request.user if error is None and request.user.is_authenticated else None
+
+
+@require_GET
+async def status_stream(request):
+    """
+    Stream the authenticated user's order and reservation status changes as server-sent events
+
+    Authenticates with the usual Authorization header, or with a `token` query
+    parameter from POST /api/status/stream/token/ for browsers, whose
+    EventSource cannot set headers. That token only opens this stream and
+    expires after STATUS_STREAM_TOKEN_MAX_AGE seconds, so a client fetches a
+    new one before reconnecting.
+
+    Resumes after the `Last-Event-ID` header (or `last_event_id` parameter);
+    without one, only changes made after connecting are sent.
+    """
+    token = request.GET.get('token')
+    if token:
+        user_id = stream_token_user_id(token)
+        user = await get_user_model().objects.filter(pk=user_id, is_active=True).afirst() if user_id else None
+    else:
+        user = await sync_to_async(_authenticated_user)(request)
+    if user is None:
+        response = _json_response({'detail': 'Authentication credentials were not provided.'}, status=401)
+        response['WWW-Authenticate'] = 'Bearer realm="api"'
+        return response
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    if last_event_id:
+        try:
+            last_event_id = int(last_event_id)
+        except ValueError:
+            return _json_response({'error': 'Last-Event-ID must be an integer'}, status=400)
+    else:
+        last_event_id = await alatest_change_id(user.id)
+
+    response = StreamingHttpResponse(status_events(user.id, last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Keep nginx from buffering events
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,78 @@
+"""
+Order placement shared by the checkout and order creation endpoints
+"""
+from django.db import transaction
+from .models import MenuItem, OrderHistory, OrderItem
+from .sales import apply_order_lines
+
+
+class CheckoutError(Exception):
+    """
+    Raised when a cart cannot be turned into an order
+    """
+
+
+def parse_cart_items(items_data):
+    """
+    Normalize raw cart lines into (menu_item_id, quantity) pairs
+    """
+    if not items_data or not isinstance(items_data, list):
+        raise CheckoutError('No items provided for checkout')
+
+    lines = []
+    for item_data in items_data:
+        try:
+            menu_item_id = int(item_data['menu_item_id'])
+            quantity = int(item_data['quantity'])
+        except (KeyError, TypeError, ValueError):
+            raise CheckoutError('Invalid item data format')
+        if quantity < 1:
+            raise CheckoutError('Item quantity must be at least 1')
+        lines.append((menu_item_id, quantity))
+    return lines
+
+
+def place_order(user, items_data, status='pending', special_instructions=''):
+    """
+    Create an order and all of its lines in one transaction.
+
+    All referenced menu items are fetched in a single query and the lines are
+    written with one bulk insert, so the cost does not grow with cart size
+    beyond the insert itself. Nothing is written if any item is missing or
+    unavailable.
+    """
+    lines = parse_cart_items(items_data)
+
+    with transaction.atomic():
+        menu_items = MenuItem.objects.in_bulk({menu_item_id for menu_item_id, _ in lines})
+
+        total_amount = 0
+        for menu_item_id, quantity in lines:
+            menu_item = menu_items.get(menu_item_id)
+            if menu_item is None:
+                raise CheckoutError(f'Menu item with id {menu_item_id} not found')
+            if not menu_item.is_available:
+                raise CheckoutError(f'Menu item with id {menu_item_id} is not available')
+            total_amount += menu_item.food_price * quantity
+
+        order = OrderHistory.objects.create(
+            user=user,
+            total_amount=total_amount,
+            status=status,
+            special_instructions=special_instructions
+        )
+        order_items = OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                menu_item=menu_items[menu_item_id],
+                quantity=quantity,
+                price_at_time=menu_items[menu_item_id].food_price
+            )
+            for menu_item_id, quantity in lines
+        ])
+        # bulk_create skips the signals that keep the sales rollups current
+        apply_order_lines(order.order_date, order.status, [
+            (item.menu_item_id, item.quantity, item.price_at_time) for item in order_items
+        ], 1)
+
+    return OrderHistory.objects.with_details().get(pk=order.pk)
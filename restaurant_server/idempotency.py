@@ -0,0 +1,120 @@
+"""
+Idempotency-Key support for order creating endpoints
+"""
+import functools
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint(request):
+    """
+    Return a compact hash of the request method, path and body
+    """
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = dict(data.lists())
+    body = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(f'{request.method}:{request.path}:{body}'.encode()).hexdigest()
+
+
+def purge_expired_idempotency_keys():
+    """
+    Delete stored keys older than IDEMPOTENCY_KEY_TTL, returning how many were removed
+    """
+    cutoff = timezone.now() - settings.IDEMPOTENCY_KEY_TTL
+    return IdempotencyKey.objects.filter(created_at__lt=cutoff).delete()[0]
+
+
+def idempotent(view_func):
+    """
+    Replay the stored response for repeated requests carrying the same Idempotency-Key.
+
+    Must sit below @api_view so the request is already authenticated. Requests
+    without the header are passed straight through. A key whose request left no
+    outcome within IDEMPOTENCY_KEY_LEASE is considered abandoned and runs again.
+    """
+    @functools.wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_func(request, *args, **kwargs)
+
+        if len(key) > MAX_KEY_LENGTH:
+            return Response({
+                'error': f'{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        endpoint = view_func.__name__
+        fingerprint = request_fingerprint(request)
+        cutoff = timezone.now() - settings.IDEMPOTENCY_KEY_TTL
+
+        record = IdempotencyKey.objects.filter(user=request.user, endpoint=endpoint, key=key).first()
+        if record is not None and record.created_at < cutoff:
+            record.delete()
+            record = None
+
+        if record is None:
+            try:
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(
+                        user=request.user, endpoint=endpoint, key=key, fingerprint=fingerprint
+                    )
+            except IntegrityError:
+                # Another request with the same key won the race
+                record = IdempotencyKey.objects.get(user=request.user, endpoint=endpoint, key=key)
+            else:
+                return _execute(record, view_func, request, *args, **kwargs)
+
+        if record.fingerprint != fingerprint:
+            return Response({
+                'error': f'{IDEMPOTENCY_HEADER} was already used with a different request'
+            }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+        if record.response_status is None:
+            started_at = timezone.now()
+            if record.started_at < started_at - settings.IDEMPOTENCY_KEY_LEASE:
+                # The request holding the key died without an outcome; take it over
+                # unless another retry got there first
+                claimed = IdempotencyKey.objects.filter(
+                    pk=record.pk, response_status__isnull=True, started_at=record.started_at
+                ).update(started_at=started_at)
+                if claimed:
+                    record.started_at = started_at
+                    return _execute(record, view_func, request, *args, **kwargs)
+            return Response({
+                'error': 'A request with this Idempotency-Key is still being processed'
+            }, status=status.HTTP_409_CONFLICT, headers={'Retry-After': '1'})
+
+        response = Response(record.response_body, status=record.response_status)
+        response['Idempotent-Replayed'] = 'true'
+        return response
+
+    return wrapper
+
+
+def _execute(record, view_func, request, *args, **kwargs):
+    # Only touch the key while this request still holds it
+    held = IdempotencyKey.objects.filter(pk=record.pk, started_at=record.started_at)
+    try:
+        response = view_func(request, *args, **kwargs)
+    except Exception:
+        held.delete()
+        raise
+
+    if response.status_code >= 500:
+        # Let the client retry server errors for real
+        held.delete()
+        return response
+
+    held.update(response_status=response.status_code, response_body=response.data)
+    return response
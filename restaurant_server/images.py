@@ -0,0 +1,103 @@
+"""
+Resized derivatives of menu item photos.
+
+Variants are generated with Pillow on the background task pool after an
+image is uploaded, written next to the original under content-hashed names,
+and recorded on MenuItem.food_image_variants so the serializer can offer
+clients a size to pick from.
+"""
+import hashlib
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+VARIANT_DIRECTORY = 'menu_images/variants'
+
+_EXTENSIONS = {'WEBP': 'webp', 'AVIF': 'avif', 'JPEG': 'jpg'}
+
+
+def variant_format():
+    """
+    Configured output format, falling back to JPEG if Pillow lacks the codec
+    """
+    image_format = settings.MENU_IMAGE_VARIANT_FORMAT.upper()
+    if image_format in ('WEBP', 'AVIF') and not features.check(image_format.lower()):
+        return 'JPEG'
+    return image_format
+
+
+def _encode(image, image_format):
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, quality=settings.MENU_IMAGE_VARIANT_QUALITY)
+    return buffer.getvalue()
+
+
+def render_variants(source_name):
+    """
+    Write every configured variant of `source_name` and return their metadata
+    """
+    image_format = variant_format()
+    extension = _EXTENSIONS.get(image_format, image_format.lower())
+    stem = os.path.splitext(os.path.basename(source_name))[0]
+
+    with default_storage.open(source_name, 'rb') as source:
+        original = ImageOps.exif_transpose(Image.open(source))
+        original.load()
+
+    variants = {}
+    for variant, max_width in settings.MENU_IMAGE_VARIANTS.items():
+        image = original.copy()
+        # Never upscale; keep the aspect ratio
+        image.thumbnail((max_width, max_width * 4), Image.Resampling.LANCZOS)
+        content = _encode(image, image_format)
+        digest = hashlib.sha256(content).hexdigest()[:12]
+        name = default_storage.save(
+            f'{VARIANT_DIRECTORY}/{stem}.{variant}.{digest}.{extension}', ContentFile(content)
+        )
+        variants[variant] = {'name': name, 'width': image.width, 'height': image.height}
+    return variants
+
+
+def delete_variants(variants_data):
+    for variant in (variants_data or {}).get('variants', {}).values():
+        default_storage.delete(variant['name'])
+
+
+def generate_menu_image_variants(menu_item_id):
+    """
+    Background task: build the derivatives for a menu item's current image
+    """
+    from .menu_cache import invalidate_menu_snapshot
+    from .models import MenuItem
+
+    menu_item = MenuItem.objects.filter(pk=menu_item_id).first()
+    if menu_item is None or not menu_item.food_image:
+        return
+
+    source_name = menu_item.food_image.name
+    variants_data = {'source': source_name, 'variants': render_variants(source_name)}
+
+    # update() skips post_save, so this write does not schedule itself again;
+    # only record the result if the image was not replaced in the meantime
+    updated = MenuItem.objects.filter(pk=menu_item_id, food_image=source_name).update(
+        food_image_variants=variants_data
+    )
+    if updated:
+        delete_variants(menu_item.food_image_variants)
+        invalidate_menu_snapshot()
+    else:
+        delete_variants(variants_data)
+
+
+def variants_are_current(menu_item):
+    if not menu_item.food_image:
+        return not menu_item.food_image_variants
+    return (menu_item.food_image_variants or {}).get('source') == menu_item.food_image.name
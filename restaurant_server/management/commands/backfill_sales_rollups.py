@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from restaurant_server.sales import rebuild_sales_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the hourly and daily sales rollups from every order'
+
+    def handle(self, *args, **options):
+        written = rebuild_sales_rollups()
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} sales rollup rows'))
@@ -0,0 +1,91 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from restaurant_backend.benchmarks import (
+    SCENARIOS, benchmark_database, compare_results, run_benchmark, seed_dataset, throttles_disabled,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway database and load-test every API route through the test client, '
+        'reporting latency percentiles, throughput and queries per request'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100, help='Timed requests per scenario')
+        parser.add_argument('--concurrency', type=int, default=8, help='Client threads per scenario')
+        parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), help='Run only these scenarios')
+        parser.add_argument('--customers', type=int, default=200)
+        parser.add_argument('--menu-items', type=int, default=150)
+        parser.add_argument('--orders-per-customer', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for the dataset')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--baseline', help='Compare with results previously written by --output')
+        parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative p95 growth over the baseline')
+        parser.add_argument('--fail-on-regression', action='store_true',
+                            help='Exit with an error when a scenario regressed against the baseline')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be positive')
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+
+        names = options['scenarios'] or list(SCENARIOS)
+        # The test client sends Host: testserver; DEBUG would keep every query in memory
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], DEBUG=False), \
+                benchmark_database(), throttles_disabled():
+            self.stderr.write('Seeding benchmark database...')
+            dataset = seed_dataset(
+                customers=options['customers'], menu_items=options['menu_items'],
+                orders_per_user=options['orders_per_customer'], seed=options['seed'],
+            )
+            self.stderr.write(', '.join(f'{count} {name}' for name, count in dataset.counts.items()))
+            results = run_benchmark(
+                dataset, names, options['requests'], options['concurrency'], progress=self.report_progress
+            )
+
+        comparison = compare_results(results, baseline, options['tolerance']) if baseline else {}
+        self.print_table(results, comparison)
+        if results['uncovered_routes']:
+            self.stderr.write(self.style.WARNING('Routes without a scenario: ' + ', '.join(results['uncovered_routes'])))
+
+        if options['output']:
+            if comparison:
+                results['comparison'] = comparison
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stderr.write(f"Results written to {options['output']}")
+
+        regressed = [name for name, entry in comparison.items() if entry['regressed']]
+        if regressed and options['fail_on_regression']:
+            raise CommandError(f"Regressions against the baseline: {', '.join(regressed)}")
+
+    def report_progress(self, name, result):
+        self.stderr.write(f"  {name}: p95 {result['p95_ms']}ms, {result['throughput_rps']} req/s")
+
+    def print_table(self, results, comparison):
+        columns = ('scenario', 'p50 ms', 'p95 ms', 'p99 ms', 'req/s', 'queries', 'errors', 'vs baseline')
+        rows = []
+        for name, result in results['endpoints'].items():
+            entry = comparison.get(name)
+            if not entry:
+                versus = ''
+            elif not entry['baseline']:
+                versus = 'new'
+            else:
+                versus = f"{entry['p95_change']:+.0%} p95"
+                if entry['queries_change']:
+                    versus += f", {entry['queries_change']:+d} queries"
+                if entry['regressed']:
+                    versus += '  REGRESSED'
+            rows.append((name, result['p50_ms'], result['p95_ms'], result['p99_ms'], result['throughput_rps'],
+                         result['queries'], result['errors'], versus))
+        widths = [max(len(str(row[i])) for row in [columns, *rows]) for i in range(len(columns))]
+        for row in [columns, *rows]:
+            self.stdout.write('  '.join(str(value).ljust(width) for value, width in zip(row, widths)).rstrip())
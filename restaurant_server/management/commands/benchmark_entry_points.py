@@ -0,0 +1,70 @@
+import asyncio
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client, override_settings
+
+
+def _summary(latencies, elapsed):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'p50_ms': round(statistics.median(latencies) * 1000, 2),
+        'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Compare concurrent throughput of the public read endpoints under the WSGI and ASGI handlers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--requests', type=int, default=400, help='Requests per endpoint and handler')
+        parser.add_argument('--paths', nargs='+', default=['/api/menu/', '/api/reviews/?page=1'])
+
+    def run_wsgi(self, path, total, concurrency):
+        def worker(count):
+            client = Client()
+            latencies = []
+            for _ in range(count):
+                start = time.perf_counter()
+                client.get(path)
+                latencies.append(time.perf_counter() - start)
+            return latencies
+
+        counts = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            latencies = [latency for chunk in executor.map(worker, counts) for latency in chunk]
+        return _summary(latencies, time.perf_counter() - start)
+
+    async def run_asgi(self, path, total, concurrency):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                await client.get(path)
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        return _summary(latencies, time.perf_counter() - start)
+
+    def handle(self, *args, **options):
+        results = {}
+        # The test clients send Host: testserver
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for path in options['paths']:
+                results[path] = {
+                    'wsgi': self.run_wsgi(path, options['requests'], options['concurrency']),
+                    'asgi': asyncio.run(self.run_asgi(path, options['requests'], options['concurrency'])),
+                }
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,53 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from auth_app.models import User
+from auth_app.serializers import UserSerializer, fast_user_serializer
+from restaurant_server.models import MenuItem, TableReservation
+from restaurant_server.serializers import (
+    MenuItemSerializer, TableReservationSerializer, fast_menu_item_serializer, fast_reservation_serializer,
+)
+
+
+def _time(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return round(statistics.median(timings) * 1000, 3)
+
+
+class Command(BaseCommand):
+    help = 'Compare DRF serializers with the .values() fast path on the current database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        cases = {
+            'menu_items': (MenuItemSerializer, fast_menu_item_serializer, MenuItem.objects.all()),
+            'users': (UserSerializer, fast_user_serializer, User.objects.all()),
+            'reservations': (
+                TableReservationSerializer, fast_reservation_serializer,
+                TableReservation.objects.select_related('user').order_by('-created_at'),
+            ),
+        }
+        renderer = JSONRenderer()
+        results = {}
+        for name, (serializer_class, fast, queryset) in cases.items():
+            drf = lambda: renderer.render(serializer_class(queryset.all(), many=True).data)
+            values = lambda: renderer.render(fast.serialize(queryset.all()))
+            drf_ms = _time(drf, options['repeat'])
+            values_ms = _time(values, options['repeat'])
+            results[name] = {
+                'rows': queryset.count(),
+                'identical': drf() == values(),
+                'drf_ms': drf_ms,
+                'values_ms': values_ms,
+                'speedup': round(drf_ms / values_ms, 2) if values_ms else None,
+            }
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from restaurant_server.query_plans import check_query_plans, explain, hot_querysets
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot endpoint querysets and fail if any falls back to a table scan or unindexed sort'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every query plan')
+
+    def handle(self, *args, **options):
+        if options['verbose_plans']:
+            for name, queryset in hot_querysets():
+                self.stdout.write(f'{name}:\n{explain(queryset)}\n')
+
+        failures = check_query_plans()
+        if failures:
+            lines = [f'{name}: {", ".join(problems)}' for name, problems in failures.items()]
+            raise CommandError('Query plan regressions found:\n' + '\n'.join(lines))
+
+        self.stdout.write(self.style.SUCCESS('All hot query plans use indexes'))
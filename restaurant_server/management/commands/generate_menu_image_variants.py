@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from restaurant_server.images import generate_menu_image_variants, variants_are_current
+from restaurant_server.models import MenuItem
+
+
+class Command(BaseCommand):
+    help = 'Generate resized image variants for menu items that are missing them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate variants for every image')
+
+    def handle(self, *args, **options):
+        menu_items = MenuItem.objects.exclude(food_image='').exclude(food_image__isnull=True)
+        generated = 0
+        for menu_item in menu_items.iterator():
+            if options['force'] or not variants_are_current(menu_item):
+                generate_menu_image_variants(menu_item.pk)
+                generated += 1
+        self.stdout.write(self.style.SUCCESS(f'Generated variants for {generated} menu items'))
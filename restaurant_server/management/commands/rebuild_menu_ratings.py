@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from restaurant_server.ratings import rebuild_menu_item_ratings
+
+
+class Command(BaseCommand):
+    help = 'Recompute every menu item rating summary from the reviews'
+
+    def handle(self, *args, **options):
+        rated = rebuild_menu_item_ratings()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt ratings for {rated} menu items'))
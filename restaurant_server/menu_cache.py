@@ -0,0 +1,86 @@
+"""
+Versioned snapshot cache for the public menu payload
+"""
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+
+MENU_VERSION_KEY = 'restaurant_server:menu_version'
+MENU_SNAPSHOT_KEY = 'restaurant_server:menu_snapshot:{version}'
+
+
+def _start_menu_version():
+    # Seed from the clock so an evicted counter never reuses an old version
+    # whose snapshot may still be sitting in the cache.
+    version = time.time_ns()
+    cache.add(MENU_VERSION_KEY, version, timeout=None)
+    return cache.get(MENU_VERSION_KEY, version)
+
+
+def get_menu_version():
+    """
+    Return the current menu version, starting a new counter if none exists
+    """
+    version = cache.get(MENU_VERSION_KEY)
+    if version is None:
+        version = _start_menu_version()
+    return version
+
+
+def build_menu_snapshot():
+    """
+    Serialize all available menu items and compute a strong ETag for the payload
+    """
+    from .models import MenuItem
+    from .serializers import fast_menu_item_serializer
+
+    menu_items = MenuItem.objects.available()
+    content = JSONRenderer().render(fast_menu_item_serializer.serialize(menu_items))
+    return {
+        'content': content,
+        'etag': '"%s"' % hashlib.sha256(content).hexdigest(),
+    }
+
+
+def get_menu_snapshot():
+    """
+    Return the cached menu snapshot, rebuilding it once per menu version
+    """
+    version = get_menu_version()
+    key = MENU_SNAPSHOT_KEY.format(version=version)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_menu_snapshot()
+        # A write that lands while we were building bumps the version, so a
+        # stale snapshot stored here is never read again and simply expires.
+        cache.set(key, snapshot, timeout=settings.MENU_SNAPSHOT_TTL)
+    return snapshot
+
+
+async def aget_menu_snapshot():
+    """
+    Async get_menu_snapshot(); only a cache miss leaves the event loop
+    """
+    version = await cache.aget(MENU_VERSION_KEY)
+    if version is not None:
+        snapshot = await cache.aget(MENU_SNAPSHOT_KEY.format(version=version))
+        if snapshot is not None:
+            return snapshot
+    return await sync_to_async(get_menu_snapshot)()
+
+
+def invalidate_menu_snapshot():
+    """
+    Move the menu to a new version so the next request rebuilds the snapshot
+    """
+    try:
+        version = cache.incr(MENU_VERSION_KEY)
+    except ValueError:
+        _start_menu_version()
+    else:
+        # Nothing reads the superseded snapshot any more
+        cache.delete(MENU_SNAPSHOT_KEY.format(version=version - 1))
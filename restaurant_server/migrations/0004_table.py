@@ -0,0 +1,26 @@
+# Generated by Django 5.2 on 2026-10-17 12:18
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant_server', '0003_review_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Table',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField(unique=True)),
+                ('seats', models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1)])),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+            options={
+                'ordering': ['number'],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+def seed_tables(apps, schema_editor):
+    # Match the 20 tables that were previously hard-coded in admin_available_tables
+    Table = apps.get_model('restaurant_server', 'Table')
+    if not Table.objects.exists():
+        Table.objects.bulk_create([Table(number=number, seats=4) for number in range(1, 21)])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant_server', '0004_table'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_tables, migrations.RunPython.noop),
+    ]
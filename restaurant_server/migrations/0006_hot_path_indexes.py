@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-17 12:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant_server', '0005_seed_tables'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['food_name'], name='menuitem_available_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderhistory',
+            index=models.Index(fields=['user', '-order_date', '-id'], name='order_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tablereservation',
+            index=models.Index(fields=['status', 'reservation_date', 'reservation_time'], name='reservation_status_slot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tablereservation',
+            index=models.Index(fields=['user', 'reservation_date', 'reservation_time'], name='reservation_user_slot_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-17 12:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant_server', '0006_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='menuitem',
+            name='food_image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-17 12:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant_server', '0007_menuitem_food_image_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['stars', '-created_at', '-id'], name='review_stars_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tablereservation',
+            index=models.Index(fields=['-created_at', '-id'], name='reservation_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tablereservation',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='reservation_status_created_idx'),
+        ),
+    ]
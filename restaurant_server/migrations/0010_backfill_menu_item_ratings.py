@@ -0,0 +1,33 @@
+from django.db import migrations
+
+
+def backfill_ratings(apps, schema_editor):
+    # Same computation as restaurant_server.ratings.rebuild_menu_item_ratings
+    OrderItem = apps.get_model('restaurant_server', 'OrderItem')
+    MenuItemRating = apps.get_model('restaurant_server', 'MenuItemRating')
+    ratings = {}
+    reviewed_items = (
+        OrderItem.objects.filter(order__review__isnull=False)
+        .values_list('menu_item_id', 'order_id', 'order__review__stars')
+        .distinct()
+        .order_by()
+    )
+    for menu_item_id, _, stars in reviewed_items:
+        if not 1 <= stars <= 5:
+            continue
+        rating = ratings.setdefault(menu_item_id, MenuItemRating(menu_item_id=menu_item_id))
+        rating.count += 1
+        rating.total += stars
+        setattr(rating, f'stars_{stars}', getattr(rating, f'stars_{stars}') + 1)
+    MenuItemRating.objects.bulk_create(ratings.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant_server', '0009_menuitemrating'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
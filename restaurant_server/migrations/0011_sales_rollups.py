@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-17 12:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant_server', '0010_backfill_menu_item_ratings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderSalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('period_start', models.DateTimeField()),
+                ('status', models.CharField(max_length=20)),
+                ('order_count', models.IntegerField(default=0)),
+                ('revenue', models.FloatField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('granularity', 'period_start', 'status'), name='order_sales_rollup_key')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MenuItemSalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('period_start', models.DateTimeField()),
+                ('status', models.CharField(max_length=20)),
+                ('quantity', models.IntegerField(default=0)),
+                ('revenue', models.FloatField(default=0)),
+                ('menu_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to='restaurant_server.menuitem')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('granularity', 'period_start', 'menu_item', 'status'), name='menu_item_sales_rollup_key')],
+            },
+        ),
+    ]
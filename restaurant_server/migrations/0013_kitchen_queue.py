@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-17 13:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant_server', '0012_status_changes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderhistory',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='orderhistory',
+            index=models.Index(condition=models.Q(('status', 'pending'), ('status', 'confirmed'), ('status', 'preparing'), _connector='OR'), fields=['order_date', 'id'], name='order_kitchen_queue_idx'),
+        ),
+    ]
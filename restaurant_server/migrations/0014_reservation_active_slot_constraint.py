@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-17 13:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant_server', '0013_kitchen_queue'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='tablereservation',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='tablereservation',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ('pending', 'confirmed', 'seated'))), fields=('reservation_date', 'reservation_time', 'table_number'), name='reservation_active_table_slot_key'),
+        ),
+    ]
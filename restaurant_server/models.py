@@ -1,13 +1,30 @@
+import functools
+import operator
+
 from django.db import models
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
+
+
+class MenuItemQuerySet(models.QuerySet):
+    def available(self):
+        """
+        Items shown on the public menu, read from the available items partial index
+        """
+        return self.filter(is_available=True)
 
 
 class MenuItem(models.Model):
     """
     Model representing a menu item in the restaurant
     """
+    objects = MenuItemQuerySet.as_manager()
+
     food_image = models.ImageField(upload_to='menu_images/', blank=True, null=True)
+    # Resized copies of food_image, filled in by restaurant_server.images
+    food_image_variants = models.JSONField(default=dict, blank=True, editable=False)
     food_name = models.CharField(max_length=100)
     food_description = models.TextField()
     food_price = models.FloatField(validators=[MinValueValidator(0.01)])
@@ -20,12 +37,43 @@ class MenuItem(models.Model):
 
     class Meta:
         ordering = ['food_name']
+        indexes = [
+            models.Index(fields=['food_name'], condition=models.Q(is_available=True), name='menuitem_available_name_idx'),
+        ]
+
+
+# Orders the kitchen still has to work on
+KITCHEN_ORDER_STATUSES = ['pending', 'confirmed', 'preparing']
+# Spelled as ORs of equalities rather than IN: SQLite only proves a query
+# matches a partial index from bound parameters compared with =
+KITCHEN_QUEUE_CONDITION = functools.reduce(operator.or_, (models.Q(status=s) for s in KITCHEN_ORDER_STATUSES))
+
+
+class OrderHistoryQuerySet(models.QuerySet):
+    def kitchen_queue(self):
+        """
+        Active orders, oldest first, read from the kitchen queue partial index
+        """
+        return self.filter(KITCHEN_QUEUE_CONDITION).order_by('order_date', 'id')
+
+    def with_details(self):
+        """
+        Load everything OrderHistorySerializer renders in a fixed number of queries
+        """
+        return self.select_related('user').prefetch_related(
+            models.Prefetch(
+                'orderitem_set',
+                queryset=OrderItem.objects.select_related('menu_item__rating').order_by('id'),
+            )
+        )
 
 
 class OrderHistory(models.Model):
     """
     Model representing order history for users
     """
+    objects = OrderHistoryQuerySet.as_manager()
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='orders')
     order_date = models.DateTimeField(auto_now_add=True)
     menu_items = models.ManyToManyField(MenuItem, through='OrderItem')
@@ -39,6 +87,8 @@ class OrderHistory(models.Model):
         ('cancelled', 'Cancelled'),
     ], default='pending')
     special_instructions = models.TextField(blank=True, null=True)
+    # Also bumped when the order's items change, see signals
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Order #{self.id} by {self.user.username} on {self.order_date.strftime('%Y-%m-%d')}"
@@ -46,6 +96,14 @@ class OrderHistory(models.Model):
     class Meta:
         ordering = ['-order_date']
         verbose_name_plural = "Order Histories"
+        indexes = [
+            models.Index(fields=['user', '-order_date', '-id'], name='order_user_date_idx'),
+            # Only active orders are indexed, so the kitchen queue stays small however long the history
+            models.Index(
+                fields=['order_date', 'id'], name='order_kitchen_queue_idx',
+                condition=KITCHEN_QUEUE_CONDITION
+            ),
+        ]
 
 
 class OrderItem(models.Model):
@@ -61,10 +119,49 @@ class OrderItem(models.Model):
         return f"{self.quantity}x {self.menu_item.food_name} in Order #{self.order.id}"
 
 
+class Table(models.Model):
+    """
+    Model representing a physical table in the restaurant
+    """
+    number = models.PositiveIntegerField(unique=True)
+    seats = models.PositiveIntegerField(validators=[MinValueValidator(1)])
+    is_active = models.BooleanField(default=True)
+
+    def __str__(self):
+        return f"Table {self.number} ({self.seats} seats)"
+
+    class Meta:
+        ordering = ['number']
+
+
+# Reservations in these states hold their table
+ACTIVE_RESERVATION_STATUSES = ('pending', 'confirmed', 'seated')
+
+
+class TableReservationQuerySet(models.QuerySet):
+    def pending_queue(self):
+        """
+        Reservations awaiting approval, soonest first
+        """
+        return self.filter(status='pending').order_by('reservation_date', 'reservation_time')
+
+    def holding_tables(self, dates):
+        """
+        Reservations on `dates` that hold a table, unordered
+        """
+        return self.filter(
+            reservation_date__in=dates,
+            status__in=ACTIVE_RESERVATION_STATUSES,
+            table_number__isnull=False
+        ).order_by()
+
+
 class TableReservation(models.Model):
     """
     Model representing table reservations
     """
+    objects = TableReservationQuerySet.as_manager()
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='reservations')
     reservation_date = models.DateField()
     reservation_time = models.TimeField()
@@ -86,13 +183,36 @@ class TableReservation(models.Model):
 
     class Meta:
         ordering = ['reservation_date', 'reservation_time']
-        unique_together = ['reservation_date', 'reservation_time', 'table_number']
+        constraints = [
+            # Cancelled, completed and no-show bookings give their table back
+            models.UniqueConstraint(
+                fields=['reservation_date', 'reservation_time', 'table_number'],
+                condition=models.Q(status__in=ACTIVE_RESERVATION_STATUSES),
+                name='reservation_active_table_slot_key'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'reservation_date', 'reservation_time'], name='reservation_status_slot_idx'),
+            models.Index(fields=['user', 'reservation_date', 'reservation_time'], name='reservation_user_slot_idx'),
+            models.Index(fields=['-created_at', '-id'], name='reservation_created_id_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='reservation_status_created_idx'),
+        ]
+
+
+class ReviewQuerySet(models.QuerySet):
+    def with_user(self):
+        """
+        Load the reviewer ReviewSerializer renders in the same query
+        """
+        return self.select_related('user')
 
 
 class Review(models.Model):
     """
     Model representing customer reviews linked to orders
     """
+    objects = ReviewQuerySet.as_manager()
+
     order = models.OneToOneField(OrderHistory, on_delete=models.CASCADE, related_name='review')
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='reviews')
     stars = models.PositiveIntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
@@ -105,3 +225,129 @@ class Review(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='review_created_id_idx'),
+            models.Index(fields=['stars', '-created_at', '-id'], name='review_stars_created_idx'),
+        ]
+
+
+class MenuItemRating(models.Model):
+    """
+    Materialized review summary for a menu item.
+
+    A review counts towards every dish on its order. Counters are adjusted in
+    place as reviews are written and deleted; rebuild_menu_ratings recomputes
+    them from scratch.
+    """
+    menu_item = models.OneToOneField(MenuItem, on_delete=models.CASCADE, primary_key=True, related_name='rating')
+    count = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Rating of {self.menu_item.food_name} ({self.count} reviews)"
+
+
+ROLLUP_GRANULARITIES = [
+    ('hour', 'Hour'),
+    ('day', 'Day'),
+]
+
+
+class OrderSalesRollup(models.Model):
+    """
+    Orders placed and their total amount per hour or day and order status
+    """
+    granularity = models.CharField(max_length=4, choices=ROLLUP_GRANULARITIES)
+    period_start = models.DateTimeField()
+    status = models.CharField(max_length=20)
+    order_count = models.IntegerField(default=0)
+    revenue = models.FloatField(default=0)
+
+    def __str__(self):
+        return f"{self.status} orders for the {self.granularity} starting {self.period_start}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['granularity', 'period_start', 'status'], name='order_sales_rollup_key'),
+        ]
+
+
+class MenuItemSalesRollup(models.Model):
+    """
+    Units sold and line revenue per hour or day, menu item and order status
+    """
+    granularity = models.CharField(max_length=4, choices=ROLLUP_GRANULARITIES)
+    period_start = models.DateTimeField()
+    menu_item = models.ForeignKey(MenuItem, on_delete=models.CASCADE, related_name='sales_rollups')
+    status = models.CharField(max_length=20)
+    quantity = models.IntegerField(default=0)
+    revenue = models.FloatField(default=0)
+
+    def __str__(self):
+        return f"{self.menu_item.food_name} ({self.status}) for the {self.granularity} starting {self.period_start}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['granularity', 'period_start', 'menu_item', 'status'], name='menu_item_sales_rollup_key'
+            ),
+        ]
+
+
+class StatusChangeQuerySet(models.QuerySet):
+    def after(self, user_id, last_event_id):
+        """
+        `user_id`'s changes after `last_event_id`, oldest first
+        """
+        return self.filter(user_id=user_id, id__gt=last_event_id).order_by('id')
+
+
+class StatusChange(models.Model):
+    """
+    Status transition of an order or reservation, kept briefly for the status stream
+    """
+    objects = StatusChangeQuerySet.as_manager()
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='status_changes')
+    kind = models.CharField(max_length=20, choices=[
+        ('order', 'Order'),
+        ('reservation', 'Reservation'),
+    ])
+    object_id = models.PositiveBigIntegerField()
+    previous_status = models.CharField(max_length=20)
+    status = models.CharField(max_length=20)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id} {self.previous_status} -> {self.status}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id'], name='status_change_user_id_idx'),
+        ]
+
+
+class IdempotencyKey(models.Model):
+    """
+    Model storing the outcome of a request made with an Idempotency-Key header
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    endpoint = models.CharField(max_length=100)
+    fingerprint = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(blank=True, null=True)
+    response_body = models.JSONField(encoder=DjangoJSONEncoder, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # When the request currently holding the key started running
+    started_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Idempotency key {self.key} for {self.user.username} on {self.endpoint}"
+
+    class Meta:
+        unique_together = ['user', 'endpoint', 'key']
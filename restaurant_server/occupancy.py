@@ -0,0 +1,185 @@
+"""
+In-memory occupancy index for table availability queries.
+
+Each loaded day keeps one bitmask per table where bit N means time slot N
+(RESERVATION_SLOT_MINUTES wide) is taken. Answering "which tables seat this
+party at this time" is then a handful of integer ANDs per day, and a whole
+date range is loaded with a single query. The index is updated in place when
+reservations or tables change and each day is reloaded after
+OCCUPANCY_INDEX_TTL seconds to pick up writes made by other processes; the
+table inventory is reloaded on the same schedule.
+"""
+import math
+import threading
+import time as time_module
+from datetime import date, time
+
+from django.conf import settings
+from .models import ACTIVE_RESERVATION_STATUSES
+
+
+def _to_date(value):
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _to_time(value):
+    return time.fromisoformat(value) if isinstance(value, str) else value
+
+
+def slots_per_day():
+    return 24 * 60 // settings.RESERVATION_SLOT_MINUTES
+
+
+def slot_mask(reservation_time):
+    """
+    Bitmask of the slots a reservation starting at `reservation_time` occupies
+    """
+    reservation_time = _to_time(reservation_time)
+    slot_minutes = settings.RESERVATION_SLOT_MINUTES
+    duration_minutes = settings.RESERVATION_DURATION.total_seconds() / 60
+    start = (reservation_time.hour * 60 + reservation_time.minute) // slot_minutes
+    end = min(start + max(1, math.ceil(duration_minutes / slot_minutes)), slots_per_day())
+    return ((1 << (end - start)) - 1) << start
+
+
+class _Day:
+    __slots__ = ('loaded_at', 'reservations', 'occupied')
+
+    def __init__(self):
+        self.loaded_at = time_module.monotonic()
+        # reservation id -> (table number, slot mask)
+        self.reservations = {}
+        # table number -> union of slot masks
+        self.occupied = {}
+
+    def add(self, reservation_id, table_number, mask):
+        self.reservations[reservation_id] = (table_number, mask)
+        self.occupied[table_number] = self.occupied.get(table_number, 0) | mask
+
+    def remove(self, reservation_id):
+        entry = self.reservations.pop(reservation_id, None)
+        if entry is None:
+            return
+        table_number = entry[0]
+        # Other reservations on the table may overlap, so rebuild its mask
+        mask = 0
+        for other_table, other_mask in self.reservations.values():
+            if other_table == table_number:
+                mask |= other_mask
+        if mask:
+            self.occupied[table_number] = mask
+        else:
+            self.occupied.pop(table_number, None)
+
+
+class OccupancyIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._days = {}
+        # reservation id -> date, so moved reservations can be found
+        self._locations = {}
+        self._tables = None
+        self._tables_loaded_at = None
+
+    def clear(self):
+        with self._lock:
+            self._days.clear()
+            self._locations.clear()
+            self._tables = None
+
+    def tables(self):
+        """
+        Active tables as (number, seats), smallest first
+
+        Reloaded after OCCUPANCY_INDEX_TTL seconds like the days, since table
+        edits made by another process only invalidate that process's copy.
+        """
+        from .models import Table
+
+        with self._lock:
+            now = time_module.monotonic()
+            if self._tables is None or now - self._tables_loaded_at > settings.OCCUPANCY_INDEX_TTL:
+                self._tables = list(
+                    Table.objects.filter(is_active=True).order_by('seats', 'number').values_list('number', 'seats')
+                )
+                self._tables_loaded_at = now
+            return self._tables
+
+    def invalidate_tables(self):
+        with self._lock:
+            self._tables = None
+
+    def _load_days(self, dates):
+        from .models import TableReservation
+
+        ttl = settings.OCCUPANCY_INDEX_TTL
+        now = time_module.monotonic()
+        missing = [d for d in dates if d not in self._days or now - self._days[d].loaded_at > ttl]
+        if not missing:
+            return
+
+        rows = TableReservation.objects.holding_tables(missing).values_list('id', 'reservation_date', 'reservation_time', 'table_number')
+
+        fresh = {d: _Day() for d in missing}
+        for reservation_id, reservation_date, reservation_time, table_number in rows:
+            fresh[reservation_date].add(reservation_id, table_number, slot_mask(reservation_time))
+
+        for d, day in fresh.items():
+            old = self._days.get(d)
+            if old is not None:
+                for reservation_id in old.reservations:
+                    self._locations.pop(reservation_id, None)
+            for reservation_id in day.reservations:
+                self._locations[reservation_id] = d
+            self._days[d] = day
+
+    def occupied_tables(self, reservation_date, reservation_time):
+        """
+        Table numbers already taken for a reservation at this date and time
+        """
+        reservation_date = _to_date(reservation_date)
+        mask = slot_mask(reservation_time)
+        with self._lock:
+            self._load_days([reservation_date])
+            occupied = self._days[reservation_date].occupied
+            return sorted(number for number, taken in occupied.items() if taken & mask)
+
+    def free_tables(self, dates, reservation_time, party_size=1):
+        """
+        Map each date to the active tables that seat `party_size` and are free
+        at `reservation_time`, smallest fitting table first
+        """
+        dates = [_to_date(d) for d in dates]
+        mask = slot_mask(reservation_time)
+        with self._lock:
+            candidates = [number for number, seats in self.tables() if seats >= party_size]
+            self._load_days(dates)
+            result = {}
+            for d in dates:
+                occupied = self._days[d].occupied
+                result[d] = [number for number in candidates if not occupied.get(number, 0) & mask]
+            return result
+
+    def update(self, reservation_id, reservation_date, reservation_time, table_number, status):
+        """
+        Apply the current state of one reservation to the index
+        """
+        with self._lock:
+            self.discard(reservation_id)
+            if status not in ACTIVE_RESERVATION_STATUSES or table_number is None:
+                return
+            reservation_date = _to_date(reservation_date)
+            day = self._days.get(reservation_date)
+            # Days that are not loaded will read the row from the database later
+            if day is not None:
+                day.add(reservation_id, table_number, slot_mask(reservation_time))
+                self._locations[reservation_id] = reservation_date
+
+    def discard(self, reservation_id):
+        with self._lock:
+            reservation_date = self._locations.pop(reservation_id, None)
+            if reservation_date is not None and reservation_date in self._days:
+                self._days[reservation_date].remove(reservation_id)
+
+
+occupancy_index = OccupancyIndex()
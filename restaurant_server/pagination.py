@@ -0,0 +1,111 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over a (field, id) pair.
+
+    Each page is a single indexed range query: the cursor carries the last
+    row's ordering value and id, so page N costs the same as page 1 and no
+    COUNT(*) is needed.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    # Ordering field and direction; ties are broken by id in the same direction
+    ordering = '-created_at'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def encode_cursor(self, instance):
+        # Pages may hold model instances or already serialized rows
+        field_name = self.ordering.lstrip('-')
+        if isinstance(instance, dict):
+            value, pk = instance[field_name], instance['id']
+        else:
+            value, pk = getattr(instance, field_name), instance.pk
+        payload = json.dumps([str(value), pk], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, queryset, cursor):
+        field = queryset.model._meta.get_field(self.ordering.lstrip('-'))
+        try:
+            raw_value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return field.to_python(raw_value), int(pk)
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_page_queryset(self, queryset, request):
+        """
+        Return the sliced queryset for the requested page without evaluating it
+        """
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        field_name = self.ordering.lstrip('-')
+        descending = self.ordering.startswith('-')
+
+        queryset = queryset.order_by(self.ordering, '-pk' if descending else 'pk')
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            value, pk = self.decode_cursor(queryset, cursor)
+            lookup = 'lt' if descending else 'gt'
+            # The leading range condition lets the database seek on the
+            # (field, id) index instead of expanding the OR into two scans.
+            queryset = queryset.filter(
+                Q(**{f'{field_name}__{lookup}e': value}),
+                Q(**{f'{field_name}__{lookup}': value}) | Q(**{f'pk__{lookup}': pk})
+            )
+
+        # Fetch one extra row to learn whether another page exists
+        return queryset[:self.page_size_value + 1]
+
+    def paginate_results(self, results):
+        """
+        Trim the rows fetched from get_page_queryset() down to one page
+        """
+        self.has_next = len(results) > self.page_size_value
+        self.page = results[:self.page_size_value]
+        return self.page
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.paginate_results(list(self.get_page_queryset(queryset, request)))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+        return url
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+
+class OrderHistoryPagination(KeysetPagination):
+    ordering = '-order_date'
+
+
+class ReviewCursorPagination(KeysetPagination):
+    page_size = 10
+    ordering = '-created_at'
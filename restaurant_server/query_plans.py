@@ -0,0 +1,144 @@
+"""
+Query plan regression checks for the hot endpoint querysets.
+
+Each entry is built with the same queryset helpers, pagination classes and
+fast serializers as the endpoint it stands for, on sample parameters.
+`check_query_plans` asks the database to EXPLAIN it and reports any plan
+that falls back to a full table scan or sorts rows in a temporary structure
+instead of reading an index in order.
+"""
+import datetime
+import re
+
+from django.db import connection
+from django.test import RequestFactory
+from rest_framework.request import Request
+from admin_app.analytics import DEFAULT_STATUSES, sales_dish_rows, sales_series_rows
+from admin_app.filters import filter_reservations, filter_reviews, filter_users, user_ordering
+from admin_app.kitchen import kitchen_order_rows
+from admin_app.pagination import AdminReservationPagination, AdminReviewPagination, AdminUserPagination
+from auth_app.models import User
+from auth_app.serializers import fast_user_serializer
+from .models import MenuItem, OrderHistory, Review, StatusChange, TableReservation
+from .pagination import OrderHistoryPagination, ReviewCursorPagination
+from .serializers import fast_menu_item_serializer, fast_reservation_serializer, fast_review_serializer
+from .status_stream import EVENT_BATCH_SIZE
+from .views import StandardResultsSetPagination
+
+SAMPLE_USER_ID = 1
+SAMPLE_DATE = datetime.date(2030, 1, 1)
+SAMPLE_PERIOD = datetime.datetime(2030, 1, 1, tzinfo=datetime.timezone.utc)
+SAMPLE_SALES_PERIOD = {
+    'period_start__gte': SAMPLE_PERIOD,
+    'period_start__lt': SAMPLE_PERIOD + datetime.timedelta(days=30),
+    'status__in': DEFAULT_STATUSES,
+}
+
+
+def _first_page(pagination_class, queryset, ordering=None, **params):
+    """
+    The queryset a keyset paginator runs for the first page of `queryset`
+    """
+    paginator = pagination_class()
+    if ordering:
+        paginator.ordering = ordering
+    return paginator.get_page_queryset(queryset, Request(RequestFactory().get('/', params)))
+
+
+def _admin_users(**params):
+    ordering = user_ordering(params)
+    users = filter_users(User.objects.all(), params)
+    return fast_user_serializer.values(_first_page(AdminUserPagination, users, ordering))
+
+
+def hot_querysets():
+    """
+    Return (name, queryset) pairs for the endpoints whose plans must stay indexed
+    """
+    page_size = StandardResultsSetPagination.page_size
+    return [
+        ('menu_list', fast_menu_item_serializer.values(MenuItem.objects.available())),
+        ('user_orders', OrderHistory.objects.filter(user_id=SAMPLE_USER_ID).with_details()),
+        ('user_orders_page', _first_page(
+            OrderHistoryPagination, OrderHistory.objects.filter(user_id=SAMPLE_USER_ID).with_details()
+        )),
+        ('user_reservations', TableReservation.objects.filter(user_id=SAMPLE_USER_ID)),
+        ('reviews_list', Review.objects.with_user()[:page_size]),
+        ('reviews_list_cursor', _first_page(ReviewCursorPagination, Review.objects.with_user())),
+        ('admin_pending_reservations', fast_reservation_serializer.values(TableReservation.objects.pending_queue())),
+        ('admin_reservations', fast_reservation_serializer.values(
+            _first_page(AdminReservationPagination, TableReservation.objects.all())
+        )),
+        ('admin_reservations_by_status', fast_reservation_serializer.values(_first_page(
+            AdminReservationPagination, filter_reservations(TableReservation.objects.all(), {'status': 'pending'})
+        ))),
+        ('admin_reviews_by_stars', fast_review_serializer.values(
+            _first_page(AdminReviewPagination, filter_reviews(Review.objects.all(), {'stars': '1'}))
+        )),
+        ('admin_users', _admin_users()),
+        ('admin_users_by_email_prefix', _admin_users(email='ad')),
+        ('sales_series', sales_series_rows('day', SAMPLE_SALES_PERIOD)),
+        ('sales_dishes', sales_dish_rows(SAMPLE_SALES_PERIOD)),
+        ('kitchen_queue', kitchen_order_rows(OrderHistory.objects.kitchen_queue())),
+        ('kitchen_queue_changes',
+         kitchen_order_rows(OrderHistory.objects.kitchen_queue().filter(updated_at__gte=SAMPLE_PERIOD))),
+        ('status_stream', StatusChange.objects.after(SAMPLE_USER_ID, 0)[:EVENT_BATCH_SIZE]),
+        ('occupancy_index', TableReservation.objects.holding_tables([SAMPLE_DATE])),
+    ]
+
+
+# Plan fragments that mean a hot path regressed, per database vendor
+_REGRESSIONS = {
+    # "SCAN table" without "USING [COVERING] INDEX" reads every row
+    'sqlite': [
+        (re.compile(r'\bSCAN (\w+)\b(?! USING)'), 'full table scan of {0}'),
+        (re.compile(r'USE TEMP B-TREE FOR (ORDER BY|RIGHT PART OF ORDER BY)'), 'sort without index'),
+    ],
+    'postgresql': [
+        (re.compile(r'Seq Scan on (\w+)'), 'full table scan of {0}'),
+        (re.compile(r'\bSort\b'), 'sort without index'),
+    ],
+    'mysql': [
+        (re.compile(r'type: ALL'), 'full table scan'),
+        (re.compile(r'Using filesort'), 'sort without index'),
+    ],
+}
+
+
+# Problems a hot queryset cannot avoid, by name
+_EXPECTED = {
+    # Ranking dishes by summed revenue sorts one row per dish; no index holds that order
+    'sales_dishes': {'sort without index'},
+}
+
+
+def explain(queryset):
+    """
+    Return the database's query plan for `queryset` as text
+    """
+    if connection.vendor == 'postgresql':
+        # Without statistics the planner prefers sequential scans on tiny tables
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+        try:
+            return queryset.explain()
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = on')
+    return queryset.explain()
+
+
+def check_query_plans(querysets=None):
+    """
+    Return {name: [problems]} for every hot queryset whose plan regressed
+    """
+    patterns = _REGRESSIONS.get(connection.vendor, [])
+    failures = {}
+    for name, queryset in querysets or hot_querysets():
+        plan = explain(queryset)
+        problems = [message.format(*match.groups()) for pattern, message in patterns
+                    for match in pattern.finditer(plan)]
+        problems = [problem for problem in problems if problem not in _EXPECTED.get(name, ())]
+        if problems:
+            failures[name] = problems
+    return failures
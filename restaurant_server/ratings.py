@@ -0,0 +1,127 @@
+"""
+Per-menu-item rating aggregates derived from order reviews
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F
+from .menu_cache import invalidate_menu_snapshot
+from .models import MenuItemRating, OrderItem, Review
+
+STAR_FIELDS = {stars: f'stars_{stars}' for stars in range(1, 6)}
+RATING_COLUMNS = ('count', 'total', *STAR_FIELDS.values())
+
+
+def rating_summary(count, total, *histogram):
+    """
+    Public representation of a rating row; missing rows read as no reviews
+    """
+    count = count or 0
+    histogram = histogram or (0,) * len(STAR_FIELDS)
+    return {
+        'count': count,
+        'average': round(total / count, 2) if count else None,
+        'histogram': {str(stars): value or 0 for stars, value in zip(STAR_FIELDS, histogram)},
+    }
+
+
+def order_menu_item_ids(order_id):
+    return list(OrderItem.objects.filter(order_id=order_id).values_list('menu_item_id', flat=True).distinct())
+
+
+def apply_review(menu_item_ids, stars, sign):
+    """
+    Add (sign=1) or remove (sign=-1) one review of `stars` on each menu item
+    """
+    if not menu_item_ids or stars not in STAR_FIELDS:
+        return
+    if sign > 0:
+        MenuItemRating.objects.bulk_create(
+            [MenuItemRating(menu_item_id=menu_item_id) for menu_item_id in menu_item_ids],
+            ignore_conflicts=True
+        )
+    star_field = STAR_FIELDS[stars]
+    MenuItemRating.objects.filter(menu_item_id__in=menu_item_ids).update(
+        count=F('count') + sign,
+        total=F('total') + sign * stars,
+        **{star_field: F(star_field) + sign}
+    )
+    # The menu payload embeds the ratings; bump again once the write is visible
+    invalidate_menu_snapshot()
+    transaction.on_commit(invalidate_menu_snapshot)
+
+
+def apply_reviews(dishes, sign):
+    """
+    Add (sign=1) or remove (sign=-1) one review per (menu_item_id, stars) in `dishes`, which may repeat
+    """
+    pending = Counter(dishes)
+    while pending:
+        by_stars = {}
+        for menu_item_id, stars in pending:
+            by_stars.setdefault(stars, []).append(menu_item_id)
+        for stars, menu_item_ids in by_stars.items():
+            apply_review(menu_item_ids, stars, sign)
+        pending -= Counter(pending.keys())
+
+
+def dish_changed(order_id, menu_item_id, sign):
+    """
+    Count (sign=1) or take off (sign=-1) the order's review on a dish after a
+    line of it was saved onto or moved off the order
+
+    Nothing changes while other lines keep the dish on the order.
+    """
+    stars = Review.objects.filter(order_id=order_id).values_list('stars', flat=True).first()
+    if stars is None:
+        return
+    lines = OrderItem.objects.filter(order_id=order_id, menu_item_id=menu_item_id).count()
+    if lines == (1 if sign > 0 else 0):
+        apply_review([menu_item_id], stars, sign)
+
+
+def remove_reviewed_lines(lines):
+    """
+    Take each order's review off the dishes that the OrderItem queryset `lines` removes from reviewed orders
+    """
+    dishes = set(
+        lines.filter(order__review__isnull=False)
+        .values_list('order_id', 'menu_item_id', 'order__review__stars')
+        .order_by()
+    )
+    if not dishes:
+        return
+    kept = set(
+        OrderItem.objects.filter(order_id__in={order_id for order_id, _, _ in dishes})
+        .exclude(pk__in=lines.values('pk'))
+        .values_list('order_id', 'menu_item_id')
+    )
+    apply_reviews([
+        (menu_item_id, stars) for order_id, menu_item_id, stars in dishes if (order_id, menu_item_id) not in kept
+    ], -1)
+
+
+def rebuild_menu_item_ratings():
+    """
+    Recompute every rating row from the reviews; returns the number of rated items
+    """
+    ratings = {}
+    reviewed_items = (
+        OrderItem.objects.filter(order__review__isnull=False)
+        .values_list('menu_item_id', 'order_id', 'order__review__stars')
+        .distinct()
+        .order_by()
+    )
+    for menu_item_id, _, stars in reviewed_items.iterator():
+        if stars not in STAR_FIELDS:
+            continue
+        rating = ratings.setdefault(menu_item_id, MenuItemRating(menu_item_id=menu_item_id))
+        rating.count += 1
+        rating.total += stars
+        setattr(rating, STAR_FIELDS[stars], getattr(rating, STAR_FIELDS[stars]) + 1)
+
+    with transaction.atomic():
+        MenuItemRating.objects.all().delete()
+        MenuItemRating.objects.bulk_create(ratings.values(), batch_size=500)
+    invalidate_menu_snapshot()
+    return len(ratings)
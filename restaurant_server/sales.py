@@ -0,0 +1,166 @@
+"""
+Hourly and daily sales rollups.
+
+Every order contributes to one OrderSalesRollup row and each of its lines to
+one MenuItemSalesRollup row per granularity, bucketed by the order date in
+the default time zone. Signals apply each change as an F() increment inside
+the writing transaction, so a dashboard reads O(periods) rows instead of
+scanning orders. rebuild_sales_rollups recomputes both tables from scratch.
+"""
+from django.db import transaction
+from django.db.models import Case, Count, ExpressionWrapper, F, FloatField, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+from .models import MenuItemSalesRollup, OrderHistory, OrderItem, OrderSalesRollup
+
+TRUNCATE = {'hour': TruncHour, 'day': TruncDay}
+LINE_FIELDS = ('menu_item_id', 'quantity', 'price_at_time')
+
+
+def period_starts(order_date):
+    """
+    Return {granularity: bucket start} for an order placed at `order_date`
+    """
+    hour = timezone.localtime(order_date).replace(minute=0, second=0, microsecond=0)
+    return {'hour': hour, 'day': hour.replace(hour=0)}
+
+
+def _periods(order_date):
+    """
+    Filter matching the hourly and the daily bucket of `order_date`
+    """
+    periods = Q()
+    for granularity, start in period_starts(order_date).items():
+        periods |= Q(granularity=granularity, period_start=start)
+    return periods
+
+
+def apply_order(order_date, status, total_amount, sign, count=1):
+    """
+    Add (sign=1) or remove (sign=-1) `count` orders totalling `total_amount` from the order rollups
+    """
+    OrderSalesRollup.objects.bulk_create([
+        OrderSalesRollup(granularity=granularity, period_start=start, status=status)
+        for granularity, start in period_starts(order_date).items()
+    ], ignore_conflicts=True)
+    OrderSalesRollup.objects.filter(_periods(order_date), status=status).update(
+        order_count=F('order_count') + sign * count,
+        revenue=F('revenue') + sign * total_amount
+    )
+
+
+def apply_order_lines(order_date, status, lines, sign):
+    """
+    Add (sign=1) or remove (sign=-1) (menu_item_id, quantity, price) lines from the menu item rollups
+
+    Two queries however many lines there are: one insert for missing buckets
+    and one update whose deltas are picked per menu item.
+    """
+    totals = {}
+    for menu_item_id, quantity, price in lines:
+        units, revenue = totals.get(menu_item_id, (0, 0.0))
+        totals[menu_item_id] = (units + quantity, revenue + quantity * price)
+    if not totals:
+        return
+
+    MenuItemSalesRollup.objects.bulk_create([
+        MenuItemSalesRollup(granularity=granularity, period_start=start, menu_item_id=menu_item_id, status=status)
+        for granularity, start in period_starts(order_date).items()
+        for menu_item_id in totals
+    ], ignore_conflicts=True)
+    quantity_delta = Case(
+        *[When(menu_item_id=menu_item_id, then=Value(sign * units)) for menu_item_id, (units, _) in totals.items()],
+        output_field=IntegerField()
+    )
+    revenue_delta = Case(
+        *[When(menu_item_id=menu_item_id, then=Value(sign * revenue)) for menu_item_id, (_, revenue) in totals.items()],
+        output_field=FloatField()
+    )
+    MenuItemSalesRollup.objects.filter(_periods(order_date), status=status, menu_item_id__in=totals).update(
+        quantity=F('quantity') + quantity_delta,
+        revenue=F('revenue') + revenue_delta
+    )
+
+
+def move_order(order, previous):
+    """
+    Move an order and its lines from the `previous` (order_date, status, total_amount) buckets
+    """
+    order_date, status, total_amount = previous
+    apply_order(order_date, status, total_amount, -1)
+    apply_order(order.order_date, order.status, order.total_amount, 1)
+    lines = list(order.orderitem_set.values_list(*LINE_FIELDS))
+    apply_order_lines(order_date, status, lines, -1)
+    apply_order_lines(order.order_date, order.status, lines, 1)
+
+
+def _hour_and_status(order_date, status):
+    # Orders in the same hour share both of their buckets
+    return period_starts(order_date)['hour'], status
+
+
+def remove_order_lines(lines):
+    """
+    Remove the OrderItem queryset `lines` from the menu item rollups
+
+    One read, then two writes per (hour, status) bucket the lines' orders fall in.
+    """
+    buckets = {}
+    for order_date, status, *line in lines.values_list('order__order_date', 'order__status', *LINE_FIELDS):
+        buckets.setdefault(_hour_and_status(order_date, status), []).append(line)
+    for (hour, status), bucket_lines in buckets.items():
+        apply_order_lines(hour, status, bucket_lines, -1)
+
+
+def remove_orders(orders):
+    """
+    Remove the OrderHistory queryset `orders` and all of their lines from the rollups
+    """
+    buckets = {}
+    for order_date, status, total_amount in orders.values_list('order_date', 'status', 'total_amount'):
+        key = _hour_and_status(order_date, status)
+        count, total = buckets.get(key, (0, 0.0))
+        buckets[key] = (count + 1, total + total_amount)
+    for (hour, status), (count, total) in buckets.items():
+        apply_order(hour, status, total, -1, count=count)
+    remove_order_lines(OrderItem.objects.filter(order__in=orders))
+
+
+def rebuild_sales_rollups():
+    """
+    Recompute both rollup tables from the orders; returns the number of rows written
+    """
+    line_revenue = ExpressionWrapper(F('quantity') * F('price_at_time'), output_field=FloatField())
+    order_rows, item_rows = [], []
+    for granularity, truncate in TRUNCATE.items():
+        orders = (
+            OrderHistory.objects.order_by()
+            .values('status', period=truncate('order_date'))
+            .annotate(order_count=Count('id'), total=Sum('total_amount'))
+        )
+        order_rows += [
+            OrderSalesRollup(
+                granularity=granularity, period_start=row['period'], status=row['status'],
+                order_count=row['order_count'], revenue=row['total']
+            )
+            for row in orders
+        ]
+        items = (
+            OrderItem.objects.order_by()
+            .values('menu_item_id', status=F('order__status'), period=truncate('order__order_date'))
+            .annotate(units=Sum('quantity'), total=Sum(line_revenue))
+        )
+        item_rows += [
+            MenuItemSalesRollup(
+                granularity=granularity, period_start=row['period'], menu_item_id=row['menu_item_id'],
+                status=row['status'], quantity=row['units'], revenue=row['total']
+            )
+            for row in items
+        ]
+
+    with transaction.atomic():
+        OrderSalesRollup.objects.all().delete()
+        MenuItemSalesRollup.objects.all().delete()
+        OrderSalesRollup.objects.bulk_create(order_rows, batch_size=500)
+        MenuItemSalesRollup.objects.bulk_create(item_rows, batch_size=500)
+    return len(order_rows) + len(item_rows)
@@ -0,0 +1,229 @@
+"""
+In-process inverted index for menu search.
+
+Menu item names and descriptions are tokenized into postings ranked with
+BM25, names weighted above descriptions. Each query token matches terms
+exactly, by prefix, or within a small edit distance, with candidates drawn
+from the sorted vocabulary and a trigram index so the work per query grows
+with the vocabulary touched, not the menu size.
+
+The index follows the menu snapshot version: when it changes, the index
+refetches only (id, updated_at) for every item and re-tokenizes just the
+items that were added or changed.
+"""
+import bisect
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+
+from .menu_cache import get_menu_version
+
+FIELD_WEIGHTS = {'food_name': 3.0, 'food_description': 1.0}
+
+# Score multipliers for how a query token matched an indexed term
+EXACT_WEIGHT = 1.0
+PREFIX_WEIGHT = 0.75
+FUZZY_WEIGHT = 0.5
+
+MAX_PREFIX_EXPANSIONS = 50
+MAX_FUZZY_CANDIDATES = 100
+MIN_FUZZY_LENGTH = 4
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """
+    Lowercase, accent-folded word tokens of `text`
+    """
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return TOKEN_RE.findall(text.lower())
+
+
+def trigrams(term):
+    padded = f'  {term} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def max_typos(term):
+    return 1 if len(term) < 8 else 2
+
+
+def edit_distance(a, b, limit):
+    """
+    Optimal string alignment distance, or limit + 1 once it must exceed `limit`
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class MenuSearchIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self._version = None
+        # term -> {item id: weighted term frequency}
+        self._postings = defaultdict(dict)
+        # item id -> (updated_at, is_available, Counter of weighted terms, length)
+        self._items = {}
+        self._trigrams = defaultdict(set)
+        self._sorted_terms = None
+        self._total_length = 0.0
+
+    # Maintenance
+
+    def _add(self, item_id, updated_at, is_available, fields):
+        terms = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(fields[field]):
+                terms[token] += weight
+        length = sum(terms.values())
+        for term, frequency in terms.items():
+            if term not in self._postings:
+                self._sorted_terms = None
+                for gram in trigrams(term):
+                    self._trigrams[gram].add(term)
+            self._postings[term][item_id] = frequency
+        self._items[item_id] = (updated_at, is_available, terms, length)
+        self._total_length += length
+
+    def _remove(self, item_id):
+        _, _, terms, length = self._items.pop(item_id)
+        self._total_length -= length
+        for term in terms:
+            postings = self._postings[term]
+            postings.pop(item_id, None)
+            if not postings:
+                del self._postings[term]
+                self._sorted_terms = None
+                for gram in trigrams(term):
+                    self._trigrams[gram].discard(term)
+
+    def refresh(self, force=False):
+        """
+        Bring the index up to the current menu version, re-tokenizing only changed items
+        """
+        from .models import MenuItem
+
+        version = get_menu_version()
+        if not force and version == self._version:
+            return
+        with self._lock:
+            if not force and version == self._version:
+                return
+            current = dict(MenuItem.objects.values_list('id', 'updated_at'))
+            for item_id in [item_id for item_id in self._items if item_id not in current]:
+                self._remove(item_id)
+            changed = [item_id for item_id, updated_at in current.items()
+                       if item_id not in self._items or self._items[item_id][0] != updated_at]
+            rows = MenuItem.objects.filter(id__in=changed).values(
+                'id', 'updated_at', 'is_available', *FIELD_WEIGHTS
+            ) if changed else []
+            for row in rows:
+                if row['id'] in self._items:
+                    self._remove(row['id'])
+                self._add(row['id'], row['updated_at'], row['is_available'], row)
+            self._version = version
+
+    # Querying
+
+    def _terms(self):
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._postings)
+        return self._sorted_terms
+
+    def _expansions(self, token, is_last):
+        """
+        Return {term: match weight} for the indexed terms `token` may refer to
+        """
+        matches = {}
+        if token in self._postings:
+            matches[token] = EXACT_WEIGHT
+        # Prefix matching is what makes search-as-you-type work on the last word
+        if is_last or token not in self._postings:
+            terms = self._terms()
+            start = bisect.bisect_left(terms, token)
+            for term in terms[start:start + MAX_PREFIX_EXPANSIONS + 1]:
+                if not term.startswith(token):
+                    break
+                matches.setdefault(term, PREFIX_WEIGHT)
+        if not matches and len(token) >= MIN_FUZZY_LENGTH:
+            limit = max_typos(token)
+            shared = Counter()
+            for gram in trigrams(token):
+                shared.update(self._trigrams.get(gram, ()))
+            for term, _ in shared.most_common(MAX_FUZZY_CANDIDATES):
+                distance = edit_distance(token, term, limit)
+                if distance <= limit:
+                    matches[term] = FUZZY_WEIGHT / distance
+        return matches
+
+    def search(self, query, limit=20, include_unavailable=False):
+        """
+        Return menu item ids matching `query`, best first
+
+        Items must match every query word; when none do, items matching any
+        word are ranked instead.
+        """
+        self.refresh()
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        with self._lock:
+            document_count = len(self._items)
+            if not document_count:
+                return []
+            average_length = self._total_length / document_count
+            per_token = []
+            for index, token in enumerate(tokens):
+                scores = {}
+                for term, weight in self._expansions(token, index == len(tokens) - 1).items():
+                    postings = self._postings[term]
+                    idf = math.log(1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for item_id, frequency in postings.items():
+                        length = self._items[item_id][3]
+                        score = weight * idf * frequency * (BM25_K1 + 1) / (
+                            frequency + BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                        )
+                        # Several expansions of one word count once, at their best
+                        if score > scores.get(item_id, 0):
+                            scores[item_id] = score
+                per_token.append(scores)
+
+            if not include_unavailable:
+                per_token = [
+                    {item_id: score for item_id, score in scores.items() if self._items[item_id][1]}
+                    for scores in per_token
+                ]
+            candidates = set.intersection(*(set(scores) for scores in per_token))
+            if not candidates:
+                candidates = set().union(*per_token)
+            ranked = sorted(
+                candidates,
+                key=lambda item_id: (-sum(scores.get(item_id, 0) for scores in per_token), item_id)
+            )
+        return ranked[:limit] if limit else ranked
+
+
+menu_search_index = MenuSearchIndex()
@@ -0,0 +1,99 @@
+"""
+Automatic table assignment for reservations
+"""
+import random
+import time as time_module
+
+from django.db import IntegrityError, OperationalError, transaction
+from .models import Table, TableReservation
+from .occupancy import ACTIVE_RESERVATION_STATUSES, slot_mask
+
+MAX_ATTEMPTS = 5
+
+
+class SeatingError(Exception):
+    """
+    Raised when no suitable table is free for a reservation
+    """
+
+
+def _pick_table(reservation, table_number=None, preferred_table=None):
+    """
+    Choose the smallest free table that seats the party, inside the caller's transaction
+
+    A table asked for by number only has to exist and be free: staff may seat
+    a large party at pushed-together tables.
+    """
+    tables = Table.objects.select_for_update().filter(is_active=True).order_by('seats', 'number')
+    if table_number is not None:
+        tables = tables.filter(number=table_number)
+    else:
+        tables = tables.filter(seats__gte=reservation.party_size)
+    candidates = list(tables.values_list('number', flat=True))
+
+    if table_number is not None and not candidates:
+        raise SeatingError(f'Table {table_number} does not exist')
+    if preferred_table in candidates:
+        candidates.remove(preferred_table)
+        candidates.insert(0, preferred_table)
+
+    occupied = {}
+    rows = TableReservation.objects.filter(
+        reservation_date=reservation.reservation_date,
+        status__in=ACTIVE_RESERVATION_STATUSES,
+        table_number__isnull=False
+    ).exclude(pk=reservation.pk).order_by().values_list('reservation_time', 'table_number')
+    for reservation_time, number in rows:
+        occupied[number] = occupied.get(number, 0) | slot_mask(reservation_time)
+
+    mask = slot_mask(reservation.reservation_time)
+    for number in candidates:
+        if not occupied.get(number, 0) & mask:
+            return number
+
+    if table_number is not None:
+        raise SeatingError(
+            f'Table {table_number} is already reserved for {reservation.reservation_date} '
+            f'at {reservation.reservation_time}'
+        )
+    raise SeatingError(
+        f'No table for {reservation.party_size} guests is free on {reservation.reservation_date} '
+        f'at {reservation.reservation_time}'
+    )
+
+
+def assign_table(reservation, table_number=None, status=None):
+    """
+    Seat `reservation` at the best-fit free table and optionally change its status.
+
+    The check and the write happen in one transaction that locks the candidate
+    tables (SELECT ... FOR UPDATE; on SQLite the IMMEDIATE transaction mode
+    serializes writers instead). Lock timeouts and unique-slot collisions from
+    a concurrent booking are retried with jittered backoff. Pass `table_number`
+    to require a specific table, whatever its size. Raises SeatingError if nothing fits or the
+    slot keeps colliding.
+    """
+    preferred_table = reservation.table_number
+    original_status = reservation.status
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                chosen = _pick_table(reservation, table_number, preferred_table)
+                reservation.table_number = chosen
+                update_fields = ['table_number']
+                if status is not None:
+                    reservation.status = status
+                    update_fields.append('status')
+                reservation.save(update_fields=update_fields)
+            return chosen
+        except (IntegrityError, OperationalError) as e:
+            reservation.table_number = preferred_table
+            reservation.status = original_status
+            if attempt == MAX_ATTEMPTS - 1:
+                if isinstance(e, IntegrityError):
+                    raise SeatingError(
+                        f'Could not reserve a table on {reservation.reservation_date} '
+                        f'at {reservation.reservation_time}, please try again'
+                    ) from e
+                raise
+            time_module.sleep(random.uniform(0, 0.05 * 2 ** attempt))
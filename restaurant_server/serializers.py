@@ -1,17 +1,53 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
-from .models import MenuItem, OrderHistory, OrderItem, TableReservation, Review
+from .models import MenuItem, MenuItemRating, OrderHistory, OrderItem, TableReservation, Review
+from auth_app.models import User
 from auth_app.serializers import UserSerializer
+from restaurant_backend.fast_serializers import ValuesSerializer
+from .checkout import CheckoutError, place_order
+from .ratings import RATING_COLUMNS, rating_summary
+
+
+def image_variant_urls(food_image_variants):
+    """
+    Resized copies of the image as {variant: {url, width, height}}; empty until generated
+    """
+    variants = (food_image_variants or {}).get('variants', {})
+    return {
+        name: {
+            'url': default_storage.url(variant['name']),
+            'width': variant['width'],
+            'height': variant['height'],
+        }
+        for name, variant in variants.items()
+    }
 
 
 class MenuItemSerializer(serializers.ModelSerializer):
     """
     Serializer for MenuItem model
     """
+    food_image_variants = serializers.SerializerMethodField()
+    rating = serializers.SerializerMethodField()
+
     class Meta:
         model = MenuItem
         fields = '__all__'
         read_only_fields = ('created_at', 'updated_at')
 
+    def get_food_image_variants(self, obj):
+        return image_variant_urls(obj.food_image_variants)
+
+    def get_rating(self, obj):
+        """
+        Review count, average and star histogram; select_related('rating') avoids a query per item
+        """
+        try:
+            rating = obj.rating
+        except MenuItemRating.DoesNotExist:
+            return rating_summary(0, 0)
+        return rating_summary(*(getattr(rating, column) for column in RATING_COLUMNS))
+
 
 class OrderItemSerializer(serializers.ModelSerializer):
     """
@@ -42,25 +78,10 @@ class OrderHistorySerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         items_data = validated_data.pop('items')
-        order = OrderHistory.objects.create(**validated_data)
-        
-        total_amount = 0
-        for item_data in items_data:
-            menu_item = MenuItem.objects.get(id=item_data['menu_item_id'])
-            quantity = item_data['quantity']
-            price_at_time = menu_item.food_price
-            
-            OrderItem.objects.create(
-                order=order,
-                menu_item=menu_item,
-                quantity=quantity,
-                price_at_time=price_at_time
-            )
-            total_amount += price_at_time * quantity
-        
-        order.total_amount = total_amount
-        order.save()
-        return order
+        try:
+            return place_order(items_data=items_data, **validated_data)
+        except CheckoutError as e:
+            raise serializers.ValidationError({'items': [str(e)]})
 
 
 class TableReservationSerializer(serializers.ModelSerializer):
@@ -115,3 +136,18 @@ class ReviewSerializer(serializers.ModelSerializer):
         order = OrderHistory.objects.get(id=order_id)
         review = Review.objects.create(order=order, **validated_data)
         return review
+
+
+# Fast list paths; restaurant_server.tests checks they render identically
+fast_menu_item_serializer = ValuesSerializer(MenuItemSerializer, computed={
+    'food_image_variants': (('food_image_variants',), image_variant_urls),
+    'rating': (tuple(f'rating__{column}' for column in RATING_COLUMNS), rating_summary),
+})
+
+fast_reservation_serializer = ValuesSerializer(TableReservationSerializer, computed={
+    'full_name': (('first_name', 'last_name', 'username'), User.compose_full_name),
+})
+
+fast_review_serializer = ValuesSerializer(ReviewSerializer, computed={
+    'full_name': (('first_name', 'last_name', 'username'), User.compose_full_name),
+})
@@ -0,0 +1,278 @@
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import MenuItem, OrderHistory, OrderItem, Review, Table, TableReservation
+from restaurant_backend.signals import first_of_deletion
+from restaurant_backend.tasks import run_in_background
+from .images import delete_variants, generate_menu_image_variants, variants_are_current
+from .menu_cache import invalidate_menu_snapshot
+from .occupancy import occupancy_index
+from .ratings import apply_review, dish_changed, order_menu_item_ids, remove_reviewed_lines
+from .sales import apply_order, apply_order_lines, move_order, remove_order_lines, remove_orders
+from .status_stream import record_status_change
+
+
+@receiver([post_save, post_delete], sender=MenuItem)
+def menu_item_changed(sender, **kwargs):
+    """
+    Invalidate the menu snapshot whenever a menu item is saved or deleted
+    """
+    invalidate_menu_snapshot()
+    # Bump again once the write is visible to other connections, so a snapshot
+    # built from pre-commit data in the meantime is discarded as well.
+    transaction.on_commit(invalidate_menu_snapshot)
+
+
+@receiver(post_save, sender=MenuItem)
+def menu_item_image_saved(sender, instance, **kwargs):
+    """
+    Queue derivative generation when a menu item's image is added or replaced
+    """
+    if variants_are_current(instance):
+        return
+    if instance.food_image:
+        run_in_background(generate_menu_image_variants, instance.pk)
+    else:
+        delete_variants(instance.food_image_variants)
+        MenuItem.objects.filter(pk=instance.pk).update(food_image_variants={})
+        instance.food_image_variants = {}
+
+
+@receiver(post_delete, sender=MenuItem)
+def menu_item_image_deleted(sender, instance, **kwargs):
+    """
+    Remove a deleted menu item's derivatives from storage once committed
+    """
+    variants_data = instance.food_image_variants
+    transaction.on_commit(lambda: delete_variants(variants_data))
+
+
+@receiver(pre_save, sender=TableReservation)
+def reservation_saving(sender, instance, update_fields=None, **kwargs):
+    """
+    Remember the stored status so post_save can report a transition
+    """
+    instance._previous_status = None
+    if instance.pk and (update_fields is None or 'status' in update_fields):
+        instance._previous_status = (
+            TableReservation.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=TableReservation)
+def reservation_status_changed(sender, instance, created, **kwargs):
+    """
+    Push a reservation's status transition to its owner
+    """
+    previous_status = getattr(instance, '_previous_status', None)
+    if not created and previous_status is not None and previous_status != instance.status:
+        record_status_change(instance.user_id, 'reservation', instance.id, previous_status, instance.status)
+
+
+@receiver(post_save, sender=TableReservation)
+def reservation_saved(sender, instance, **kwargs):
+    """
+    Apply reservation status, slot or table changes to the occupancy index once committed
+    """
+    state = (instance.id, instance.reservation_date, instance.reservation_time,
+             instance.table_number, instance.status)
+    transaction.on_commit(lambda: occupancy_index.update(*state))
+
+
+@receiver(post_delete, sender=TableReservation)
+def reservation_deleted(sender, instance, **kwargs):
+    """
+    Remove a deleted reservation from the occupancy index once committed
+    """
+    reservation_id = instance.id
+    transaction.on_commit(lambda: occupancy_index.discard(reservation_id))
+
+
+@receiver([post_save, post_delete], sender=Table)
+def table_changed(sender, **kwargs):
+    """
+    Reload the table inventory after a table is added, edited or removed
+    """
+    occupancy_index.invalidate_tables()
+    transaction.on_commit(occupancy_index.invalidate_tables)
+
+
+@receiver(pre_save, sender=Review)
+def review_saving(sender, instance, **kwargs):
+    """
+    Remember the stored order and star rating so post_save can move the review
+    """
+    instance._previous_review = (
+        Review.objects.filter(pk=instance.pk).values_list('order_id', 'stars').first() if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    """
+    Count a new, re-rated or reassigned review towards the ratings of the dishes on its order
+    """
+    previous = getattr(instance, '_previous_review', None)
+    if not created and previous == (instance.order_id, instance.stars):
+        return
+    menu_item_ids = order_menu_item_ids(instance.order_id)
+    if previous is not None:
+        previous_order_id, previous_stars = previous
+        if previous_order_id != instance.order_id:
+            apply_review(order_menu_item_ids(previous_order_id), previous_stars, -1)
+        else:
+            apply_review(menu_item_ids, previous_stars, -1)
+    apply_review(menu_item_ids, instance.stars, 1)
+
+
+@receiver(pre_delete, sender=Review)
+def review_deleting(sender, instance, **kwargs):
+    """
+    Remove a review from the dish ratings before a cascade can delete the order's items
+    """
+    apply_review(order_menu_item_ids(instance.order_id), instance.stars, -1)
+
+
+ORDER_ROLLUP_FIELDS = ('order_date', 'status', 'total_amount')
+ORDER_ITEM_ROLLUP_FIELDS = ('menu_item_id', 'quantity', 'price_at_time')
+
+
+@receiver(pre_save, sender=OrderHistory)
+def order_saving(sender, instance, **kwargs):
+    """
+    Remember the stored date, status and total so post_save can move the order's sales
+    """
+    instance._previous_sales = (
+        OrderHistory.objects.filter(pk=instance.pk).values_list(*ORDER_ROLLUP_FIELDS).first() if instance.pk else None
+    )
+    instance._previous_status = (
+        instance._previous_sales[ORDER_ROLLUP_FIELDS.index('status')] if instance._previous_sales else None
+    )
+
+
+@receiver(post_save, sender=OrderHistory)
+def order_status_changed(sender, instance, created, **kwargs):
+    """
+    Push an order's status transition to its owner
+    """
+    previous_status = getattr(instance, '_previous_status', None)
+    if not created and previous_status is not None and previous_status != instance.status:
+        record_status_change(instance.user_id, 'order', instance.id, previous_status, instance.status)
+
+
+@receiver(post_save, sender=OrderHistory)
+def order_saved(sender, instance, created, **kwargs):
+    """
+    Count a new order in the sales rollups, or move it when its status, date or total changes
+    """
+    previous = getattr(instance, '_previous_sales', None)
+    if created or previous is None:
+        apply_order(instance.order_date, instance.status, instance.total_amount, 1)
+    elif previous != tuple(getattr(instance, field) for field in ORDER_ROLLUP_FIELDS):
+        move_order(instance, previous)
+
+
+def is_queryset_of(origin, model):
+    return isinstance(origin, QuerySet) and origin.model is model
+
+
+@receiver(pre_delete, sender=OrderHistory)
+def order_deleting(sender, instance, origin=None, **kwargs):
+    """
+    Remove deleted orders and their lines from the sales rollups
+
+    A queryset delete is removed as a whole on its first order; the lines'
+    own handler leaves lines cascading from an order to this one.
+    """
+    if is_queryset_of(origin, OrderHistory):
+        if first_of_deletion(origin, 'sales'):
+            remove_orders(origin)
+        return
+    apply_order(instance.order_date, instance.status, instance.total_amount, -1)
+    remove_order_lines(OrderItem.objects.filter(order_id=instance.pk))
+
+
+def touch_orders(**lookups):
+    # Line item edits show up in the kitchen queue's incremental updates
+    OrderHistory.objects.filter(**lookups).update(updated_at=timezone.now())
+
+
+@receiver(pre_save, sender=OrderItem)
+def order_item_saving(sender, instance, **kwargs):
+    previous = (
+        OrderItem.objects.filter(pk=instance.pk).values_list('order_id', *ORDER_ITEM_ROLLUP_FIELDS).first()
+        if instance.pk else None
+    )
+    instance._previous_dish = previous[:2] if previous else None
+    instance._previous_sales = previous[1:] if previous else None
+
+
+@receiver(post_save, sender=OrderItem)
+def order_item_saved(sender, instance, created, **kwargs):
+    """
+    Count a new or edited order line in the menu item sales rollups
+    """
+    previous = getattr(instance, '_previous_sales', None)
+    current = tuple(getattr(instance, field) for field in ORDER_ITEM_ROLLUP_FIELDS)
+    if previous == current:
+        return
+    order_date, status = OrderHistory.objects.values_list('order_date', 'status').get(pk=instance.order_id)
+    touch_orders(pk=instance.order_id)
+    if previous is not None:
+        apply_order_lines(order_date, status, [previous], -1)
+    apply_order_lines(order_date, status, [current], 1)
+
+
+@receiver(post_save, sender=OrderItem)
+def order_item_rated(sender, instance, **kwargs):
+    """
+    Count a reviewed order's rating on a dish a line adds, and take it off a dish the line left
+    """
+    previous = getattr(instance, '_previous_dish', None)
+    current = (instance.order_id, instance.menu_item_id)
+    if previous == current:
+        return
+    if previous is not None:
+        dish_changed(*previous, -1)
+    dish_changed(*current, 1)
+
+
+def lines_being_deleted(instance, origin, handler):
+    """
+    The OrderItem queryset `handler` has to account for in a pre_delete of `instance`, or None
+
+    Only deletes started on order lines count: lines cascading from an order
+    are accounted for with the order, and those of a deleted menu item go
+    with its own rollup and rating rows. A queryset delete is handled as a
+    whole on its first line.
+    """
+    if isinstance(origin, OrderItem):
+        return OrderItem.objects.filter(pk=instance.pk)
+    if is_queryset_of(origin, OrderItem) and first_of_deletion(origin, handler):
+        return origin
+    return None
+
+
+@receiver(pre_delete, sender=OrderItem)
+def order_item_deleting(sender, instance, origin=None, **kwargs):
+    """
+    Remove deleted order lines from the menu item sales rollups while their orders still exist
+    """
+    lines = lines_being_deleted(instance, origin, 'sales')
+    if lines is not None:
+        touch_orders(pk__in=lines.values('order_id'))
+        remove_order_lines(lines)
+    elif isinstance(origin, MenuItem) and first_of_deletion(origin, 'sales'):
+        touch_orders(orderitem__menu_item=origin)
+
+
+@receiver(pre_delete, sender=OrderItem)
+def order_item_unrating(sender, instance, origin=None, **kwargs):
+    """
+    Take reviews off the dishes that deleted lines remove from their orders
+    """
+    lines = lines_being_deleted(instance, origin, 'ratings')
+    if lines is not None:
+        remove_reviewed_lines(lines)
@@ -0,0 +1,163 @@
+"""
+Order and reservation status changes pushed to their owners.
+
+Status transitions are written to StatusChange inside the transaction that
+makes them. Once it commits, the in-process broker wakes the streams of that
+user, which read their new rows by (user, id) and send them as server-sent
+events. Streams held by other worker processes see the row on their next
+STATUS_STREAM_POLL_INTERVAL check, which doubles as the keep-alive. Event
+ids are StatusChange ids, so a client reconnecting with Last-Event-ID picks
+up exactly where it left off.
+"""
+import asyncio
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.utils import timezone
+from .models import StatusChange
+
+EVENT_BATCH_SIZE = 100
+# Keeps stream tokens from being accepted as any other signed value
+STREAM_TOKEN_SALT = 'restaurant_server.status_stream'
+# Seconds between deletions of expired changes in each process
+PRUNE_INTERVAL = 60 * 60
+
+
+def make_stream_token(user):
+    """
+    Signed token that lets `user` open the status stream for STATUS_STREAM_TOKEN_MAX_AGE seconds
+    """
+    return signing.TimestampSigner(salt=STREAM_TOKEN_SALT).sign(str(user.pk))
+
+
+def stream_token_user_id(token):
+    """
+    The user id carried by a valid, unexpired stream token, or None
+    """
+    try:
+        value = signing.TimestampSigner(salt=STREAM_TOKEN_SALT).unsign(
+            token, max_age=settings.STATUS_STREAM_TOKEN_MAX_AGE
+        )
+        return int(value)
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+class StatusBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # user id -> {(event loop, asyncio.Event)}
+        self._subscribers = {}
+
+    @contextmanager
+    def subscribe(self, user_id):
+        """
+        Yield an asyncio.Event that is set whenever `user_id` has new status changes
+        """
+        subscriber = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscriber)
+        try:
+            yield subscriber[1]
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(user_id, set())
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    self._subscribers.pop(user_id, None)
+
+    def publish(self, user_id):
+        """
+        Wake the streams of `user_id`; safe to call from any thread
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for loop, event in subscribers:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # The stream's loop has closed; its subscription is going away
+                pass
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+status_broker = StatusBroker()
+
+_last_prune = None
+
+
+def prune_status_changes(force=False):
+    """
+    Delete changes older than STATUS_CHANGE_RETENTION, at most every PRUNE_INTERVAL
+    """
+    global _last_prune
+    now = time.monotonic()
+    if not force and _last_prune is not None and now - _last_prune < PRUNE_INTERVAL:
+        return
+    _last_prune = now
+    StatusChange.objects.filter(created_at__lt=timezone.now() - settings.STATUS_CHANGE_RETENTION).delete()
+
+
+def record_status_change(user_id, kind, object_id, previous_status, status):
+    """
+    Log a transition and wake the user's streams once it commits
+    """
+    StatusChange.objects.create(
+        user_id=user_id, kind=kind, object_id=object_id, previous_status=previous_status, status=status
+    )
+    transaction.on_commit(lambda: status_broker.publish(user_id))
+    prune_status_changes()
+
+
+def status_event(change):
+    data = {
+        'type': change.kind,
+        'id': change.object_id,
+        'previous_status': change.previous_status,
+        'status': change.status,
+        'changed_at': change.created_at.isoformat(),
+    }
+    return f'id: {change.id}\nevent: status\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+
+
+async def alatest_change_id(user_id):
+    return await StatusChange.objects.filter(user_id=user_id).order_by('-id').values_list('id', flat=True).afirst() or 0
+
+
+async def status_events(user_id, last_event_id):
+    """
+    Yield server-sent events for `user_id` after `last_event_id` until STATUS_STREAM_TIMEOUT
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.STATUS_STREAM_TIMEOUT
+    # Clients reconnect after the timeout with Last-Event-ID; ask them to do so promptly
+    yield f'retry: {settings.STATUS_STREAM_RETRY_MS}\n\n'
+    with status_broker.subscribe(user_id) as wakeup:
+        while True:
+            # Cleared before reading so a publish during the read is not lost
+            wakeup.clear()
+            changes = [
+                change async for change in
+                StatusChange.objects.after(user_id, last_event_id)[:EVENT_BATCH_SIZE]
+            ]
+            for change in changes:
+                last_event_id = change.id
+                yield status_event(change)
+            if len(changes) == EVENT_BATCH_SIZE:
+                continue
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(wakeup.wait(), min(settings.STATUS_STREAM_POLL_INTERVAL, remaining))
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
@@ -1,3 +1,1005 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time, timedelta
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from django.utils import timezone
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from auth_app.models import User
+from restaurant_backend.benchmarks import SCENARIOS, compare_results, run_benchmark, seed_dataset, throttles_disabled
+from auth_app.serializers import UserSerializer, fast_user_serializer
+from .models import (
+    IdempotencyKey, MenuItem, MenuItemRating, OrderHistory, OrderItem, Review, StatusChange, Table, TableReservation,
+)
+from .menu_cache import MENU_SNAPSHOT_KEY, get_menu_version
+from .occupancy import occupancy_index
+from .pagination import ReviewCursorPagination
+from .query_plans import check_query_plans, hot_querysets
+from .ratings import rebuild_menu_item_ratings
+from .search import edit_distance, menu_search_index
+from .seating import SeatingError, assign_table
+from .status_stream import make_stream_token, status_broker
+from .serializers import (
+    MenuItemSerializer, ReviewSerializer, TableReservationSerializer,
+    fast_menu_item_serializer, fast_reservation_serializer, fast_review_serializer,
+)
 
-# Create your tests here.
+
+class MenuListCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.pizza = MenuItem.objects.create(
+            food_name='Pepperoni', food_description='Classic', food_price=12.5
+        )
+        MenuItem.objects.create(
+            food_name='Salad', food_description='Fresh', food_price=7.0, is_available=False
+        )
+
+    def test_menu_lists_available_items_with_etag(self):
+        response = self.client.get('/api/menu/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ETag', response)
+        self.assertEqual([item['food_name'] for item in response.json()], ['Pepperoni'])
+
+    def test_cached_menu_costs_no_queries(self):
+        self.client.get('/api/menu/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/menu/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_none_match_returns_not_modified(self):
+        etag = self.client.get('/api/menu/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/menu/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_saving_menu_item_changes_etag(self):
+        etag = self.client.get('/api/menu/')['ETag']
+        self.pizza.food_price = 13.0
+        self.pizza.save()
+
+        response = self.client.get('/api/menu/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()[0]['food_price'], 13.0)
+
+    def test_deleting_menu_item_rebuilds_snapshot(self):
+        self.client.get('/api/menu/')
+        self.pizza.delete()
+        self.assertEqual(self.client.get('/api/menu/').json(), [])
+
+    def test_superseded_snapshots_are_deleted(self):
+        self.client.get('/api/menu/')
+        first = get_menu_version()
+        for price in (13.0, 14.0, 15.0):
+            self.pizza.food_price = price
+            self.pizza.save()
+            self.client.get('/api/menu/')
+        self.assertIsNone(cache.get(MENU_SNAPSHOT_KEY.format(version=first)))
+        snapshots = [version for version in range(first, get_menu_version() + 1)
+                     if cache.get(MENU_SNAPSHOT_KEY.format(version=version)) is not None]
+        self.assertEqual(snapshots, [get_menu_version()])
+
+
+class UserOrdersTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='regular', email='regular@example.com', password='testpassword123'
+        )
+        self.client.force_authenticate(self.user)
+        self.menu_items = [
+            MenuItem.objects.create(food_name=f'Dish {i}', food_description='Tasty', food_price=5.0 + i)
+            for i in range(3)
+        ]
+
+    def place_orders(self, count, lines):
+        for _ in range(count):
+            order = OrderHistory.objects.create(user=self.user, total_amount=10.0)
+            for menu_item in self.menu_items[:lines]:
+                OrderItem.objects.create(
+                    order=order, menu_item=menu_item, quantity=1, price_at_time=menu_item.food_price
+                )
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_query_count_is_constant(self):
+        self.place_orders(1, 1)
+        baseline = self.count_queries('/api/orders/')
+        paged_baseline = self.count_queries('/api/orders/?page_size=5')
+
+        self.place_orders(25, 3)
+        self.assertEqual(self.count_queries('/api/orders/'), baseline)
+        self.assertEqual(self.count_queries('/api/orders/?page_size=5'), paged_baseline)
+
+    def test_keyset_pagination_walks_all_orders(self):
+        self.place_orders(7, 2)
+        expected = list(OrderHistory.objects.filter(user=self.user).order_by('-order_date', '-id').values_list('id', flat=True))
+
+        seen = []
+        url = '/api/orders/?page_size=3'
+        while url:
+            data = self.client.get(url).json()
+            self.assertLessEqual(len(data['results']), 3)
+            seen.extend(order['id'] for order in data['results'])
+            url = data['next']
+
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor_returns_not_found(self):
+        response = self.client.get('/api/orders/?cursor=garbage')
+        self.assertEqual(response.status_code, 404)
+
+
+class CheckoutTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='diner', email='diner@example.com', password='testpassword123'
+        )
+        self.client.force_authenticate(self.user)
+        self.pizza = MenuItem.objects.create(food_name='Pizza', food_description='Cheesy', food_price=10.0)
+        self.pasta = MenuItem.objects.create(food_name='Pasta', food_description='Creamy', food_price=8.5)
+        self.soup = MenuItem.objects.create(
+            food_name='Soup', food_description='Hot', food_price=4.0, is_available=False
+        )
+
+    def test_checkout_creates_order_and_lines(self):
+        response = self.client.post('/api/checkout/', {
+            'items': [
+                {'menu_item_id': self.pizza.id, 'quantity': 2},
+                {'menu_item_id': self.pasta.id, 'quantity': 1},
+            ],
+            'special_instructions': 'Extra spicy please'
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        order = response.json()['order']
+        self.assertEqual(order['status'], 'delivered')
+        self.assertEqual(order['total_amount'], 28.5)
+        self.assertEqual(len(order['order_items']), 2)
+
+    def test_checkout_query_count_does_not_grow_with_cart(self):
+        items = [{'menu_item_id': self.pizza.id, 'quantity': 1}]
+        with CaptureQueriesContext(connection) as small:
+            self.client.post('/api/checkout/', {'items': items}, format='json')
+        with CaptureQueriesContext(connection) as large:
+            self.client.post('/api/checkout/', {'items': items * 10}, format='json')
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_checkout_rejects_unavailable_item_without_writing(self):
+        response = self.client.post('/api/checkout/', {
+            'items': [
+                {'menu_item_id': self.pizza.id, 'quantity': 1},
+                {'menu_item_id': self.soup.id, 'quantity': 1},
+            ]
+        }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(OrderHistory.objects.exists())
+        self.assertFalse(OrderItem.objects.exists())
+
+    def test_checkout_rejects_unknown_item(self):
+        response = self.client.post('/api/checkout/', {
+            'items': [{'menu_item_id': 999, 'quantity': 1}]
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Menu item with id 999 not found')
+
+    def test_create_order_uses_checkout_engine(self):
+        response = self.client.post('/api/order/', {
+            'items': [{'menu_item_id': self.pasta.id, 'quantity': 2}]
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['order']['total_amount'], 17.0)
+        self.assertEqual(OrderItem.objects.get().price_at_time, 8.5)
+
+    def test_create_order_rejects_unavailable_item(self):
+        response = self.client.post('/api/order/', {
+            'items': [{'menu_item_id': self.soup.id, 'quantity': 1}]
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('items', response.json())
+
+
+class IdempotencyKeyTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='mobile', email='mobile@example.com', password='testpassword123'
+        )
+        self.client.force_authenticate(self.user)
+        self.pizza = MenuItem.objects.create(food_name='Pizza', food_description='Cheesy', food_price=10.0)
+        self.payload = {'items': [{'menu_item_id': self.pizza.id, 'quantity': 1}]}
+
+    def checkout(self, key, payload=None):
+        return self.client.post(
+            '/api/checkout/', payload or self.payload, format='json', HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_retry_replays_stored_response(self):
+        first = self.checkout('abc-123')
+        with self.assertNumQueries(1):
+            second = self.checkout('abc-123')
+
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(OrderHistory.objects.count(), 1)
+
+    def test_reused_key_with_different_body_is_rejected(self):
+        self.checkout('abc-123')
+        response = self.checkout('abc-123', {'items': [{'menu_item_id': self.pizza.id, 'quantity': 3}]})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(OrderHistory.objects.count(), 1)
+
+    def test_keys_are_scoped_per_endpoint(self):
+        self.checkout('abc-123')
+        response = self.client.post('/api/order/', self.payload, format='json', HTTP_IDEMPOTENCY_KEY='abc-123')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(OrderHistory.objects.count(), 2)
+
+    def test_expired_key_runs_request_again(self):
+        self.checkout('abc-123')
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+
+        response = self.checkout('abc-123')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(OrderHistory.objects.count(), 2)
+
+    def test_in_flight_key_is_refused_until_its_lease_runs_out(self):
+        # Leave the key claimed but without an outcome, as a request still running would
+        self.checkout('abc-123')
+        IdempotencyKey.objects.update(response_status=None, response_body=None)
+        OrderHistory.objects.all().delete()
+        response = self.checkout('abc-123')
+        self.assertEqual(response.status_code, 409)
+
+        # The worker that claimed the key died before recording an outcome
+        IdempotencyKey.objects.update(started_at=timezone.now() - timedelta(minutes=5))
+        response = self.checkout('abc-123')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(OrderHistory.objects.count(), 1)
+        self.assertEqual(self.checkout('abc-123')['Idempotent-Replayed'], 'true')
+
+    def test_requests_without_key_are_not_stored(self):
+        self.client.post('/api/checkout/', self.payload, format='json')
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+class ReviewsFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='critic', email='critic@example.com', password='testpassword123'
+        )
+        orders = OrderHistory.objects.bulk_create([
+            OrderHistory(user=cls.user, total_amount=10.0) for _ in range(2000)
+        ])
+        Review.objects.bulk_create([
+            Review(order=order, user=cls.user, stars=1 + i % 5, description='Good')
+            for i, order in enumerate(orders)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def cursor_for(self, position):
+        review = Review.objects.order_by('-created_at', '-id')[position]
+        return ReviewCursorPagination().encode_cursor(review)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, context.captured_queries
+
+    def test_cursor_mode_walks_feed_in_order(self):
+        response, _ = self.count_queries('/api/reviews/?cursor=&page_size=3')
+        first = response.json()
+        self.assertEqual(len(first['results']), 3)
+
+        second = self.client.get(first['next']).json()
+        expected = list(Review.objects.order_by('-created_at', '-id').values_list('id', flat=True)[:6])
+        self.assertEqual([r['id'] for r in first['results'] + second['results']], expected)
+
+    def test_first_and_deep_page_cost_the_same(self):
+        _, first_queries = self.count_queries('/api/reviews/?cursor=&page_size=2')
+        response, deep_queries = self.count_queries(f'/api/reviews/?cursor={self.cursor_for(1997)}&page_size=2')
+
+        self.assertEqual(len(response.json()['results']), 2)
+        self.assertEqual(len(first_queries), len(deep_queries))
+        self.assertFalse(any('COUNT(' in query['sql'] for query in deep_queries))
+
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + deep_queries[0]['sql'])
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('review_created_id_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_page_number_mode_is_unchanged(self):
+        data = self.client.get('/api/reviews/?page=2').json()
+        self.assertEqual(data['count'], 2000)
+        self.assertEqual(len(data['results']), 10)
+
+
+class ReservationSeatingTests(TestCase):
+    def setUp(self):
+        occupancy_index.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='guest', email='guest@example.com', password='testpassword123'
+        )
+        self.client.force_authenticate(self.user)
+        Table.objects.all().delete()
+        Table.objects.bulk_create([
+            Table(number=1, seats=2), Table(number=2, seats=4), Table(number=3, seats=6),
+        ])
+
+    def book(self, party_size, reservation_time='18:00:00'):
+        return self.client.post('/api/reservation/', {
+            'reservation_date': '2030-01-01',
+            'reservation_time': reservation_time,
+            'party_size': party_size,
+        }, format='json')
+
+    def test_reservation_gets_best_fit_table(self):
+        response = self.book(3)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['reservation']['table_number'], 2)
+
+    def test_overlapping_bookings_do_not_share_a_table(self):
+        self.assertEqual(self.book(2).json()['reservation']['table_number'], 1)
+        self.assertEqual(self.book(2, '19:00:00').json()['reservation']['table_number'], 2)
+        self.assertEqual(self.book(2, '20:00:00').json()['reservation']['table_number'], 1)
+
+    def test_full_slot_leaves_reservation_unassigned(self):
+        self.book(6)
+        response = self.book(5)
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNone(response.json()['reservation']['table_number'])
+
+    def test_cancelled_booking_frees_its_table(self):
+        TableReservation.objects.create(
+            user=self.user, reservation_date=date(2030, 1, 1), reservation_time=time(18),
+            party_size=2, table_number=1, status='cancelled'
+        )
+        response = self.book(2)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['reservation']['table_number'], 1)
+
+    def test_repeated_slot_collisions_raise_seating_error(self):
+        TableReservation.objects.create(
+            user=self.user, reservation_date=date(2030, 1, 1), reservation_time=time(18),
+            party_size=2, table_number=1, status='confirmed'
+        )
+        reservation = TableReservation.objects.create(
+            user=self.user, reservation_date=date(2030, 1, 1), reservation_time=time(18), party_size=2
+        )
+        # A stale view of the slot keeps picking the taken table
+        with mock.patch('restaurant_server.seating._pick_table', return_value=1), \
+                mock.patch('restaurant_server.seating.time_module.sleep'):
+            with self.assertRaises(SeatingError):
+                assign_table(reservation)
+        reservation.refresh_from_db()
+        self.assertIsNone(reservation.table_number)
+
+
+class ConcurrentSeatingTests(TransactionTestCase):
+    def setUp(self):
+        occupancy_index.clear()
+        self.users = [
+            User.objects.create_user(username=f'guest{i}', email=f'guest{i}@example.com', password='x')
+            for i in range(8)
+        ]
+        Table.objects.all().delete()
+        Table.objects.bulk_create([Table(number=number, seats=4) for number in range(1, 5)])
+
+    def test_parallel_bookings_never_double_book(self):
+        reservations = [
+            TableReservation.objects.create(
+                user=user, reservation_date=date(2030, 1, 1), reservation_time=time(18), party_size=2
+            )
+            for user in self.users
+        ]
+
+        def seat(reservation):
+            try:
+                return assign_table(reservation)
+            except SeatingError:
+                return None
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=len(reservations)) as executor:
+            assigned = list(executor.map(seat, reservations))
+
+        seated = [number for number in assigned if number is not None]
+        self.assertEqual(sorted(seated), [1, 2, 3, 4])
+        self.assertEqual(
+            sorted(TableReservation.objects.exclude(table_number=None).values_list('table_number', flat=True)),
+            [1, 2, 3, 4]
+        )
+
+
+class QueryPlanTests(TestCase):
+    def test_hot_paths_use_indexes(self):
+        self.assertEqual(check_query_plans(), {})
+
+    def test_unindexed_query_is_reported(self):
+        failures = check_query_plans([('unindexed', Review.objects.filter(description='Good').order_by())])
+        self.assertIn('unindexed', failures)
+
+    def test_hot_querysets_match_the_endpoints(self):
+        cache.clear()
+        admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='testpassword123', is_staff=True
+        )
+        client = APIClient()
+        client.force_authenticate(admin)
+        hot = dict(hot_querysets())
+        for name, url in [
+            ('menu_list', '/api/menu/'),
+            ('admin_pending_reservations', '/api/admin/reservations/pending/'),
+            ('admin_reviews_by_stars', '/api/admin/reviews/?stars=1&page_size=50'),
+            ('admin_users_by_email_prefix', '/api/admin/users/?email=ad&page_size=50'),
+        ]:
+            with CaptureQueriesContext(connection) as hot_queries:
+                list(hot[name])
+            with CaptureQueriesContext(connection) as endpoint_queries:
+                self.assertEqual(client.get(url).status_code, 200)
+            self.assertIn(
+                hot_queries.captured_queries[0]['sql'], [query['sql'] for query in endpoint_queries.captured_queries], name
+            )
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class MenuImageVariantTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def upload(self, name='pizza.jpg', size=(2000, 1500)):
+        buffer = io.BytesIO()
+        Image.new('RGB', size, (200, 40, 40)).save(buffer, format='JPEG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+    def test_variants_are_generated_and_serialized(self):
+        MenuItem.objects.create(
+            food_name='Pizza', food_description='Cheesy', food_price=10.0, food_image=self.upload()
+        )
+        variants = APIClient().get('/api/menu/').json()[0]['food_image_variants']
+
+        self.assertEqual(set(variants), {'thumb', 'card', 'hero'})
+        self.assertEqual((variants['card']['width'], variants['card']['height']), (480, 360))
+        self.assertTrue(variants['hero']['url'].startswith('/media/menu_images/variants/'))
+        self.assertTrue(variants['thumb']['url'].endswith('.webp'))
+
+    def test_small_images_are_not_upscaled(self):
+        menu_item = MenuItem.objects.create(
+            food_name='Salad', food_description='Fresh', food_price=7.0, food_image=self.upload(size=(300, 200))
+        )
+        menu_item.refresh_from_db()
+        self.assertEqual(menu_item.food_image_variants['variants']['hero']['width'], 300)
+
+    def test_replacing_image_regenerates_variants(self):
+        menu_item = MenuItem.objects.create(
+            food_name='Pizza', food_description='Cheesy', food_price=10.0, food_image=self.upload()
+        )
+        menu_item.refresh_from_db()
+        old_name = menu_item.food_image_variants['variants']['thumb']['name']
+
+        menu_item.food_image = self.upload('pizza-new.jpg', size=(800, 800))
+        menu_item.save()
+        menu_item.refresh_from_db()
+
+        self.assertEqual(menu_item.food_image_variants['source'], menu_item.food_image.name)
+        self.assertEqual(menu_item.food_image_variants['variants']['card']['height'], 480)
+        self.assertFalse(default_storage.exists(old_name))
+
+    def test_item_without_image_has_no_variants(self):
+        MenuItem.objects.create(food_name='Soup', food_description='Hot', food_price=4.0)
+        self.assertEqual(APIClient().get('/api/menu/').json()[0]['food_image_variants'], {})
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.name = default_storage.save('menu_images/pizza.jpg', ContentFile(b'0123456789' * 10))
+
+    def get(self, path=None, **headers):
+        response = self.client.get(f'/media/{path or self.name}', **headers)
+        if hasattr(response, 'streaming_content'):
+            response.body = b''.join(response.streaming_content)
+        return response
+
+    def test_uploaded_names_are_content_hashed_and_immutable(self):
+        self.assertRegex(self.name, r'^menu_images/pizza\.[0-9a-f]{12}\.jpg$')
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.body, b'0123456789' * 10)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_conditional_requests_return_not_modified(self):
+        response = self.get()
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.get(HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+
+    def test_byte_ranges(self):
+        response = self.get(HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.body, b'0123456789')
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/100')
+
+        response = self.get(HTTP_RANGE='bytes=-5')
+        self.assertEqual(response.body, b'56789')
+
+        response = self.get(HTTP_RANGE='bytes=500-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_stale_if_range_returns_full_file(self):
+        response = self.get(HTTP_RANGE='bytes=0-4', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_accel_redirect_hands_off_delivery(self):
+        with override_settings(MEDIA_ACCEL_REDIRECT_PREFIX='/protected-media/'):
+            response = self.get()
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.name}')
+
+    def test_path_traversal_is_rejected(self):
+        self.assertEqual(self.get('../settings.py').status_code, 404)
+        self.assertEqual(self.get('menu_images/missing.jpg').status_code, 404)
+
+    async def test_asgi_streams_from_an_async_iterator(self):
+        for headers, status_code, body in (({}, 200, b'0123456789' * 10), ({'Range': 'bytes=10-19'}, 206, b'0123456789')):
+            response = await self.async_client.get(f'/media/{self.name}', headers=headers)
+            self.assertEqual(response.status_code, status_code)
+            self.assertTrue(response.is_async)
+            self.assertEqual(b''.join([chunk async for chunk in response.streaming_content]), body)
+            self.assertEqual(response['Content-Length'], str(len(body)))
+
+
+class AsyncReadPathTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='critic', email='critic@example.com', password='testpassword123')
+        for i in range(12):
+            order = OrderHistory.objects.create(user=user, total_amount=10.0)
+            Review.objects.create(order=order, user=user, stars=1 + i % 5, description='Good')
+        MenuItem.objects.create(food_name='Pizza', food_description='Cheesy', food_price=10.0)
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_async_endpoints_match_sync_payloads(self):
+        requests = [(path, {}) for path in (
+            '/api/menu/', '/api/reviews/', '/api/reviews/?page=2', '/api/reviews/?page=last',
+            '/api/reviews/?cursor=&page_size=5',
+        )] + [('/api/reviews/', {'Authorization': 'Bearer not-a-token'})]
+        for path, headers in requests:
+            sync_response = await sync_to_async(self.client.get)(path, headers=headers)
+            async_response = await self.async_client.get(path, headers=headers)
+            self.assertEqual(async_response.status_code, sync_response.status_code, path)
+            self.assertEqual(async_response.content, sync_response.content, path)
+            self.assertEqual(async_response.get('WWW-Authenticate'), sync_response.get('WWW-Authenticate'), path)
+        self.assertEqual(async_response.status_code, 401)
+
+    async def test_async_menu_honours_etag(self):
+        etag = (await self.async_client.get('/api/menu/'))['ETag']
+        response = await self.async_client.get('/api/menu/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_async_reviews_rejects_invalid_page(self):
+        response = await self.async_client.get('/api/reviews/?page=99')
+        self.assertEqual(response.status_code, 404)
+
+    def test_asgi_requests_resolve_to_async_views(self):
+        from restaurant_server import async_views
+        self.assertIs(resolve('/api/menu/', urlconf=settings.ASGI_ROOT_URLCONF).func, async_views.menu_list)
+
+
+class FastSerializerParityTests(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username='both', email='both@example.com', password='pw', first_name='Ada', last_name='Lovelace'),
+            User.objects.create_user(username='first', email='first@example.com', password='pw', first_name='Grace'),
+            User.objects.create_user(username='last', email='last@example.com', password='pw', last_name='Hopper'),
+            User.objects.create_user(username='none', email='none@example.com', password='pw', is_staff=True),
+        ]
+        MenuItem.objects.create(food_name='Soup', food_description='Hot', food_price=4.5)
+        MenuItem.objects.create(
+            food_name='Cake', food_description='Sweet', food_price=6, is_available=False,
+            food_image='menu_images/cake.jpg',
+            food_image_variants={'source': 'menu_images/cake.jpg', 'variants': {
+                'thumb': {'name': 'menu_images/variants/cake-thumb.webp', 'width': 160, 'height': 120},
+            }},
+        )
+        for i, user in enumerate(self.users):
+            TableReservation.objects.create(
+                user=user, reservation_date=date(2030, 1, 1 + i), reservation_time=time(18, 30),
+                party_size=2, table_number=i + 1 if i % 2 else None,
+                special_requests='Window' if i % 2 else None,
+            )
+
+    def assertRendersIdentically(self, fast, serializer_class, queryset):
+        expected = JSONRenderer().render(serializer_class(queryset, many=True).data)
+        self.assertEqual(JSONRenderer().render(fast.serialize(queryset)), expected)
+
+    def test_menu_items(self):
+        MenuItemRating.objects.create(menu_item=MenuItem.objects.first(), count=2, total=7, stars_3=1, stars_4=1)
+        self.assertRendersIdentically(fast_menu_item_serializer, MenuItemSerializer, MenuItem.objects.all())
+
+    def test_users(self):
+        self.assertRendersIdentically(fast_user_serializer, UserSerializer, User.objects.all())
+
+    def test_reservations(self):
+        self.assertRendersIdentically(
+            fast_reservation_serializer, TableReservationSerializer, TableReservation.objects.order_by('-created_at')
+        )
+
+    def test_reviews(self):
+        for user in self.users[:2]:
+            order = OrderHistory.objects.create(user=user, total_amount=10)
+            Review.objects.create(order=order, user=user, stars=4, description='Good')
+        self.assertRendersIdentically(fast_review_serializer, ReviewSerializer, Review.objects.all())
+
+    def test_active_timezone_is_respected(self):
+        with timezone.override('Asia/Kolkata'):
+            self.assertRendersIdentically(
+                fast_reservation_serializer, TableReservationSerializer, TableReservation.objects.all()
+            )
+
+    def test_single_query(self):
+        with self.assertNumQueries(1):
+            fast_reservation_serializer.serialize(TableReservation.objects.all())
+
+
+class MenuSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        menu_search_index.clear()
+        self.client = APIClient()
+        self.margherita = MenuItem.objects.create(
+            food_name='Margherita Pizza', food_description='Tomato, mozzarella and basil', food_price=9.0
+        )
+        self.pepperoni = MenuItem.objects.create(
+            food_name='Pepperoni Pizza', food_description='Spicy pepperoni with mozzarella', food_price=11.0
+        )
+        self.salad = MenuItem.objects.create(
+            food_name='Caprese Salad', food_description='Tomato and mozzarella with pizza bread', food_price=7.0
+        )
+        self.creme = MenuItem.objects.create(
+            food_name='Crème Brûlée', food_description='Vanilla custard', food_price=6.0
+        )
+
+    def search(self, q, **params):
+        response = self.client.get('/api/menu/search/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [item['food_name'] for item in response.json()['results']]
+
+    def test_name_matches_rank_above_description_matches(self):
+        self.assertEqual(self.search('pizza')[-1], 'Caprese Salad')
+
+    def test_all_words_must_match(self):
+        self.assertEqual(self.search('spicy pizza'), ['Pepperoni Pizza'])
+
+    def test_prefix_and_typo_matching(self):
+        self.assertEqual(self.search('pepp'), ['Pepperoni Pizza'])
+        self.assertEqual(self.search('margarita'), ['Margherita Pizza'])
+        self.assertEqual(self.search('mozarela tomatto'), ['Margherita Pizza', 'Caprese Salad'])
+        self.assertEqual(self.search('creme brulee'), ['Crème Brûlée'])
+
+    def test_index_follows_menu_writes(self):
+        self.assertEqual(self.search('salad'), ['Caprese Salad'])
+        self.salad.is_available = False
+        self.salad.save()
+        self.assertEqual(self.search('salad'), [])
+        self.pepperoni.food_name = 'Diavola Pizza'
+        self.pepperoni.save()
+        self.margherita.delete()
+        self.assertEqual(self.search('pizza'), ['Diavola Pizza'])
+
+    def test_refresh_only_reloads_changed_items(self):
+        menu_search_index.refresh()
+        MenuItem.objects.create(food_name='Tiramisu', food_description='Coffee', food_price=6.0)
+        # One query for (id, updated_at) and one for the new item's text
+        with self.assertNumQueries(2):
+            menu_search_index.refresh()
+
+    def test_limit_and_validation(self):
+        self.assertEqual(len(self.search('mozzarella', limit=1)), 1)
+        self.assertEqual(self.client.get('/api/menu/search/').status_code, 400)
+        self.assertEqual(self.client.get('/api/menu/search/', {'q': 'pizza', 'limit': 'x'}).status_code, 400)
+
+    def test_edit_distance_counts_transpositions_once(self):
+        self.assertEqual(edit_distance('pizza', 'pzizal', 2), 2)
+        self.assertEqual(edit_distance('basil', 'basli', 1), 1)
+        self.assertEqual(edit_distance('basil', 'tomato', 2), 3)
+
+
+class MenuItemRatingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='diner', email='diner@example.com', password='testpassword123')
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='testpassword123', is_staff=True
+        )
+        self.pizza = MenuItem.objects.create(food_name='Pizza', food_description='Cheesy', food_price=10.0)
+        self.salad = MenuItem.objects.create(food_name='Salad', food_description='Green', food_price=6.0)
+
+    def order(self, *items):
+        order = OrderHistory.objects.create(user=self.user, total_amount=20.0)
+        for item in items:
+            OrderItem.objects.create(order=order, menu_item=item, quantity=1, price_at_time=item.food_price)
+        return order
+
+    def review(self, order, stars):
+        self.client.force_authenticate(self.user)
+        response = self.client.post('/api/review/', {'order_id': order.id, 'stars': stars, 'description': 'ok'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        return Review.objects.get(order=order)
+
+    def rating(self, item):
+        return next(i['rating'] for i in self.client.get('/api/menu/').json() if i['id'] == item.id)
+
+    def test_reviews_update_dish_ratings(self):
+        self.assertEqual(self.rating(self.pizza), {
+            'count': 0, 'average': None, 'histogram': {'1': 0, '2': 0, '3': 0, '4': 0, '5': 0},
+        })
+        # A dish ordered twice on one order still gets the review once
+        self.review(self.order(self.pizza, self.pizza, self.salad), 5)
+        self.review(self.order(self.pizza), 2)
+        self.assertEqual(self.rating(self.pizza), {
+            'count': 2, 'average': 3.5, 'histogram': {'1': 0, '2': 1, '3': 0, '4': 0, '5': 1},
+        })
+        self.assertEqual(self.rating(self.salad)['count'], 1)
+
+    def test_deleting_and_editing_reviews(self):
+        first = self.review(self.order(self.pizza, self.salad), 5)
+        second = self.review(self.order(self.pizza), 1)
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.delete(f'/api/admin/review/{first.id}/').status_code, 200)
+        second.stars = 4
+        second.save()
+        self.assertEqual(self.rating(self.pizza), {
+            'count': 1, 'average': 4.0, 'histogram': {'1': 0, '2': 0, '3': 0, '4': 1, '5': 0},
+        })
+        self.assertEqual(self.rating(self.salad)['count'], 0)
+        # Cascading from the order removes the review as well
+        second.order.delete()
+        self.assertEqual(self.rating(self.pizza)['count'], 0)
+
+    def test_line_changes_on_reviewed_orders_move_ratings(self):
+        order = self.order(self.pizza)
+        self.review(order, 5)
+        salad = OrderItem.objects.create(order=order, menu_item=self.salad, quantity=1, price_at_time=6.0)
+        second_pizza = OrderItem.objects.create(order=order, menu_item=self.pizza, quantity=2, price_at_time=10.0)
+        self.assertEqual(self.rating(self.salad)['count'], 1)
+        self.assertEqual(self.rating(self.pizza)['count'], 1)
+
+        # The other pizza line keeps the dish on the order
+        second_pizza.delete()
+        self.assertEqual(self.rating(self.pizza)['count'], 1)
+        other = self.order()
+        self.review(other, 2)
+        salad.order = other
+        salad.save()
+        self.assertEqual(self.rating(self.salad), {
+            'count': 1, 'average': 2.0, 'histogram': {'1': 0, '2': 1, '3': 0, '4': 0, '5': 0},
+        })
+        OrderItem.objects.filter(order=order).delete()
+        self.assertEqual(self.rating(self.pizza)['count'], 0)
+        incremental = list(MenuItemRating.objects.order_by('pk').values())
+        rebuild_menu_item_ratings()
+        self.assertEqual(list(MenuItemRating.objects.filter(count__gt=0).order_by('pk').values()),
+                         [rating for rating in incremental if rating['count']])
+
+    def test_moving_a_review_to_another_order(self):
+        review = self.review(self.order(self.pizza), 4)
+        review.order = self.order(self.salad)
+        review.save()
+        self.assertEqual(self.rating(self.pizza)['count'], 0)
+        self.assertEqual(self.rating(self.salad), {
+            'count': 1, 'average': 4.0, 'histogram': {'1': 0, '2': 0, '3': 0, '4': 1, '5': 0},
+        })
+
+    def test_rebuild_matches_incremental_counters(self):
+        self.review(self.order(self.pizza, self.salad), 3)
+        self.review(self.order(self.salad), 4)
+        incremental = list(MenuItemRating.objects.order_by('pk').values())
+        MenuItemRating.objects.update(count=99)
+        self.assertEqual(rebuild_menu_item_ratings(), 2)
+        self.assertEqual(list(MenuItemRating.objects.order_by('pk').values()), incremental)
+
+    def test_order_history_renders_ratings_without_extra_queries(self):
+        self.review(self.order(self.pizza, self.salad), 5)
+        self.client.force_authenticate(self.user)
+        self.client.get('/api/orders/')
+        self.order(self.pizza)
+        # Orders, then items joined with their dishes and ratings
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/orders/')
+        self.assertEqual(response.json()[1]['order_items'][0]['menu_item']['rating']['count'], 1)
+
+
+class StatusStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='diner', email='diner@example.com', password='testpassword123')
+        cls.other = User.objects.create_user(username='other', email='other@example.com', password='testpassword123')
+        cls.order = OrderHistory.objects.create(user=cls.user, total_amount=10.0)
+        cls.reservation = TableReservation.objects.create(
+            user=cls.user, reservation_date=date(2030, 1, 1), reservation_time=time(18), party_size=2
+        )
+
+    def headers(self, user=None):
+        return {'Authorization': f'Bearer {RefreshToken.for_user(user or self.user).access_token}'}
+
+    def set_status(self, instance, new_status):
+        with self.captureOnCommitCallbacks(execute=True):
+            instance.status = new_status
+            instance.save()
+
+    def events(self, body):
+        return [
+            json.loads(line[len('data: '):])
+            for line in body.decode().splitlines() if line.startswith('data: ')
+        ]
+
+    def test_only_status_transitions_are_recorded(self):
+        self.order.total_amount = 12.0
+        self.order.save()
+        self.set_status(self.order, 'preparing')
+        self.set_status(self.reservation, 'confirmed')
+        OrderHistory.objects.create(user=self.user, total_amount=5.0)
+        self.assertEqual(
+            list(StatusChange.objects.order_by('id').values_list('kind', 'previous_status', 'status')),
+            [('order', 'pending', 'preparing'), ('reservation', 'pending', 'confirmed')]
+        )
+
+    def test_admin_approval_is_recorded(self):
+        Table.objects.create(number=901, seats=4)
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(
+            username='admin', email='admin@example.com', password='testpassword123', is_staff=True
+        ))
+        response = client.post(f'/api/admin/reservations/{self.reservation.id}/approve/')
+        self.assertEqual(response.status_code, 200)
+        change = StatusChange.objects.get()
+        self.assertEqual((change.user_id, change.object_id, change.status), (self.user.id, self.reservation.id, 'confirmed'))
+
+    @override_settings(STATUS_STREAM_TIMEOUT=0)
+    async def test_stream_replays_after_last_event_id(self):
+        await sync_to_async(self.set_status)(self.order, 'preparing')
+        await sync_to_async(self.set_status)(self.order, 'ready')
+        other_order = await OrderHistory.objects.acreate(user=self.other, total_amount=1.0)
+        await sync_to_async(self.set_status)(other_order, 'cancelled')
+        first = await StatusChange.objects.order_by('id').afirst()
+
+        response = await self.async_client.get(
+            '/api/status/stream/', headers={**self.headers(), 'Last-Event-ID': str(first.id - 1)}
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(
+            [(event['type'], event['id'], event['status']) for event in self.events(body)],
+            [('order', self.order.id, 'preparing'), ('order', self.order.id, 'ready')]
+        )
+        self.assertIn(f'id: {first.id}\n'.encode(), body)
+        self.assertEqual(status_broker.subscriber_count(), 0)
+
+    @override_settings(STATUS_STREAM_TIMEOUT=5, STATUS_STREAM_POLL_INTERVAL=60)
+    async def test_stream_pushes_committed_changes(self):
+        await sync_to_async(self.set_status)(self.order, 'preparing')
+        response = await self.async_client.get('/api/status/stream/', headers=self.headers())
+        chunks = aiter(response.streaming_content)
+        self.assertTrue((await anext(chunks)).startswith(b'retry:'))
+
+        # Changes from before connecting without Last-Event-ID are not replayed
+        pending_chunk = asyncio.ensure_future(anext(chunks))
+        await asyncio.sleep(0.1)
+        self.assertFalse(pending_chunk.done())
+        await sync_to_async(self.set_status)(self.reservation, 'confirmed')
+        [event] = self.events(await asyncio.wait_for(pending_chunk, 2))
+        self.assertEqual(
+            (event['type'], event['id'], event['previous_status'], event['status']),
+            ('reservation', self.reservation.id, 'pending', 'confirmed')
+        )
+        await chunks.aclose()
+
+    async def test_stream_requires_authentication(self):
+        response = await self.async_client.get('/api/status/stream/')
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get(
+            '/api/status/stream/', headers={**self.headers(), 'Last-Event-ID': 'latest'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(STATUS_STREAM_TIMEOUT=0)
+    async def test_stream_accepts_a_stream_token(self):
+        response = await self.async_client.post('/api/status/stream/token/', headers=self.headers())
+        self.assertEqual(response.status_code, 200)
+        token = response.json()['token']
+        response = await self.async_client.get('/api/status/stream/', {'token': token})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        b''.join([chunk async for chunk in response.streaming_content])
+
+    async def test_stream_rejects_other_tokens(self):
+        access = str(RefreshToken.for_user(self.user).access_token)
+        for token in ('not-a-token', access, f'{self.user.pk}:forged'):
+            response = await self.async_client.get('/api/status/stream/', {'token': token})
+            self.assertEqual(response.status_code, 401, token)
+        token = make_stream_token(self.user)
+        with override_settings(STATUS_STREAM_TOKEN_MAX_AGE=-1):
+            response = await self.async_client.get('/api/status/stream/', {'token': token})
+        self.assertEqual(response.status_code, 401)
+
+
+class BenchmarkSuiteTests(TestCase):
+    def result(self, p95_ms, queries=2, errors=0):
+        return {'p95_ms': p95_ms, 'queries': queries, 'errors': errors}
+
+    def test_every_scenario_request_succeeds(self):
+        dataset = seed_dataset(customers=5, menu_items=10, orders_per_user=2)
+        client = APIClient()
+        with throttles_disabled():
+            for name, spec in SCENARIOS.items():
+                [(method, path, data, headers)] = spec['calls'](dataset, 1)
+                response = client.generic(
+                    method, path, json.dumps(data) if data is not None else '',
+                    content_type='application/json', headers=headers
+                )
+                self.assertIn(response.status_code, spec['expect'], f'{name}: {response.content[:200]}')
+
+    def test_every_route_has_a_scenario(self):
+        dataset = seed_dataset(customers=1, menu_items=5, orders_per_user=1)
+        self.assertEqual(run_benchmark(dataset, [], 1, 1)['uncovered_routes'], [])
+
+    def test_compare_results_flags_regressions(self):
+        baseline = {'endpoints': {
+            'slower': self.result(10.0), 'noise': self.result(0.5), 'more_queries': self.result(10.0),
+            'failing': self.result(10.0), 'steady': self.result(10.0),
+        }}
+        results = {'endpoints': {
+            'slower': self.result(13.0), 'noise': self.result(0.9), 'more_queries': self.result(10.0, queries=3),
+            'failing': self.result(10.0, errors=2), 'steady': self.result(11.0), 'new': self.result(5.0),
+        }}
+        comparison = compare_results(results, baseline, tolerance=0.2)
+        self.assertEqual(
+            {name for name, entry in comparison.items() if entry['regressed']}, {'slower', 'more_queries', 'failing'}
+        )
+        self.assertFalse(comparison['new']['baseline'])
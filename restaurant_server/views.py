@@ -3,11 +3,20 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
 from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags
+from .checkout import CheckoutError, place_order
+from .idempotency import idempotent
+from .menu_cache import get_menu_snapshot
+from .search import menu_search_index
+from .seating import SeatingError, assign_table
+from .status_stream import make_stream_token
+from .pagination import OrderHistoryPagination, ReviewCursorPagination
 from .models import MenuItem, OrderHistory, TableReservation, Review
 from .serializers import (
-    MenuItemSerializer, OrderHistorySerializer,
-    TableReservationSerializer, ReviewSerializer
+    OrderHistorySerializer, TableReservationSerializer, ReviewSerializer, fast_menu_item_serializer
 )
 
 
@@ -17,15 +26,70 @@ class StandardResultsSetPagination(PageNumberPagination):
     max_page_size = 100
 
 
+def menu_snapshot_response(request, snapshot):
+    """
+    Build the menu response from a snapshot, honouring If-None-Match
+    """
+    etag = snapshot['etag']
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        if '*' in etags or etag in etags:
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+
+    response = HttpResponse(snapshot['content'], content_type='application/json', status=status.HTTP_200_OK)
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def menu_list(request):
     """
     Get all available menu items
+
+    Served from a cached snapshot; clients sending a matching If-None-Match
+    header get a 304 without the payload.
     """
-    menu_items = MenuItem.objects.filter(is_available=True)
-    serializer = MenuItemSerializer(menu_items, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return menu_snapshot_response(request, get_menu_snapshot())
+
+
+MAX_SEARCH_RESULTS = 50
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def menu_search(request):
+    """
+    Search available menu items by name and description
+
+    Results are ranked best first; the last word matches as a prefix and
+    words with a typo or two still match.
+    """
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({
+            'error': 'Search query parameter q is required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        limit = min(max(int(request.query_params.get('limit', 20)), 1), MAX_SEARCH_RESULTS)
+    except ValueError:
+        return Response({
+            'error': 'limit must be an integer'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    item_ids = menu_search_index.search(query[:200], limit=limit)
+    rows = fast_menu_item_serializer.serialize(MenuItem.objects.filter(id__in=item_ids))
+    items = {item['id']: item for item in rows}
+    return Response({
+        'query': query,
+        'results': [items[item_id] for item_id in item_ids if item_id in items],
+    }, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
@@ -36,7 +100,14 @@ def create_reservation(request):
     """
     serializer = TableReservationSerializer(data=request.data)
     if serializer.is_valid():
-        serializer.save(user=request.user)
+        reservation = serializer.save(user=request.user)
+
+        # Seat the party straight away; if nothing fits, an admin assigns a table on approval
+        try:
+            assign_table(reservation)
+        except SeatingError:
+            pass
+
         return Response({
             'message': 'Reservation created successfully',
             'reservation': serializer.data
@@ -58,6 +129,7 @@ def user_reservations(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def create_order(request):
     """
     Create a new order
@@ -78,8 +150,17 @@ def create_order(request):
 def user_orders(request):
     """
     Get user's order history
+
+    Pass `page_size` and/or `cursor` to page through the history newest first.
     """
-    orders = OrderHistory.objects.filter(user=request.user)
+    orders = OrderHistory.objects.filter(user=request.user).with_details()
+
+    paginator = OrderHistoryPagination()
+    if paginator.cursor_query_param in request.query_params or paginator.page_size_query_param in request.query_params:
+        result_page = paginator.paginate_queryset(orders, request)
+        serializer = OrderHistorySerializer(result_page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
     serializer = OrderHistorySerializer(orders, many=True)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -106,8 +187,18 @@ def create_review(request):
 def reviews_list(request):
     """
     Get all reviews (public endpoint)
+
+    Pass `cursor` (empty for the first page) to use keyset pagination, which
+    skips the COUNT(*) and costs the same on every page.
     """
-    reviews = Review.objects.all()
+    reviews = Review.objects.with_user()
+
+    if ReviewCursorPagination.cursor_query_param in request.query_params:
+        paginator = ReviewCursorPagination()
+        result_page = paginator.paginate_queryset(reviews, request)
+        serializer = ReviewSerializer(result_page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
     paginator = StandardResultsSetPagination()
     result_page = paginator.paginate_queryset(reviews, request)
     serializer = ReviewSerializer(result_page, many=True)
@@ -116,55 +207,27 @@ def reviews_list(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def checkout_cart(request):
     """
     Checkout cart items and create order with 'delivered' status
     """
-    from .models import OrderItem
-
     # Get items from request
     items_data = request.data.get('items', [])
     special_instructions = request.data.get('special_instructions', '')
 
-    if not items_data:
+    try:
+        order = place_order(
+            user=request.user,
+            items_data=items_data,
+            status='delivered',
+            special_instructions=special_instructions
+        )
+    except CheckoutError as e:
         return Response({
-            'error': 'No items provided for checkout'
+            'error': str(e)
         }, status=status.HTTP_400_BAD_REQUEST)
 
-    # Calculate total amount
-    total_amount = 0
-    for item_data in items_data:
-        try:
-            menu_item = MenuItem.objects.get(id=item_data['menu_item_id'])
-            quantity = item_data['quantity']
-            total_amount += menu_item.food_price * quantity
-        except MenuItem.DoesNotExist:
-            return Response({
-                'error': f"Menu item with id {item_data['menu_item_id']} not found"
-            }, status=status.HTTP_400_BAD_REQUEST)
-        except KeyError:
-            return Response({
-                'error': 'Invalid item data format'
-            }, status=status.HTTP_400_BAD_REQUEST)
-
-    # Create order with calculated total and delivered status
-    order = OrderHistory.objects.create(
-        user=request.user,
-        total_amount=total_amount,
-        status='delivered',
-        special_instructions=special_instructions
-    )
-
-    # Create order items
-    for item_data in items_data:
-        menu_item = MenuItem.objects.get(id=item_data['menu_item_id'])
-        OrderItem.objects.create(
-            order=order,
-            menu_item=menu_item,
-            quantity=item_data['quantity'],
-            price_at_time=menu_item.food_price
-        )
-
     return Response({
         'message': 'Order placed and delivered successfully',
         'order': OrderHistorySerializer(order).data
@@ -207,3 +270,18 @@ def update_user_profile(request):
         'user': UserSerializer(user).data
     }, status=status.HTTP_200_OK)
 
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def status_stream_token(request):
+    """
+    Issue a short-lived token for opening the status stream
+
+    Browsers' EventSource cannot send an Authorization header, so the stream
+    also accepts this token as its `token` query parameter.
+    """
+    return Response({
+        'token': make_stream_token(request.user),
+        'expires_in': settings.STATUS_STREAM_TOKEN_MAX_AGE,
+    }, status=status.HTTP_200_OK)